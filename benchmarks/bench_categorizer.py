@@ -0,0 +1,93 @@
+"""
+Microbenchmark: processing.categorizer.pick_category vs the old per-keyword
+re.search loop. Checks both give the same category for every article, then
+times them with the shipped keyword list and with a 10x larger one.
+
+    python benchmarks/bench_categorizer.py [n_articles]
+"""
+import os
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import processing.categorizer as categorizer
+from processing.categorizer import CATEGORY_KEYWORDS, pick_category
+
+
+FILLER = """the company said on monday that its new model would reach dealers later this year
+while analysts expect demand to stay soft in europe and china as prices keep falling
+executives told investors the plan depends on costs and a stable supply of parts""".split()
+
+
+def legacy_pick_category(title, text, fallback_categories=None, keywords=CATEGORY_KEYWORDS):
+    hay = f"{title}\n{text}".lower()
+    scores = defaultdict(int)
+    for cat, kws in keywords.items():
+        for kw in kws:
+            if re.search(r"\b" + re.escape(kw) + r"\b", hay):
+                scores[cat] += 1
+    if scores:
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[0][0]
+    if fallback_categories:
+        return fallback_categories[0]
+    return "General"
+
+
+def scaled_keywords(factor, seed=7):
+    # more keywords per category: phrase variants of the real ones plus made-up terms
+    rnd = random.Random(seed)
+    out = {}
+    for cat, kws in CATEGORY_KEYWORDS.items():
+        extra = []
+        while len(extra) < len(kws) * (factor - 1):
+            kw = rnd.choice(kws)
+            extra.append(rnd.choice([f"{kw} {rnd.choice(FILLER)}", f"{kw}-{rnd.randint(1, 99)}", f"{kw}x{rnd.randint(1, 999)}"]))
+        out[cat] = kws + extra
+    return out
+
+
+def make_corpus(n, keywords, seed=42):
+    rnd = random.Random(seed)
+    all_kws = [kw for kws in keywords.values() for kw in kws]
+    docs = []
+    for _ in range(n):
+        words = [rnd.choice(FILLER) for _ in range(450)]
+        for _ in range(rnd.randint(0, 12)):
+            words.insert(rnd.randrange(len(words)), rnd.choice(all_kws).upper() if rnd.random() < 0.2 else rnd.choice(all_kws))
+        text = " ".join(words)[:3000]
+        docs.append((" ".join(rnd.choice(FILLER) for _ in range(8)).title(), text))
+    return docs
+
+
+def timeit(fn, docs):
+    t = time.perf_counter()
+    out = [fn(title, text) for title, text in docs]
+    return out, (time.perf_counter() - t) / len(docs) * 1e6
+
+
+def run(label, keywords, n):
+    docs = make_corpus(n, keywords)
+    saved = categorizer.CATEGORY_KEYWORDS, categorizer._SINGLE, categorizer._MULTI
+    categorizer.CATEGORY_KEYWORDS = keywords
+    categorizer._SINGLE, categorizer._MULTI = categorizer._build_index(keywords)
+    try:
+        new, new_us = timeit(pick_category, docs)
+        old, old_us = timeit(lambda t, x: legacy_pick_category(t, x, keywords=keywords), docs)
+    finally:
+        categorizer.CATEGORY_KEYWORDS, categorizer._SINGLE, categorizer._MULTI = saved
+
+    mismatches = sum(a != b for a, b in zip(new, old))
+    n_kw = sum(len(v) for v in keywords.values())
+    print(f"{label:>4}  keywords={n_kw:5d}  legacy={old_us:8.1f} us/doc  indexed={new_us:7.1f} us/doc  "
+          f"speedup={old_us / new_us:5.1f}x  mismatches={mismatches}")
+    return mismatches
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    bad = run("1x", CATEGORY_KEYWORDS, n) + run("10x", scaled_keywords(10), n)
+    sys.exit(1 if bad else 0)
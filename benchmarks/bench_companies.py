@@ -0,0 +1,108 @@
+"""
+Microbenchmark: processing.companies.extract_companies (one trie scan) vs the
+old one-IGNORECASE-regex-per-company loop. Checks both return the same
+companies for every article, then times them with the shipped alias file and
+with it padded to ~500 and ~5000 aliases of made-up companies.
+The trie should stay flat; the regex loop grows with the alias count.
+
+    python benchmarks/bench_companies.py [n_articles]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import processing.companies as companies
+from processing.companies import COMPANY_ALIASES, EXCLUDE_ENTITIES, extract_companies, fallback_from_title
+
+
+FILLER = """the company said on monday that its new model would reach dealers later this year
+while analysts expect demand to stay soft in europe and china as prices keep falling
+executives told investors the plan depends on costs and a stable supply of parts""".split()
+
+
+def legacy_patterns(aliases):
+    patterns = []
+    for canonical, names in aliases.items():
+        names = sorted(names, key=len, reverse=True)
+        pat = r"(?<![a-z0-9])(" + "|".join(re.escape(a.lower().strip()) for a in names) + r")(?![a-z0-9])"
+        patterns.append((canonical, re.compile(pat, re.IGNORECASE)))
+    return patterns
+
+
+def legacy_extract(title, text, patterns, max_companies=8):
+    hay = f"{title}\n{text}"
+    found = []
+    for canonical, pat in patterns:
+        if pat.search(hay):
+            found.append(canonical)
+            if len(found) >= max_companies:
+                break
+    if not found:
+        found = fallback_from_title(title, max_names=3)
+    return [c for c in found if c not in EXCLUDE_ENTITIES]
+
+
+def scaled_aliases(total, seed=7):
+    # the real aliases first (same report order), then made-up suppliers/startups
+    rnd = random.Random(seed)
+    out = {k: list(v) for k, v in COMPANY_ALIASES.items()}
+    n = sum(len(v) for v in out.values())
+    while n < total:
+        name = "".join(rnd.choice("bcdfgklmnprstvz") + rnd.choice("aeiou") for _ in range(rnd.randint(2, 4)))
+        suffix = rnd.choice(["", " motors", " energy", "-tech", " systems", " ag"])
+        canonical = (name + suffix).title()
+        if canonical in out:
+            continue
+        out[canonical] = [name + suffix] + ([name] if suffix and rnd.random() < 0.5 else [])
+        n += len(out[canonical])
+    return out
+
+
+def make_corpus(n, aliases, seed=42):
+    rnd = random.Random(seed)
+    all_aliases = [a for names in aliases.values() for a in names]
+    docs = []
+    for _ in range(n):
+        words = [rnd.choice(FILLER) for _ in range(450)]
+        for _ in range(rnd.randint(0, 6)):
+            a = rnd.choice(all_aliases)
+            words.insert(rnd.randrange(len(words)), rnd.choice([a, a.title(), a.upper(), a + "'s", f"({a})"]))
+        # near misses that must not match: alias glued to a word
+        words.insert(rnd.randrange(len(words)), rnd.choice(all_aliases) + "x")
+        text = " ".join(words)[:3000]
+        docs.append((" ".join(rnd.choice(FILLER) for _ in range(8)).title(), text))
+    return docs
+
+
+def timeit(fn, docs):
+    t = time.perf_counter()
+    out = [fn(title, text) for title, text in docs]
+    return out, (time.perf_counter() - t) / len(docs) * 1e6
+
+
+def run(aliases, n):
+    docs = make_corpus(n, aliases)
+    patterns = legacy_patterns(aliases)
+    saved = companies._TRIE, companies._RANK
+    companies._TRIE, companies._RANK = companies._build_trie(aliases)
+    try:
+        new, new_us = timeit(extract_companies, docs)
+        old, old_us = timeit(lambda t, x: legacy_extract(t, x, patterns), docs)
+    finally:
+        companies._TRIE, companies._RANK = saved
+
+    mismatches = sum(a != b for a, b in zip(new, old))
+    n_aliases = sum(len(v) for v in aliases.values())
+    print(f"aliases={n_aliases:5d}  legacy={old_us:9.1f} us/doc  trie={new_us:7.1f} us/doc  "
+          f"speedup={old_us / new_us:6.1f}x  mismatches={mismatches}")
+    return mismatches
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    bad = sum(run(a, n) for a in (COMPANY_ALIASES, scaled_aliases(500), scaled_aliases(5000)))
+    sys.exit(1 if bad else 0)
@@ -0,0 +1,121 @@
+"""
+Benchmark: processing.trends.hot_stories (MinHash/LSH candidates) vs the old
+all-groups SequenceMatcher scan. Synthetic headlines with wire-story
+near-duplicates across sources; reports time per call and how many articles
+end up in a different group than with the old scan.
+
+    python benchmarks/bench_hot_stories.py [sizes...]     (default: 800 5000 50000)
+
+Groups are compared with an exact reference scan (old rule, with difflib's
+cheap upper bounds in front); the old scan itself is only timed up to 1000 rows.
+"""
+import os
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processing.clustering import cluster_keys
+from processing.trends import hot_stories, title_key
+
+
+WORDS = """tesla volvo polestar bmw ford gm toyota byd nio rivian stellantis hyundai battery plant recall
+ev sales europe china tariffs layoffs charging network robotaxi launch lidar startup raises series
+funding solid-state cells factory production cut quarter profit record warns supply chip shortage
+union strike deal merger hybrid software update autonomy trial permit regulators probe crash price
+war discounts demand slows exports mexico investment billion gigafactory lithium mine deal""".split()
+STOP = "the a to of in for on with as at by from and its after over new says could will".split()
+SOURCES = ["Reuters", "Automotive News", "Just Auto", "Electrek", "InsideEVs", "The Verge", "TechCrunch"]
+
+
+def vocabulary(rnd, n=3000):
+    # real headline words + pronounceable made-up names, so unrelated titles overlap like real ones do
+    made_up = [
+        "".join(rnd.choice("bcdfghjklmnprstvwz") + rnd.choice("aeiou") for _ in range(rnd.randint(2, 4)))
+        + rnd.choice(["", "s", "er", "ing", "ed", ""])
+        for _ in range(n)
+    ]
+    return WORDS + made_up
+
+
+def legacy_groups(keys, threshold, bounds=False):
+    # the old hot_stories loop; bounds=True adds real_quick_ratio/quick_ratio in front,
+    # which are upper bounds of ratio() and so give the exact same groups, faster
+    groups = []
+    for idx, key in enumerate(keys):
+        for g in groups:
+            sm = SequenceMatcher(None, key, keys[g[0]])
+            if bounds and (sm.real_quick_ratio() < threshold or sm.quick_ratio() < threshold):
+                continue
+            if sm.ratio() >= threshold:
+                g.append(idx)
+                break
+        else:
+            groups.append([idx])
+    return groups
+
+
+def rewrite(title, rnd, vocab):
+    # how another outlet words the same wire story
+    w = title.split()
+    for _ in range(rnd.randint(0, 2)):
+        op = rnd.random()
+        if op < 0.3 and len(w) > 4:
+            del w[rnd.randrange(len(w))]
+        elif op < 0.6:
+            w.insert(rnd.randrange(len(w) + 1), rnd.choice(vocab + STOP))
+        elif op < 0.8:
+            w[rnd.randrange(len(w))] = rnd.choice(vocab)
+        else:
+            i = rnd.randrange(len(w))
+            w[i] = w[i] + "s"
+    t = " ".join(w)
+    return t.capitalize() + rnd.choice(["", "", " - report", ": sources", "!"])
+
+
+def make_rows(n, seed=11):
+    rnd = random.Random(seed)
+    vocab = vocabulary(rnd)
+    rows = []
+    while len(rows) < n:
+        base = " ".join(rnd.choice(STOP) if rnd.random() < 0.3 else rnd.choice(vocab) for _ in range(rnd.randint(6, 13)))
+        for src in rnd.sample(SOURCES, k=rnd.choice([1, 1, 1, 2, 3, 5])):
+            rows.append({"title": rewrite(base, rnd, vocab), "url": f"https://x/{len(rows)}", "source": src,
+                         "category": "OEM", "summary": ""})
+    rnd.shuffle(rows)
+    return rows[:n]
+
+
+def partition(groups):
+    return {i: g[0] for g in groups for i in g}
+
+
+def run(n, threshold=0.82):
+    rows = make_rows(n)
+    keys = [title_key(r["title"]) for r in rows]
+
+    t = time.perf_counter()
+    hot_stories(rows, similarity_threshold=threshold, max_groups=10)
+    new_s = time.perf_counter() - t
+
+    line = f"n={n:6d}  lsh={new_s * 1000:9.1f} ms"
+    if n <= 1000:
+        t = time.perf_counter()
+        legacy_groups(keys, threshold)
+        old_s = time.perf_counter() - t
+        line += f"  legacy={old_s * 1000:9.1f} ms  speedup={old_s / new_s:6.1f}x"
+    if n <= 10000:
+        ref = legacy_groups(keys, threshold, bounds=True)
+        new = cluster_keys(keys, threshold)
+        a, b = partition(ref), partition(new)
+        moved = sum(a[i] != b[i] for i in a)
+        line += f"  groups={len(ref)}/{len(new)}  articles_in_other_group={moved}"
+    print(line)
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or [800, 5000, 50000]
+    for n in sizes:
+        run(n)
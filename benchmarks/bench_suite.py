@@ -0,0 +1,238 @@
+"""
+Offline benchmark suite for the processing/* hot paths and the collector, on the
+seeded synthetic corpus (benchmarks/corpus.py) at 1k / 10k / 100k articles.
+
+Per benchmark and size: throughput (articles/s), latency percentiles (per call;
+per article for the per-article functions) and peak Python memory of one pass
+(tracemalloc, measured on a separate pass so it doesn't slow the timed ones).
+Results go to stdout as a table and, with --json, to a file together with the
+machine/commit they were taken on, so two runs can be diffed.
+
+    python benchmarks/bench_suite.py                               (all benchmarks, 1k 10k 100k)
+    python benchmarks/bench_suite.py --sizes 1000 10000 --only pick_category hot_stories
+    python benchmarks/bench_suite.py --json bench.json --fixture recorded.json
+
+collect / stream_many replay HTTP from a fixture (benchmarks/http_fixture.py,
+synthetic unless --fixture is given) with --latency seconds per request; they
+download and parse every page, so their size is capped by --collect-max.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import NOW, SIZES, make_articles
+from dashboard.snapshot import company_velocity_wow
+from processing.categorizer import pick_category
+from processing.companies import extract_companies
+from processing.trends import hot_stories, term_counts, top_terms_by_category
+from processing.termmatrix import TermMatrix
+from processing.velocity import velocity_wow
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def peak_kb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+# --- benchmarks: each takes (rows, args) and returns (one_pass, unit). one_pass(calls) runs
+# the benchmark and returns per-call latencies; unit is what one call covers. calls=1 is
+# what the memory pass asks for (one report call; per-article benchmarks ignore it).
+
+def per_article(fn):
+    def bench(rows, args):
+        docs = [(r["title"], r["text"]) for r in rows]
+
+        def one_pass(calls=None):
+            lat = []
+            for title, text in docs:
+                t = time.perf_counter()
+                fn(title, text)
+                lat.append(time.perf_counter() - t)
+            return lat
+        return one_pass, "article"
+    return bench
+
+
+def per_report(fn, repeat):
+    # whole-corpus report functions: each call is one latency sample
+    def bench(rows, args):
+        def one_pass(calls=None):
+            lat = []
+            for _ in range(calls or repeat(len(rows))):
+                t = time.perf_counter()
+                fn(rows)
+                lat.append(time.perf_counter() - t)
+            return lat
+        return one_pass, "report"
+    return bench
+
+
+def _with_terms(rows):
+    # the report path reads stored article_terms, so the counts are attached up front
+    for r in rows:
+        r["terms"] = term_counts(r)
+    return rows
+
+
+def collector(concurrent):
+    def bench(rows, args):
+        from scrapers import rss_collector
+        from http_fixture import feed_urls, load, replay, synth_fixture
+
+        if args.fixture:
+            fixture = load(args.fixture)
+        else:
+            n_feeds = max(1, min(len(rows), args.collect_max) // rss_collector.MAX_ENTRIES)
+            fixture = synth_fixture(n_feeds, seed=args.seed)
+        urls = feed_urls(fixture)
+
+        def one_pass(calls=None):
+            lat = []
+            with replay(fixture, latency=args.latency):
+                if concurrent:
+                    # per article: time from the start until it was yielded
+                    t = time.perf_counter()
+                    for _ in rss_collector.stream_many(urls):
+                        lat.append(time.perf_counter() - t)
+                else:
+                    for u in urls:
+                        t = time.perf_counter()
+                        n = len(rss_collector.collect(u))
+                        lat += [(time.perf_counter() - t) / max(1, n)] * n
+            return lat
+        return one_pass, "article"
+    return bench
+
+
+def _term_matrix(rows):
+    # one matrix, then everything a report asks of it
+    m = TermMatrix.from_rows(rows, now=NOW)
+    m.top_terms_by_category(top_n=10)
+    m.velocity(7)
+    m.velocity(28)
+    m.surges(7, baseline=3)
+
+
+def _repeat(n):
+    return 1 if n >= 100000 else 3 if n >= 10000 else 10
+
+
+BENCHMARKS = {
+    "pick_category": per_article(pick_category),
+    "extract_companies": per_article(extract_companies),
+    "hot_stories": per_report(lambda rows: hot_stories(rows, similarity_threshold=0.82, max_groups=8), _repeat),
+    "top_terms_by_category": per_report(lambda rows: top_terms_by_category(rows, top_n=10), _repeat),
+    "velocity_wow": per_report(lambda rows: velocity_wow(rows, now=NOW), _repeat),
+    "company_velocity_wow": per_report(lambda rows: company_velocity_wow(rows, now=NOW), _repeat),
+    "term_matrix": per_report(_term_matrix, _repeat),
+    "collect": collector(concurrent=False),
+    "stream_many": collector(concurrent=True),
+}
+NEEDS_TERMS = {"top_terms_by_category", "velocity_wow", "term_matrix"}
+COLLECTORS = {"collect", "stream_many"}
+
+
+def run_one(name, rows, args):
+    rows = deepcopy(rows)  # hot_stories/velocity cache tokens on the rows; every benchmark starts clean
+    if name in NEEDS_TERMS:
+        _with_terms(rows)
+    if name in COLLECTORS:
+        rows = rows[:args.collect_max]
+    one_pass, unit = BENCHMARKS[name](rows, args)
+
+    t = time.perf_counter()
+    lat = one_pass()
+    seconds = time.perf_counter() - t
+    passes = len(lat) if unit == "report" else 1
+    lat.sort()
+    result = {
+        "benchmark": name,
+        "n": len(rows),
+        "unit": unit,
+        "samples": len(lat),
+        "seconds": round(seconds, 4),
+        "articles_per_s": round(len(rows) * passes / seconds, 1) if seconds else None,
+        **{f"p{p}_ms": round(percentile(lat, p) * 1000, 4) for p in (50, 90, 95, 99)},
+        "max_ms": round(lat[-1] * 1000, 4) if lat else None,
+    }
+    if not args.no_memory:
+        result["peak_kb"] = peak_kb(lambda: one_pass(calls=1))
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "taken_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    p.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    p.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--json", help="write the results (+ environment) to this file")
+    p.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    p.add_argument("--fixture", help="recorded HTTP fixture for collect/stream_many (default: synthetic)")
+    p.add_argument("--latency", type=float, default=0.02, help="seconds added to every replayed request")
+    p.add_argument("--collect-max", type=int, default=1000, help="articles downloaded by collect/stream_many")
+    args = p.parse_args(argv)
+
+    results = []
+    print(f"{'benchmark':>22} {'n':>7} {'articles/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak MB':>8}")
+    for n in args.sizes:
+        rows = make_articles(n, args.seed)
+        for name in args.only:
+            if name in COLLECTORS and results and any(
+                r["benchmark"] == name and r["n"] == min(n, args.collect_max) for r in results
+            ):
+                continue  # capped size already measured
+            r = run_one(name, rows, args)
+            results.append(r)
+            peak = f"{r['peak_kb'] / 1024:8.1f}" if "peak_kb" in r else f"{'-':>8}"
+            print(f"{name:>22} {r['n']:7d} {r['articles_per_s']:11.0f} {r['p50_ms']:9.3f} {r['p95_ms']:9.3f} "
+                  f"{r['p99_ms']:9.3f} {peak}", flush=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "seed": args.seed, "results": results}, f, indent=1)
+        print(f"results written to {args.json}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
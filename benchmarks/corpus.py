@@ -0,0 +1,215 @@
+"""
+Seeded synthetic corpus for the benchmarks: automotive-style headlines and
+bodies built from the real category keywords and company aliases, wire stories
+re-run by several outlets (reworded titles, lightly edited bodies, fetched
+hours apart) and fetch/publish dates spread over the last weeks the way feeds
+deliver them (weekday heavy, mixed RFC-822 / ISO strings, some missing).
+
+Same seed + same n -> the same rows, so runs on different machines compare.
+
+    from benchmarks.corpus import make_articles
+    rows = make_articles(10000)    # report-shaped dicts, newest first
+
+    python benchmarks/corpus.py 10000 bench.db    (the same rows stored in a SQLite file)
+"""
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processing.categorizer import CATEGORY_KEYWORDS
+from processing.companies import COMPANY_ALIASES
+
+
+SIZES = (1000, 10000, 100000)
+DAYS = 28
+# fixed "now" so the same seed gives the same week buckets whenever it runs
+NOW = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+SOURCES = [
+    "Reuters", "Automotive News", "Just Auto", "Electrek", "InsideEVs", "The Verge",
+    "TechCrunch", "Autocar", "Car and Driver", "CnEVPost", "Teslarati", "Green Car Reports",
+]
+VERBS = [
+    "recalls", "unveils", "delays", "cuts", "expands", "plans", "wins", "loses", "raises",
+    "launches", "halts", "boosts", "slashes", "confirms", "denies", "targets", "opens", "shuts",
+]
+OBJECTS = [
+    "{kw} program", "{kw} plant in {place}", "prices on {model}", "{n} jobs at {name}", "{kw} deal with {name}",
+    "{model} production", "{kw} targets", "{kw} outlook", "${n}M for {name}", "{name} {kw} partnership",
+    "{n}GWh {kw} capacity", "{model} in {place}", "{name} stake", "{model} {kw} update", "{place} {kw} push",
+]
+PLACES = ["Europe", "China", "Mexico", "Texas", "Germany", "Hungary", "Ohio", "India", "Japan", "the UK", "Sweden"]
+MODELS = ["Model Y", "ID.4", "EX30", "Ioniq 5", "Mach-E", "Seal", "R2", "Polestar 4", "i4", "bZ4X", "Zeekr 001"]
+SENTENCES = [
+    "{company} said on {day} that its {kw} plans remain on track despite softer demand in {place}.",
+    "Analysts expect {kw} costs to keep falling as {company} and rivals add capacity.",
+    "The move follows a similar step by {company} earlier this {period}, according to people familiar with the matter.",
+    "Executives told investors the {model} would reach dealers in {place} by {year}.",
+    "Shares of {company} rose {n} percent after the announcement on {day}.",
+    "Regulators in {place} are reviewing {kw} rules that could affect {company} and its suppliers.",
+    "Supply of {kw} remains tight, and the company warned of a {n} percent hit to output.",
+    "A spokesperson for {company} declined to comment on {kw} talks.",
+    "The {model} uses a new {kw} platform shared with {company}.",
+    "Production at the {place} site will resume once {kw} parts arrive, the company said.",
+    "The startup has raised ${n} million so far and plans a series of {kw} pilots with {company}.",
+    "Union officials said the {kw} changes would affect about {n} workers in {place}.",
+]
+DAYNAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+TAILS = [
+    "", "", "", " after {n}-month review", " as {place} sales slow", " amid {kw} probe", " ahead of {year} launch",
+    " in blow to {name}", " with {name} backing", " despite {kw} setback", " for {name} lineup", " - {name} CEO",
+]
+
+
+def _made_up(rnd, n=4000):
+    # startups, suppliers, model and project names: headlines are far more varied than the keyword lists
+    return [
+        "".join(rnd.choice("bcdfghklmnprstvz") + rnd.choice("aeiou") for _ in range(rnd.randint(2, 3))).title()
+        + rnd.choice(["", "", " Motors", " Energy", " Mobility", "-X", " Labs", " " + str(rnd.randint(2, 99))])
+        for _ in range(n)
+    ]
+
+
+class _Words:
+    def __init__(self, rnd):
+        self.rnd = rnd
+        self.keywords = [kw for kws in CATEGORY_KEYWORDS.values() for kw in kws]
+        self.by_cat = {cat: list(kws) for cat, kws in CATEGORY_KEYWORDS.items()}
+        self.companies = list(COMPANY_ALIASES)
+        self.aliases = {c: names for c, names in COMPANY_ALIASES.items()}
+        self.names = _made_up(rnd)
+
+    def fill(self, template, cat, company):
+        rnd = self.rnd
+        kws = self.by_cat[cat] if rnd.random() < 0.7 else self.keywords
+        alias = rnd.choice(self.aliases[company])
+        return template.format(
+            kw=rnd.choice(kws), company=rnd.choice([company, alias.title(), rnd.choice(self.companies)]),
+            place=rnd.choice(PLACES), model=rnd.choice(MODELS + self.names), n=rnd.randint(2, 900),
+            name=rnd.choice(self.names),
+            year=rnd.randint(2026, 2030), day=rnd.choice(DAYNAMES), period=rnd.choice(["month", "year", "quarter"])
+        )
+
+
+def _story(words):
+    rnd = words.rnd
+    cat = rnd.choice(list(CATEGORY_KEYWORDS))
+    # known companies in half the stories, the rest are about someone the alias file doesn't list
+    company = rnd.choice(words.companies)
+    who = company if rnd.random() < 0.5 else rnd.choice(words.names)
+    title = f"{who} {rnd.choice(VERBS)} " + words.fill(rnd.choice(OBJECTS) + rnd.choice(TAILS), cat, company)
+    body = [words.fill(rnd.choice(SENTENCES), cat, company) for _ in range(rnd.randint(8, 30))]
+    return cat, company, title, body
+
+
+def _reword(title, rnd):
+    # how another outlet words the same wire story
+    w = title.split()
+    for _ in range(rnd.randint(0, 2)):
+        op = rnd.random()
+        if op < 0.3 and len(w) > 4:
+            del w[rnd.randrange(1, len(w))]
+        elif op < 0.7:
+            w.insert(rnd.randrange(1, len(w) + 1), rnd.choice(["new", "report:", "again", "in", "after", "amid", "says"]))
+        elif not w[-1].endswith("s"):
+            w[-1] = w[-1] + "s"
+    return " ".join(w) + rnd.choice(["", "", "", " - report", ": sources"])
+
+
+def _edit(body, rnd):
+    # a copy of the wire text: same sentences, now and then one dropped or a local one added
+    body = list(body)
+    if len(body) > 4 and rnd.random() < 0.5:
+        del body[rnd.randrange(len(body))]
+    if rnd.random() < 0.3:
+        body.append(rnd.choice(["Reporting by staff.", "Editing by the desk.", "This story has been updated."]))
+    return body
+
+
+def _fetch_time(rnd):
+    # more news on weekdays and in European/US working hours
+    while True:
+        t = NOW - timedelta(seconds=rnd.randrange(DAYS * 86400))
+        if t.weekday() >= 5 and rnd.random() < 0.6:
+            continue
+        if not 6 <= t.hour <= 21 and rnd.random() < 0.5:
+            continue
+        return t
+
+
+def _published(t, rnd):
+    # what feeds put in pubDate/updated: RFC-822 mostly, ISO sometimes, now and then nothing
+    p = rnd.random()
+    if p < 0.05:
+        return ""
+    if p < 0.7:
+        return format_datetime(t)
+    if p < 0.9:
+        return t.isoformat()
+    return t.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def make_articles(n, seed=42):
+    """
+    n article dicts shaped like storage.db.query_articles rows (+ "text", the body),
+    newest fetched first. About a third belong to stories carried by 2-5 sources.
+    """
+    rnd = random.Random(seed)
+    words = _Words(rnd)
+    rows = []
+    while len(rows) < n:
+        cat, company, title, body = _story(words)
+        first = _fetch_time(rnd)
+        for k, source in enumerate(rnd.sample(SOURCES, k=rnd.choice([1, 1, 1, 1, 2, 2, 3, 5]))):
+            fetched = min(NOW, first + timedelta(minutes=rnd.randint(0, 600) * (k > 0)))
+            published = fetched - timedelta(minutes=rnd.randint(5, 360))
+            text = " ".join(body if k == 0 else _edit(body, rnd))
+            rows.append({
+                "title": title if k == 0 else _reword(title, rnd),
+                "url": f"https://{source.lower().replace(' ', '')}.example/{len(rows)}",
+                "source": source,
+                "published": _published(published, rnd),
+                "fetched_at": fetched.isoformat(),
+                "category": cat,
+                "companies": json.dumps([company] + ([rnd.choice(words.companies)] if rnd.random() < 0.3 else [])),
+                "summary": "\n".join("• " + s for s in rnd.sample(body, k=min(3, len(body)))),
+                "text": text[:3000],
+            })
+    rows = rows[:n]
+    rows.sort(key=lambda r: r["fetched_at"], reverse=True)
+    for i, r in enumerate(rows):
+        r["id"] = n - i
+    return rows
+
+
+def fill_db(path, n, seed=42, batch=1000):
+    """Store make_articles(n, seed) in the SQLite file at `path` (created/migrated) via upsert_articles."""
+    import zlib
+    from processing.trends import term_counts
+    from storage.db import connect, migrate, upsert_articles
+
+    conn = migrate(connect(path))
+    rows = make_articles(n, seed)[::-1]
+    cols = ("title", "url", "source", "published", "fetched_at", "category", "companies", "summary")
+    for i in range(0, len(rows), batch):
+        with conn:
+            upsert_articles(conn, [
+                ({**{c: r[c] for c in cols}, "body": zlib.compress(r["text"].encode("utf-8"))}, term_counts(r))
+                for r in rows[i:i + batch]
+            ])
+    return conn
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    if len(sys.argv) > 2:
+        fill_db(sys.argv[2], n).close()
+        print(f"{n} articles stored in {sys.argv[2]}")
+    else:
+        for r in make_articles(n)[:20]:
+            print(r["fetched_at"][:16], f"{r['source']:>18}", f"{r['category']:>13}", r["title"])
@@ -0,0 +1,181 @@
+"""
+Recorded HTTP for benchmarking scrapers.rss_collector without a network.
+
+A fixture is {url: {"status", "headers", "body"}}: RSS feeds and article pages,
+either recorded once from the real sources or built from the synthetic corpus.
+replay() swaps requests.get (used by the feed fetch and by newspaper's
+download) for a lookup in the fixture, honours If-None-Match /
+If-Modified-Since with a 304 like a real server, and can add a fixed latency
+per request so the concurrent collector has something to overlap.
+
+    python benchmarks/http_fixture.py record fixture.json        (needs network, once)
+    python benchmarks/http_fixture.py synth fixture.json [n_feeds]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import format_datetime
+from html import escape
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers import rss_collector
+from corpus import NOW, make_articles
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAST_MODIFIED = format_datetime(NOW, usegmt=True)
+
+
+def synth_fixture(n_feeds=20, per_feed=rss_collector.MAX_ENTRIES, seed=42):
+    """n_feeds RSS feeds on their own hosts with per_feed articles each, pages from make_articles."""
+    rows = make_articles(n_feeds * per_feed, seed)
+    fixture = {}
+    for f in range(n_feeds):
+        feed_url = f"https://feed{f}.example/rss"
+        items = []
+        for i, r in enumerate(rows[f * per_feed:(f + 1) * per_feed]):
+            url = f"https://site{f % max(1, n_feeds // 2)}.example/{f}/{i}"
+            items.append(
+                f"<item><title>{escape(r['title'])}</title><link>{url}</link><guid>{url}</guid>"
+                f"<pubDate>{escape(r['published'])}</pubDate><description>{escape(r['summary'])}</description></item>"
+            )
+            paragraphs = "".join(f"<p>{escape(s)}.</p>" for s in r["text"].split(". "))
+            fixture[url] = _response(
+                f"<html><head><title>{escape(r['title'])}</title></head><body><nav>Home | News</nav>"
+                f"<article><h1>{escape(r['title'])}</h1>{paragraphs}</article><footer>(c)</footer></body></html>",
+                "text/html; charset=utf-8"
+            )
+        fixture[feed_url] = _response(
+            f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>{escape(rows[f * per_feed]["source"])}</title>'
+            f"{''.join(items)}</channel></rss>",
+            "application/rss+xml; charset=utf-8", etag=f'"feed{f}-{seed}"'
+        )
+    return fixture
+
+
+def _response(body, content_type, status=200, etag=None):
+    headers = {"Content-Type": content_type, "Last-Modified": LAST_MODIFIED}
+    if etag:
+        headers["ETag"] = etag
+    return {"status": status, "headers": headers, "body": body}
+
+
+def record(feed_urls, per_feed=rss_collector.MAX_ENTRIES, timeout=20):
+    """Fetch the feeds and their first per_feed article pages for real and return them as a fixture."""
+    import feedparser
+
+    fixture = {}
+
+    def get(url):
+        r = requests.get(url, timeout=timeout, headers={"User-Agent": rss_collector.USER_AGENT})
+        fixture[url] = {
+            "status": r.status_code,
+            "headers": {k: v for k, v in r.headers.items() if k in ("Content-Type", "ETag", "Last-Modified")},
+            "body": r.text,
+        }
+        return r
+
+    for feed_url in feed_urls:
+        try:
+            feed = feedparser.parse(get(feed_url).content)
+        except Exception as e:
+            print(f"skipping {feed_url}: {e}")
+            continue
+        for entry in feed.entries[:per_feed]:
+            if getattr(entry, "link", None):
+                try:
+                    get(entry.link)
+                except Exception as e:
+                    print(f"skipping {entry.link}: {e}")
+    return fixture
+
+
+def save(fixture, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False)
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Replay:
+    """The fake requests.get; .requests counts every call, .per_host the concurrent peak per host."""
+
+    def __init__(self, fixture, latency=0.0):
+        self.fixture = fixture
+        self.latency = latency
+        self.requests = 0
+        self.not_modified = 0
+        self.per_host = {}
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, url=None, headers=None, **kwargs):
+        host = urlparse(url).netloc
+        with self._lock:
+            self.requests += 1
+            self._active[host] = self._active.get(host, 0) + 1
+            self.per_host[host] = max(self.per_host.get(host, 0), self._active[host])
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            return self._respond(url, headers or {})
+        finally:
+            with self._lock:
+                self._active[host] -= 1
+
+    def _respond(self, url, headers):
+        rec = self.fixture.get(url) or {"status": 404, "headers": {}, "body": ""}
+        status = rec["status"]
+        etag, modified = rec["headers"].get("ETag"), rec["headers"].get("Last-Modified")
+        if status == 200 and (
+            (etag and headers.get("If-None-Match") == etag)
+            or (not etag and modified and headers.get("If-Modified-Since") == modified)
+        ):
+            status = 304
+            with self._lock:
+                self.not_modified += 1
+        r = requests.Response()
+        r.url = url
+        r.status_code = status
+        r.headers = CaseInsensitiveDict(rec["headers"])
+        r._content = rec["body"].encode("utf-8") if status == 200 else b""
+        r.encoding = "utf-8"
+        return r
+
+
+@contextmanager
+def replay(fixture, latency=0.0):
+    """Serve every requests.get from `fixture` inside the block; yields the Replay (request counts)."""
+    fake = Replay(fixture, latency)
+    saved = requests.get
+    requests.get = fake
+    try:
+        yield fake
+    finally:
+        requests.get = saved
+
+
+def feed_urls(fixture):
+    return [u for u, rec in fixture.items() if "xml" in rec["headers"].get("Content-Type", "")]
+
+
+if __name__ == "__main__":
+    cmd, path = sys.argv[1], sys.argv[2]
+    if cmd == "record":
+        with open(os.path.join(ROOT, "sources", "rss_sources.json"), encoding="utf-8") as f:
+            fixture = record([src["url"] for src in json.load(f)])
+    else:
+        fixture = synth_fixture(int(sys.argv[3]) if len(sys.argv) > 3 else 20)
+    save(fixture, path)
+    print(f"{len(fixture)} responses ({len(feed_urls(fixture))} feeds) written to {path}")
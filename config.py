@@ -7,4 +7,64 @@ EMAIL_PASS = os.getenv("EMAIL_PASS", "")
 EMAIL_TO = os.getenv("EMAIL_TO", "")
 
 SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
\ No newline at end of file
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+
+# RSS collection: RSS_MAX_WORKERS=1 falls back to fetching feeds one by one
+RSS_MAX_WORKERS = int(os.getenv("RSS_MAX_WORKERS", "16"))
+RSS_PER_HOST = int(os.getenv("RSS_PER_HOST", "2"))
+# wall-clock seconds for all feed + article downloads of a run; what isn't back by then is headline-only
+RSS_TIMEOUT_BUDGET = float(os.getenv("RSS_TIMEOUT_BUDGET", "300"))
+RSS_REQUEST_TIMEOUT = float(os.getenv("RSS_REQUEST_TIMEOUT", "20"))
+
+# Summarization. SUMMARY_BACKEND: openai | stub (offline fake client) | local (extractive, no network)
+SUMMARY_BACKEND = os.getenv("SUMMARY_BACKEND", "openai")
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4.1-mini")
+SUMMARY_TIMEOUT = float(os.getenv("SUMMARY_TIMEOUT", "30"))
+SUMMARY_BUDGET = float(os.getenv("SUMMARY_BUDGET", "600"))
+SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "8"))
+SUMMARY_MAX_RETRIES = int(os.getenv("SUMMARY_MAX_RETRIES", "5"))
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "200000"))
+# local fallback summaries of earlier runs (within MAX_ARTICLE_AGE_DAYS) sent to the LLM again per run
+SUMMARY_RETRY_MAX = int(os.getenv("SUMMARY_RETRY_MAX", "50"))
+
+# Ingest pipeline (main.py): stages run at the same time, handing articles on through queues of at
+# most PIPELINE_QUEUE_SIZE. collect/extract use RSS_MAX_WORKERS, summarize uses SUMMARY_MAX_WORKERS.
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "64"))
+PIPELINE_ANALYZE_WORKERS = int(os.getenv("PIPELINE_ANALYZE_WORKERS", "2"))
+PIPELINE_PERSIST_BATCH = int(os.getenv("PIPELINE_PERSIST_BATCH", "100"))
+
+# Run reports: every run is stored in the pipeline_runs table and, unless PIPELINE_REPORT_DIR is empty,
+# written there as JSON. PIPELINE_PROFILE=1 adds cProfile (stats file next to the report),
+# PIPELINE_TRACEMALLOC=1 the peak Python memory and where it was allocated. Both slow the run down.
+PIPELINE_REPORT_DIR = os.getenv(
+    "PIPELINE_REPORT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "runs")
+)
+PIPELINE_PROFILE = os.getenv("PIPELINE_PROFILE", "") in ("1", "true", "yes")
+PIPELINE_TRACEMALLOC = os.getenv("PIPELINE_TRACEMALLOC", "") in ("1", "true", "yes")
+
+# Analysis inputs (feed + compressed body per article, for reprocess.py) of articles fetched more than
+# ARTICLE_INPUT_DAYS ago are pruned every run; never fewer than MAX_ARTICLE_AGE_DAYS (fallback summary retries)
+ARTICLE_INPUT_DAYS = int(os.getenv("ARTICLE_INPUT_DAYS", "90"))
+
+# reprocess.py (re-categorize / re-extract companies over the whole history): REPROCESS_WORKERS
+# processes (0 = one per CPU), REPROCESS_CHUNK articles per task, REPROCESS_BATCH per transaction
+REPROCESS_WORKERS = int(os.getenv("REPROCESS_WORKERS", "0"))
+REPROCESS_CHUNK = int(os.getenv("REPROCESS_CHUNK", "500"))
+REPROCESS_BATCH = int(os.getenv("REPROCESS_BATCH", "5000"))
+
+# Rising terms (processing/baselines.py): exponentially weighted daily mean/variance per term over
+# a ~TERM_BASELINE_DAYS span, folded in once a day closes. Terms unseen for TERM_BASELINE_PRUNE_DAYS
+# are dropped and at most TERM_BASELINE_MAX_TERMS are kept, however large the vocabulary gets.
+TERM_BASELINE_DAYS = int(os.getenv("TERM_BASELINE_DAYS", "28"))
+TERM_BASELINE_PRUNE_DAYS = int(os.getenv("TERM_BASELINE_PRUNE_DAYS", "120"))
+TERM_BASELINE_MAX_TERMS = int(os.getenv("TERM_BASELINE_MAX_TERMS", "200000"))
+
+# Dashboard: seconds a worker serves its cached page before checking for a newer snapshot
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "30"))
+
+# Company aliases, {canonical name: [aliases]}; the order of the file is the order companies are reported in
+COMPANY_ALIASES_FILE = os.getenv(
+    "COMPANY_ALIASES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sources", "company_aliases.json")
+)
@@ -0,0 +1,274 @@
+import gzip
+import hashlib
+import json
+
+from flask import Blueprint, Response, jsonify, request
+
+from dashboard.snapshot import SNAPSHOT, rank_company_velocity
+from processing.dates import utc_ts
+from processing.termmatrix import TermMatrix, SURGE_BASELINE_WINDOWS
+from processing.baselines import term_surges, SURGE_DAYS
+from processing.trends import hot_stories, top_terms_by_category
+from processing.velocity import velocity_from_counts
+from storage.db import (
+    connect, attach_terms, week_over_week, query_articles, search_articles, top_companies, load_snapshot,
+    pipeline_runs
+)
+
+
+# Read-only JSON for internal tools. Every response carries an ETag (304 on a
+# matching If-None-Match) and is gzipped when the client accepts it.
+api = Blueprint("api", __name__, url_prefix="/api")
+
+MAX_LIMIT = 500
+GZIP_MIN_BYTES = 1024
+ARTICLE_FIELDS = (
+    "id", "title", "url", "source", "published", "fetched_at", "category", "companies", "summary",
+    "published_ts", "fetched_ts"
+)
+
+
+class BadRequest(ValueError):
+    pass
+
+
+@api.errorhandler(BadRequest)
+def _bad_request(e):
+    return jsonify({"error": str(e)}), 400
+
+
+def _send(data):
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = hashlib.sha1(body).hexdigest()[:20]
+    zipped = len(body) >= GZIP_MIN_BYTES and "gzip" in request.accept_encodings
+    if zipped:
+        body = gzip.compress(body, compresslevel=5)
+        etag += "-gz"  # a different representation gets a different ETag
+
+    resp = Response(body, mimetype="application/json")
+    if zipped:
+        resp.headers["Content-Encoding"] = "gzip"
+    resp.vary.add("Accept-Encoding")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.set_etag(etag)
+    return resp.make_conditional(request)
+
+
+def _int(name, default=None, lo=None, hi=None):
+    v = request.args.get(name)
+    if v is None or v == "":
+        return default
+    try:
+        v = int(v)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if lo is not None and v < lo:
+        raise BadRequest(f"{name} must be >= {lo}")
+    return min(v, hi) if hi is not None else v
+
+
+def _ts(name):
+    # ISO-8601 / RFC-822 date or epoch seconds
+    v = request.args.get(name)
+    if not v:
+        return None
+    ts = int(v) if v.isdigit() else utc_ts(v)
+    if ts is None:
+        raise BadRequest(f"{name}: can't parse date {v!r}")
+    return ts
+
+
+def _filters():
+    return {
+        "since": _ts("since"),
+        "until": _ts("until"),
+        "category": request.args.getlist("category") or None,
+        "company": request.args.get("company") or None,
+    }
+
+
+def _report_rows(conn, filters, limit=800):
+    # same input the dashboard page uses (latest `limit` rows), filtered in SQL
+    rows = query_articles(conn, limit=limit, **filters)
+    for r in rows:
+        r["category"] = r["category"] or "General"
+        r["summary"] = r["summary"] or ""
+    return attach_terms(conn, rows)
+
+
+@api.route("/articles")
+def articles():
+    """
+    ?since=&until=&category=(repeatable)&company=&limit=
+    (company = articles mentioning it, via article_companies)
+    Newest first, page back with ?before_id=<next_before_id>.
+    ?after_id=<last id seen> returns only newer articles, oldest first (page on with next_after_id).
+    """
+    filters = _filters()
+    after_id = _int("after_id", lo=0)
+    before_id = _int("before_id", lo=0)
+    limit = _int("limit", 100, lo=1, hi=MAX_LIMIT)
+
+    conn = connect()
+    try:
+        rows = query_articles(conn, limit=limit, fields=ARTICLE_FIELDS,
+                              after_id=after_id, before_id=before_id, **filters)
+    finally:
+        conn.close()
+
+    for r in rows:
+        try:
+            r["companies"] = json.loads(r["companies"] or "[]")
+        except ValueError:
+            r["companies"] = []
+
+    out = {"articles": rows, "count": len(rows)}
+    full = len(rows) == limit
+    if after_id is not None and before_id is None:
+        out["next_after_id"] = rows[-1]["id"] if rows else after_id
+    else:
+        out["next_before_id"] = rows[-1]["id"] if rows and full else None
+    return _send(out)
+
+
+@api.route("/search")
+def search():
+    """
+    ?q=&since=&until=&category=(repeatable)&company=&limit=&prefix=1
+    Ranked by bm25 (title > companies > summary). `word*` is a prefix query,
+    prefix=1 treats the last word as one too. company= filters like /articles does.
+    """
+    q = request.args.get("q", "").strip()
+    if not q:
+        raise BadRequest("q is required")
+    filters = _filters()
+    limit = _int("limit", 20, lo=1, hi=100)
+    prefix = request.args.get("prefix", "") in ("1", "true", "yes")
+
+    conn = connect()
+    try:
+        rows = search_articles(conn, q, limit=limit, prefix=prefix, fields=ARTICLE_FIELDS, **filters)
+    finally:
+        conn.close()
+
+    for r in rows:
+        try:
+            r["companies"] = json.loads(r["companies"] or "[]")
+        except ValueError:
+            r["companies"] = []
+    return _send({"query": q, "results": rows, "count": len(rows)})
+
+
+@api.route("/hot")
+def hot():
+    """?since=&until=&category=&company=&limit= ; no filters = what the page shows."""
+    filters = _filters()
+    limit = _int("limit", 10, lo=1, hi=50)
+    conn = connect()
+    try:
+        if not any(filters.values()) and limit == 10:
+            snap = load_snapshot(conn, SNAPSHOT)
+            if snap is not None:
+                return _send({"hot": snap[1]["hot"]})
+        rows = _report_rows(conn, filters)
+    finally:
+        conn.close()
+    return _send({"hot": hot_stories(rows, similarity_threshold=0.82, max_groups=limit)})
+
+
+@api.route("/trends")
+def trends():
+    """
+    ?since=&until=&category=&company=&limit= ; top terms per category (latest rows).
+    ?days=N instead: over every article of the last N UTC days (daily_category_terms).
+    """
+    filters = _filters()
+    limit = _int("limit", 10, lo=1, hi=50)
+    days = _int("days", lo=1, hi=366)
+    conn = connect()
+    try:
+        if days is not None:
+            matrix = TermMatrix.from_db(conn, days=days)
+            return _send({"days": days, "trends": matrix.top_terms_by_category(top_n=limit)})
+        if not any(filters.values()) and limit == 10:
+            snap = load_snapshot(conn, SNAPSHOT)
+            if snap is not None:
+                return _send({"trends": snap[1]["trends"]})
+        rows = _report_rows(conn, filters)
+    finally:
+        conn.close()
+    return _send({"trends": top_terms_by_category(rows, top_n=limit)})
+
+
+@api.route("/companies")
+def companies():
+    """?since=&until=&limit=20 ; most mentioned companies (articles per company) over the window."""
+    since, until = _ts("since"), _ts("until")
+    limit = _int("limit", 20, lo=1, hi=MAX_LIMIT)
+    conn = connect()
+    try:
+        rows = top_companies(conn, since=since, until=until, limit=limit)
+    finally:
+        conn.close()
+    return _send({"companies": [{"company": c, "articles": n} for c, n in rows]})
+
+
+@api.route("/velocity/categories")
+def category_velocity():
+    """?days=7 ; last `days` UTC days vs the `days` before, plus rising terms."""
+    days = _int("days", 7, lo=1, hi=90)
+    conn = connect()
+    try:
+        velocity = velocity_from_counts(
+            *week_over_week(conn, "category", days=days), *week_over_week(conn, "term", days=days)
+        )
+    finally:
+        conn.close()
+    return _send(velocity)
+
+
+@api.route("/velocity/surges")
+def surges():
+    """
+    ?limit=15 ; terms far above their stored baseline over the last 7 days (processing.baselines).
+    ?days=7&baseline=12 instead: z-score against the last `baseline` windows of `days` days, recounted.
+    """
+    days = _int("days", lo=1, hi=90)
+    baseline = _int("baseline", lo=1, hi=52)
+    limit = _int("limit", 15, lo=1, hi=MAX_LIMIT)
+    conn = connect()
+    try:
+        if days is None and baseline is None:
+            return _send({"days": SURGE_DAYS, "baseline": None, "surges": term_surges(conn, top_n=limit)})
+        days, baseline = days or SURGE_DAYS, baseline or SURGE_BASELINE_WINDOWS
+        matrix = TermMatrix.from_db(conn, days=days * (baseline + 1))
+    finally:
+        conn.close()
+    # "baseline": windows actually used, fewer than asked for on a young DB
+    return _send({"days": days, "baseline": len(matrix.baseline_windows(days, baseline)),
+                  "surges": matrix.surges(days, baseline, top_n=limit)})
+
+
+@api.route("/velocity/companies")
+def company_velocity():
+    """?days=7&limit=20"""
+    days = _int("days", 7, lo=1, hi=90)
+    limit = _int("limit", 20, lo=1, hi=MAX_LIMIT)
+    conn = connect()
+    try:
+        rows = rank_company_velocity(*week_over_week(conn, "company", days=days), top_n=limit)
+    finally:
+        conn.close()
+    return _send({"company_velocity": rows})
+
+
+@api.route("/runs")
+def runs():
+    """?limit=30 ; latest ingest runs, newest first, with seconds per stage (to spot regressions)."""
+    limit = _int("limit", 30, lo=1, hi=MAX_LIMIT)
+    conn = connect()
+    try:
+        rows = pipeline_runs(conn, limit=limit, stages=True)
+    finally:
+        conn.close()
+    return _send({"runs": rows})
@@ -5,207 +5,82 @@ load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "news.db")
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import json as _json
-from collections import Counter, defaultdict
+import threading
+import time
 
-from flask import Flask, render_template
-import sqlite3
-from collections import defaultdict
-from datetime import datetime, timedelta
+from flask import Flask, render_template, make_response, request
 
-from processing.trends import hot_stories, top_terms_by_category
-from processing.velocity import velocity_wow
+from config import DASHBOARD_CACHE_TTL
+from dashboard.snapshot import SNAPSHOT, refresh_snapshot
+from dashboard.api import api
+from storage.db import init_db, connect, migrate, snapshot_etag, load_snapshot
 from dotenv import load_dotenv
 load_dotenv()
 
 
-app = Flask(__name__)
-
-
-def get_db_rows(limit=500):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    # Columns: title,url,source,published,fetched_at,category,summary
-    cur.execute("""
-        SELECT title,url,source,published,fetched_at,category,companies,summary
-        FROM articles
-        ORDER BY id DESC
-        LIMIT ?
-    """, (limit,))
-    rows = [
-        {
-            "title": r[0],
-            "url": r[1],
-            "source": r[2],
-            "published": r[3] or "",
-            "fetched_at": r[4] or "",
-            "category": r[5] or "General",
-            "companies": r[6] or "[]",
-            "summary": r[7] or ""
-        }
-        for r in cur.fetchall()
-    ]
-    conn.close()
-    return rows
-
-
-def parse_iso_loose(s):
-    if not s:
-        return None
-    try:
-        # handles "2026-02-06T10:22:33+00:00"
-        return datetime.fromisoformat(s.replace("Z", "+00:00"))
-    except:
-        return None
-
-def company_velocity_wow(rows, now=None, top_n=20):
-    """
-    Velocity by company: mentions this week vs last week.
-    Uses fetched_at (falls back to published).
-    """
-    now = (now or datetime.utcnow()).replace(tzinfo=None)
-    start_this = now - timedelta(days=7)
-    start_last = now - timedelta(days=14)
-
-    def parse_dt(r):
-        # prefer fetched_at (ISO), fallback to published (RSS-ish)
-        dt = parse_iso_loose(r.get("fetched_at", ""))
-        if dt:
-            return dt.replace(tzinfo=None)
-        # try published as iso too (sometimes it is)
-        dt = parse_iso_loose(r.get("published", ""))
-        if dt:
-            return dt.replace(tzinfo=None)
-        return None
-
-    this_counts = Counter()
-    last_counts = Counter()
-
-    for r in rows:
-        dt = parse_dt(r)
-        if not dt:
-            continue
-
-        # companies stored as JSON string
+# schema migrations run once per process, on the first request: importing this module
+# (gunicorn workers, scripts, tests) doesn't touch the DB
+_migrated = threading.Event()
+_migrate_lock = threading.Lock()
+
+
+def ensure_schema():
+    if _migrated.is_set():
+        return
+    with _migrate_lock:
+        if not _migrated.is_set():
+            migrate(connect(DB_PATH)).close()
+            _migrated.set()
+
+
+def create_app():
+    app = Flask(__name__)
+    app.register_blueprint(api)
+    app.before_request(ensure_schema)
+    app.add_url_rule("/", view_func=index)
+    return app
+
+
+# rendered page of the latest snapshot; the DB is asked for the snapshot's ETag
+# at most once per DASHBOARD_CACHE_TTL seconds, and re-rendered only when it changed
+_page = {"etag": None, "html": None, "checked": 0.0}
+_page_lock = threading.Lock()
+
+
+def current_page():
+    with _page_lock:
+        now = time.monotonic()
+        if _page["html"] is not None and now - _page["checked"] < DASHBOARD_CACHE_TTL:
+            return _page["etag"], _page["html"]
+
+        conn = connect(DB_PATH)
         try:
-            comps = _json.loads(r.get("companies", "[]"))
-        except:
-            comps = []
-
-        if not comps:
-            continue
-
-        bucket = None
-        if dt >= start_this:
-            bucket = "this"
-        elif start_last <= dt < start_this:
-            bucket = "last"
-        else:
-            continue
-
-        # count each company once per article (not multiple times)
-        unique_comps = set(comps)
-        if bucket == "this":
-            this_counts.update(unique_comps)
-        else:
-            last_counts.update(unique_comps)
-
-    all_companies = set(this_counts.keys()) | set(last_counts.keys())
-    rows_out = []
-    for c in all_companies:
-        tw = this_counts[c]
-        lw = last_counts[c]
-        delta = tw - lw
-        if tw == 0 and lw == 0:
-            continue
-        pct = 0
-        if lw == 0 and tw > 0:
-            pct = 999  # new spike
-        elif lw > 0:
-            pct = int(round((delta / lw) * 100))
-
-        rows_out.append({
-            "company": c,
-            "this_week": tw,
-            "last_week": lw,
-            "delta": delta,
-            "pct": pct
-        })
-
-    # sort by biggest increase, then biggest this-week
-    rows_out.sort(key=lambda x: (x["delta"], x["this_week"]), reverse=True)
-    return rows_out[:top_n]
-
-
-
-@app.route("/")
+            etag = snapshot_etag(conn, SNAPSHOT)
+            if etag is None:
+                # no ingest has stored one yet: build it here, once
+                conn.close()
+                conn = init_db()
+                etag = refresh_snapshot(conn)
+            if etag != _page["etag"]:
+                etag, vm = load_snapshot(conn, SNAPSHOT)
+                _page["html"] = render_template("index.html", **vm)
+                _page["etag"] = etag
+        finally:
+            conn.close()
+        _page["checked"] = now
+        return _page["etag"], _page["html"]
+
+
 def index():
-    rows = get_db_rows(limit=800)
+    etag, html = current_page()
+    resp = make_response(html)
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    # 304 with no body when the browser already has this snapshot
+    return resp.make_conditional(request)
 
-    company_velocity = company_velocity_wow(rows, top_n=20)
 
-    company_counter = Counter()
-    for r in rows:
-        try:
-            comps = _json.loads(r.get("companies", "[]"))
-            company_counter.update(set(comps))
-        except:
-            pass
-    top_companies = company_counter.most_common(20)
-
-    # Group latest by category (show top N each)
-    grouped = defaultdict(list)
-    for r in rows:
-        grouped[r["category"]].append(r)
-
-    # keep only latest 12 per category
-    grouped_limited = {k: v[:12] for k, v in sorted(grouped.items(), key=lambda x: x[0])}
-
-    # Hot + trends + velocity
-    hot = hot_stories(rows, similarity_threshold=0.82, max_groups=10)
-    trends = top_terms_by_category(rows, top_n=10)
-    velocity = velocity_wow(rows)
-
-    # Chart data: articles per day (last 14 days) based on fetched_at
-    today = datetime.utcnow().date()
-    day_labels = []
-    day_counts = []
-    counts_map = { (today - timedelta(days=i)).isoformat(): 0 for i in range(13, -1, -1) }
-
-    for r in rows:
-        dt = parse_iso_loose(r.get("fetched_at", ""))
-        if not dt:
-            continue
-        d = dt.date().isoformat()
-        if d in counts_map:
-            counts_map[d] += 1
-
-    for d, c in counts_map.items():
-        day_labels.append(d)
-        day_counts.append(c)
-
-    # Chart data: category counts (top 10)
-    cat_counts = defaultdict(int)
-    for r in rows:
-        cat_counts[r["category"]] += 1
-    top_cats = sorted(cat_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-    cat_labels = [x[0] for x in top_cats]
-    cat_values = [x[1] for x in top_cats]
-
-    return render_template(
-        "index.html",
-        hot=hot,
-        grouped=grouped_limited,
-        trends=trends,
-        velocity=velocity,
-        top_companies=top_companies,
-        company_velocity=company_velocity,
-        day_labels=day_labels,
-        day_counts=day_counts,
-        cat_labels=cat_labels,
-        cat_values=cat_values
-    )
+app = create_app()
 
 
 if __name__ == "__main__":
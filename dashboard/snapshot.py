@@ -0,0 +1,187 @@
+import json as _json
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+from processing.trends import hot_stories, top_terms_by_category
+from processing.termmatrix import TermMatrix
+from processing.baselines import term_surges
+from processing.dates import utc_ts, row_ts
+from storage.db import (
+    init_db, connect, attach_terms, week_over_week, query_articles, count_by_day, top_companies,
+    save_snapshot
+)
+
+
+# Dashboard view model, computed once per ingest (main.py) and stored in the
+# snapshots table; the Flask route only renders what is stored.
+SNAPSHOT = "dashboard"
+ARTICLE_CARD = ("title", "url", "source", "summary")
+
+
+def get_db_rows(limit=500, conn=None):
+    own = conn is None
+    conn = conn or connect()
+    rows = query_articles(conn, limit=limit)
+    for r in rows:
+        r["published"] = r["published"] or ""
+        r["fetched_at"] = r["fetched_at"] or ""
+        r["category"] = r["category"] or "General"
+        r["companies"] = r["companies"] or "[]"
+        r["summary"] = r["summary"] or ""
+    # stored term counts, so trends/velocity don't re-tokenize every summary per request
+    attach_terms(conn, rows)
+    if own:
+        conn.close()
+    return rows
+
+
+def company_velocity_wow(rows, now=None, top_n=20):
+    """
+    Velocity by company: mentions this week vs last week.
+    Uses fetched_at (falls back to published).
+    """
+    now = utc_ts(now or datetime.now(timezone.utc))
+    start_this = now - 7 * 86400
+    start_last = now - 14 * 86400
+
+    this_counts = Counter()
+    last_counts = Counter()
+
+    for r in rows:
+        # prefer fetched_at, fallback to published (RSS-ish)
+        dt = row_ts(r)
+        if not dt:
+            continue
+
+        # companies stored as JSON string
+        try:
+            comps = _json.loads(r.get("companies", "[]"))
+        except:
+            comps = []
+
+        if not comps:
+            continue
+
+        bucket = None
+        if dt >= start_this:
+            bucket = "this"
+        elif start_last <= dt < start_this:
+            bucket = "last"
+        else:
+            continue
+
+        # count each company once per article (not multiple times)
+        unique_comps = set(comps)
+        if bucket == "this":
+            this_counts.update(unique_comps)
+        else:
+            last_counts.update(unique_comps)
+
+    return rank_company_velocity(this_counts, last_counts, top_n=top_n)
+
+
+def rank_company_velocity(this_counts, last_counts, top_n=20):
+    """Company velocity rows from this/last week mention counters (e.g. the daily_companies rollup)."""
+    all_companies = set(this_counts.keys()) | set(last_counts.keys())
+    rows_out = []
+    for c in all_companies:
+        tw = this_counts.get(c, 0)
+        lw = last_counts.get(c, 0)
+        delta = tw - lw
+        if tw == 0 and lw == 0:
+            continue
+        pct = 0
+        if lw == 0 and tw > 0:
+            pct = 999  # new spike
+        elif lw > 0:
+            pct = int(round((delta / lw) * 100))
+
+        rows_out.append({
+            "company": c,
+            "this_week": tw,
+            "last_week": lw,
+            "delta": delta,
+            "pct": pct
+        })
+
+    # sort by biggest increase, then biggest this-week
+    rows_out.sort(key=lambda x: (x["delta"], x["this_week"]), reverse=True)
+    return rows_out[:top_n]
+
+
+def build_view_model(conn):
+    """Everything index.html needs, as plain JSON-able data."""
+    rows = get_db_rows(limit=800, conn=conn)
+
+    # WoW numbers come from the daily rollups: exact over 14 days, however many rows that is
+    company_velocity = rank_company_velocity(*week_over_week(conn, "company"), top_n=20)
+    # terms: this week vs last from the matrix, surges against each term's stored baseline
+    velocity = TermMatrix.from_db(conn, days=14).velocity(7)
+    surges = term_surges(conn)
+
+    # most mentioned companies over the last 14 days (article_companies, all rows in the window)
+    top = top_companies(conn, since=datetime.now(timezone.utc) - timedelta(days=14), limit=20)
+
+    # Group latest by category (show top N each)
+    grouped = defaultdict(list)
+    for r in rows:
+        grouped[r["category"]].append(r)
+
+    # keep only latest 12 per category, and only what the page shows
+    grouped_limited = {
+        k: [{f: a[f] for f in ARTICLE_CARD} for a in v[:12]]
+        for k, v in sorted(grouped.items(), key=lambda x: x[0])
+    }
+
+    # Hot + trends + velocity
+    hot = hot_stories(rows, similarity_threshold=0.82, max_groups=10)
+    trends = top_terms_by_category(rows, top_n=10)
+
+    # Chart data: articles per day (last 14 days) based on fetched_at, counted in SQL over the whole window
+    today = datetime.utcnow().date()
+    day_labels = []
+    day_counts = []
+    per_day = count_by_day(conn, since=datetime.combine(today - timedelta(days=13), datetime.min.time()))
+    counts_map = { (today - timedelta(days=i)).isoformat(): 0 for i in range(13, -1, -1) }
+    counts_map.update((d, c) for d, c in per_day.items() if d in counts_map)
+
+    for d, c in counts_map.items():
+        day_labels.append(d)
+        day_counts.append(c)
+
+    # Chart data: category counts (top 10)
+    cat_counts = defaultdict(int)
+    for r in rows:
+        cat_counts[r["category"]] += 1
+    top_cats = sorted(cat_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+    cat_labels = [x[0] for x in top_cats]
+    cat_values = [x[1] for x in top_cats]
+
+    return {
+        "hot": hot,
+        "grouped": grouped_limited,
+        "trends": trends,
+        "velocity": velocity,
+        "surges": surges,
+        "top_companies": top,
+        "company_velocity": company_velocity,
+        "day_labels": day_labels,
+        "day_counts": day_counts,
+        "cat_labels": cat_labels,
+        "cat_values": cat_values
+    }
+
+
+def refresh_snapshot(conn=None):
+    """Recompute the dashboard view model and store it. Returns its ETag."""
+    own = conn is None
+    conn = conn or init_db()
+    etag = save_snapshot(conn, SNAPSHOT, build_view_model(conn))
+    if own:
+        conn.close()
+    return etag
+
+
+if __name__ == "__main__":
+    # for a cron/background job: python -m dashboard.snapshot
+    print(f"[DASH] snapshot {refresh_snapshot()}")
@@ -9,142 +9,374 @@ from datetime import datetime, timezone
 
 
 
-from collections import defaultdict
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import Future
 
-from scrapers.rss_collector import collect
-from processing.summarizer import summarize
-from processing.categorizer import pick_category
-from processing.trends import top_terms_by_category, hot_stories
-from processing.velocity import velocity_wow
-from processing.companies import extract_companies
+from scrapers.rss_collector import collect, stream_many
+from processing.summarizer import summarizer, summarize_batch
+from processing.analysis import analyze_article, TEXT_LIMIT
+from processing.trends import top_terms_by_category, hot_stories, term_counts
+from processing.termmatrix import TermMatrix
+from processing.baselines import update_term_baselines, term_surges
+from processing.dates import utc_ts
+from processing.dedup import NearDupIndex, simhash
+from processing.pipeline import Stage, run_stages
+from processing.metrics import start_run, current_run, finish_run, profiled, timer, count
 
-from storage.db import init_db, normalize_title
+from storage.db import (
+    init_db, connect, normalize_title, content_hash, cached_summary,
+    load_feed_states, save_feed_states, existing_urls,
+    upsert_articles, attach_terms, backfill_article_terms, ensure_rollups,
+    query_articles, recent_fingerprints, story_summary, set_story_ids, save_pipeline_run, NO_TEXT_SUMMARY,
+    fallback_summaries, replace_summaries, prune_article_inputs
+)
+from dashboard.snapshot import refresh_snapshot
 from output.email_builder import send_email
 from jinja2 import Template
+from config import (
+    RSS_MAX_WORKERS, SUMMARY_MAX_WORKERS, SUMMARY_BACKEND, SUMMARY_RETRY_MAX, PIPELINE_ANALYZE_WORKERS,
+    PIPELINE_PERSIST_BATCH, PIPELINE_REPORT_DIR, PIPELINE_PROFILE, PIPELINE_TRACEMALLOC, ARTICLE_INPUT_DAYS
+)
 
 
-def parse_iso_or_none(s: str):
-    if not s:
-        return None
+def run_pipeline():
+    """
+    One ingest run. Timings, counts and bytes per stage/source (plus cProfile /
+    tracemalloc when enabled) end up in pipeline_runs and PIPELINE_REPORT_DIR,
+    failed runs included.
+    """
+    start_run(profile=PIPELINE_PROFILE, trace_memory=PIPELINE_TRACEMALLOC)
+    fields = {}
     try:
-        return datetime.fromisoformat(s.replace("Z", "+00:00"))
-    except:
-        return None
+        with profiled():
+            _run_pipeline(fields)
+    except Exception as e:
+        fields["error"] = repr(e)
+        raise
+    finally:
+        _save_run_report(fields)
+
 
+def _save_run_report(fields):
+    # files are named after the run's start
+    run = current_run()
+    stamp = (run.started_at if run else datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+    base = os.path.join(PIPELINE_REPORT_DIR, stamp) if PIPELINE_REPORT_DIR else None
+    try:
+        if base:
+            os.makedirs(PIPELINE_REPORT_DIR, exist_ok=True)
+        report = finish_run(profile_path=base and base + ".prof", **fields)
+        if base:
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=1, ensure_ascii=False)
+        conn = connect()
+        try:
+            run_id = save_pipeline_run(conn, report)
+        finally:
+            conn.close()
+        print(f"[RUN] #{run_id}: {report['seconds']:.1f}s" + (f", report in {base}.json" if base else ""))
+    except Exception as e:
+        print("RUN REPORT FAILED:", e)
 
 
-def run_pipeline():
+def retry_fallback_summaries(conn, since, limit=SUMMARY_RETRY_MAX):
+    """
+    Stories that got the local extractive summary in an earlier run (LLM down, over
+    budget) and are already stored, so ingest won't download them again: their stored
+    body goes to the LLM once more. Only LLM results are kept. Returns how many stories
+    got one.
+    """
+    if SUMMARY_BACKEND == "local":
+        return 0
+    pending = fallback_summaries(conn, since, limit)
+    if not pending:
+        return 0
+    # the same (truncated) text ingest summarizes and hashes
+    texts = [zlib.decompress(body).decode("utf-8")[:TEXT_LIMIT] for _, body in pending]
+    results = summarize_batch(texts)
+    updates = [
+        (article_id, summary, content_hash(text))
+        for (article_id, _), text, (summary, from_llm) in zip(pending, texts, results) if from_llm
+    ]
+    with conn:
+        replace_summaries(conn, updates, term_counts)
+    print(f"[LLM] {len(updates)}/{len(pending)} earlier local summaries replaced")
+    return len(updates)
+
+
+def _run_pipeline(fields):
+    """
+    Ingest as a stream of stages that all run at the same time:
+      collect/extract  feeds + article bodies (RSS_MAX_WORKERS threads, per-host limits)
+      analyze          category, companies, hashes, SimHash (PIPELINE_ANALYZE_WORKERS)
+      dedup            near-duplicate + summary cache lookups (1, the index is order dependent)
+      summarize        LLM calls (SUMMARY_MAX_WORKERS, one shared rate limit)
+      persist          batched upserts (1, SQLite has one writer)
+    then report (snapshot + email) once everything is stored.
+    """
     MAX_DAYS = int(os.getenv("MAX_ARTICLE_AGE_DAYS", "14"))
-    cutoff = datetime.now(timezone.utc) - timedelta(days=MAX_DAYS)
+    cutoff = utc_ts(datetime.now(timezone.utc) - timedelta(days=MAX_DAYS))
     conn = init_db()
-    cur = conn.cursor()
+    # term counts for articles stored before article_terms existed (no-op afterwards)
+    backfill_article_terms(conn, term_counts)
+    ensure_rollups(conn)
 
     fetched_at = datetime.now(timezone.utc).isoformat()
 
     with open("sources/rss_sources.json", encoding="utf-8") as f:
         sources = json.load(f)
+    by_url = {src["url"]: src for src in sources}
 
-    inserted_rows = []
-
+    # ETag/Last-Modified per feed; articles already in the DB are not downloaded again
+    feed_states = load_feed_states(conn)
     for src in sources:
-        data = collect(src["url"])
-        print(f"[RSS] {src.get('name','?')}: {len(data)} items")
-        fallback_cats = src.get("categories", [])
-
-        for a in data:
-                    # Skip old articles
-            pub = a.get("published", "")
-            try:
-                pub_dt = datetime.fromisoformat(pub.replace("Z", "+00:00"))
-            except:
-                pub_dt = None
-
-            if pub_dt and pub_dt < cutoff:
-                continue
-
-            cat = pick_category(a.get("title", ""), a.get("text", ""), fallback_cats)
-            text = (a.get("text", "") or "")[:3000]
-            summary = summarize(text) if text.strip() else "• (No text extracted)"
-
-            title = a.get("title", "")
-            companies_list = extract_companies(title, text)
-            
-            row = {
-                "title": a.get("title", ""),
-                "url": a.get("url", ""),
-                "source": a.get("source", src.get("name", "")),
-                "published": a.get("published", ""),
-                "category": cat,
-                "companies": json.dumps(companies_list),
-                "summary": summary,
-                "fetched_at": fetched_at,
-                "title_key": normalize_title(a.get("title", ""))
-            }
-
-            try:
-                cur.execute(
-                    """
-                    INSERT INTO articles(title,url,source,published,fetched_at,category,companies,summary,title_key)
-                    VALUES(?,?,?,?,?,?,?,?,?)
-                    ON CONFLICT(url) DO UPDATE SET
-                        title=excluded.title,
-                        source=excluded.source,
-                        published=excluded.published,
-                        fetched_at=excluded.fetched_at,
-                        category=excluded.category,
-                        companies=excluded.companies,
-                        summary=excluded.summary,
-                        title_key=excluded.title_key
-                    """,
-                    (
-                        row["title"],
-                        row["url"],
-                        row["source"],
-                        row["published"],
-                        row["fetched_at"],
-                        row["category"],
-                        row["companies"],
-                        row["summary"],
-                        row["title_key"]
-                    )
-                )
-                conn.commit()
-
-                # Count as inserted only if it was new
-                if cur.rowcount == 1:
-                    inserted_rows.append(row)
-
-            except Exception as e:
-                print("DB WRITE FAILED:", e, "| URL:", row.get("url"))
+        feed_states.setdefault(src["url"], {})
+
+    # Same story from another feed (title_key or body SimHash), stored within the age window or
+    # earlier in this run: linked to it by story_id and given its summary instead of a new LLM call
+    dups = NearDupIndex()
+    for article_id, story_id, key, fingerprint in recent_fingerprints(conn, since=cutoff):
+        dups.add({"id": article_id, "story_id": story_id, "in_run": False}, fingerprint, key)
+
+    # each single-threaded stage gets its own connection (WAL: reads don't wait for the writer)
+    known_conn, read_conn, write_conn = connect(shared=True), connect(shared=True), connect(shared=True)
+    counts = Counter()
+
+    # --- collect/extract: (feed_url, article) as soon as each body is downloaded
+    def collected():
+        known = lambda urls: existing_urls(known_conn, urls)
+        if RSS_MAX_WORKERS > 1:
+            items = stream_many([src["url"] for src in sources], states=feed_states, known=known, since=cutoff)
+        else:
+            items = (
+                (src["url"], i, a)
+                for src in sources
+                for i, a in enumerate(collect(src["url"], state=feed_states[src["url"]], known=known, since=cutoff))
+            )
+        for feed_url, _, a in items:
+            counts[feed_url] += 1
+            count("collect.articles", nbytes=len(a.get("text") or ""), source=by_url[feed_url].get("name", feed_url))
+            yield feed_url, a
+        for src in sources:
+            print(f"[RSS] {src.get('name','?')}: {counts[src['url']]} items")
+
+    # --- analyze: pure CPU, no shared state
+    def analyze(item):
+        feed_url, a = item
+        src = by_url[feed_url]
+        # Skip old articles (the collectors already drop them before downloading)
+        pub_ts = a.get("published_ts") or utc_ts(a.get("published", ""))
+        if pub_ts and pub_ts < cutoff:
+            return []
+
+        # one pass: category + companies from the same normalized text
+        info = analyze_article(a.get("title", ""), a.get("text", ""), src.get("categories", []))
+        text = (a.get("text", "") or "")[:TEXT_LIMIT]
+        return [{
+            # analyze_article's input, for reprocess.py (article_inputs)
+            "feed_url": feed_url,
+            "body": zlib.compress((a.get("text", "") or "").encode("utf-8")),
+            "title": a.get("title", ""),
+            "url": a.get("url", ""),
+            "source": a.get("source", src.get("name", "")),
+            "published": a.get("published", ""),
+            "published_ts": pub_ts,
+            "category": info["category"],
+            "companies": json.dumps(info["companies"]),
+            "summary": None,
+            "fetched_at": fetched_at,
+            "title_key": normalize_title(a.get("title", "")),
+            "content_hash": content_hash(text),
+            "simhash": simhash(text),
+            "story_id": None,
+            "duplicate_of": None,
+            "in_run": True,  # a dedup original seen in this run, not one already stored
+            "text": text,
+            "summarized": threading.Event()
+        }]
+
+    # --- dedup: link to an earlier copy of the story, reuse any summary we already have
+    def dedup(row):
+        if not row["text"].strip():
+            row["summary"] = NO_TEXT_SUMMARY
+            return [row]
+        original = dups.find(row["simhash"], row["title_key"])
+        row["duplicate_of"] = original
+        # Same text already summarized (this URL or another) -> reuse, don't pay OpenAI again
+        row["summary"] = cached_summary(read_conn, row["content_hash"])
+        if original is not None and not original["in_run"]:
+            row["story_id"] = original["story_id"]
+            if row["summary"] is None:
+                summary, from_llm = story_summary(read_conn, original["id"])
+                row["summary"] = summary or None
+                if row["summary"] is not None and not from_llm:
+                    row["content_hash"] = None  # a local fallback is never cached under this text
+        else:
+            dups.add(row, row["simhash"], row["title_key"])
+        return [row]
+
+    # --- summarize: one LLM call per distinct text; a copy of a story first seen in this run
+    # waits for that row (always handed to a worker before the copy) and takes its summary
+    summarize_one = summarizer()
+    calls = {}  # content_hash -> Future((summary, from_llm))
+    calls_lock = threading.Lock()
+
+    def summarize(row):
+        try:
+            original = row["duplicate_of"]
+            if row["summary"] is None and original is not None and original["in_run"]:
+                original["summarized"].wait()
+                row["summary"] = original["summary"]
+                if original["content_hash"] is None:
+                    row["content_hash"] = None
+            if row["summary"] is None:
+                with calls_lock:
+                    call = calls.get(row["content_hash"])
+                    mine = call is None
+                    if mine:
+                        call = calls[row["content_hash"]] = Future()
+                if mine:
+                    try:
+                        call.set_result(summarize_one(row["text"]))
+                    except BaseException as e:
+                        call.set_exception(e)
+                        raise
+                row["summary"], from_llm = call.result()
+                if not from_llm:
+                    row["content_hash"] = None  # local fallback: retry_fallback_summaries gives the LLM another go
+        finally:
+            row["summarized"].set()
+        del row["text"]
+        return [row]
 
+    # --- persist: PIPELINE_PERSIST_BATCH rows per transaction; if one fails, go row by row
+    # so one bad row doesn't drop the rest
+    batch = []
+
+    def write():
+        rows = batch[:]
+        batch.clear()
+        items = [(row, term_counts(row)) for row in rows]
+        try:
+            with timer("persist.transaction", items=len(items)), write_conn:
+                results = upsert_articles(write_conn, items)
+        except Exception as e:
+            print("DB BATCH WRITE FAILED, retrying row by row:", e)
+            results = []
+            for item in items:
+                try:
+                    with write_conn:
+                        results += upsert_articles(write_conn, [item])
+                except Exception as e:
+                    print("DB WRITE FAILED:", e, "| URL:", item[0].get("url"))
+                    results.append((None, False))
+        for row, (article_id, is_new) in zip(rows, results):
+            row["id"], row["is_new"] = article_id, is_new
+            del row["body"]
+        return rows
+
+    def persist(row):
+        batch.append(row)
+        return write() if len(batch) >= PIPELINE_PERSIST_BATCH else []
+
+    started = time.monotonic()
+    try:
+        rows = list(run_stages(collected(), [
+            Stage("analyze", analyze, workers=PIPELINE_ANALYZE_WORKERS),
+            Stage("dedup", dedup),
+            Stage("summarize", summarize, workers=SUMMARY_MAX_WORKERS),
+            Stage("persist", persist, flush=write),
+        ]))
+    finally:
+        for c in (known_conn, read_conn, write_conn):
+            c.close()
+    print(f"[PIPE] {len(rows)} articles stored in {time.monotonic() - started:.1f}s")
+    print(f"[LLM] {len(calls)} texts sent for summaries ({len(rows) - len(calls)} cached, copies or empty)")
+    print(f"[DEDUP] {sum(r['duplicate_of'] is not None for r in rows)} articles are another source's copy of a story")
+
+    # Count as inserted only if it was new
+    inserted_rows = [row for row in rows if row["is_new"]]
+    fields.update(
+        articles=len(rows), inserted=len(inserted_rows), llm_calls=len(calls),
+        duplicates=sum(r["duplicate_of"] is not None for r in rows)
+    )
+
+    # duplicates of stories first seen in this run: link them now that the first one has an id
+    # (rows come back in the order they were stored, so follow each copy back to the first row)
+    def story_of(row):
+        while row["duplicate_of"] is not None and row["duplicate_of"]["in_run"]:
+            row = row["duplicate_of"]
+        return row["story_id"] or row.get("id")
+
+    links = []
+    for row in rows:
+        original = row["duplicate_of"]
+        if row["id"] is not None and original is not None and original["in_run"] and story_of(row) is not None:
+            links.append((story_of(row), row["id"]))
+            row["story_id"] = links[-1][0]
+    with timer("persist.links", items=len(links)), conn:
+        set_story_ids(conn, links)
+
+    with timer("persist.feed_states", items=len(feed_states)):
+        save_feed_states(conn, feed_states, checked_at=fetched_at)
+
+    with timer("summarize.fallbacks") as span:
+        span.items = retry_fallback_summaries(conn, since=cutoff)
+
+    # bodies kept for reprocess.py, but not forever
+    keep_days = max(ARTICLE_INPUT_DAYS, MAX_DAYS)
+    with timer("persist.prune_inputs") as span, conn:
+        span.items = prune_article_inputs(conn, utc_ts(datetime.now(timezone.utc) - timedelta(days=keep_days)))
+
+    # closed days into the per-term baselines the surges are scored against
+    with timer("persist.term_baselines") as span:
+        span.items = update_term_baselines(conn)
+
+    # dashboard page is served from this snapshot until the next run
+    try:
+        with timer("report.snapshot"):
+            print(f"[DASH] snapshot {refresh_snapshot(conn)}")
+    except Exception as e:
+        print("DASHBOARD SNAPSHOT FAILED:", e)
 
     # If nothing new, still email “hot/trends” based on recent DB entries
     # Simple approach: use last ~200 articles in DB
-    cur.execute("SELECT title,url,source,published,fetched_at,category,summary FROM articles ORDER BY id DESC LIMIT 200")
-    db_rows = [
-        {"title": r[0], "url": r[1], "source": r[2], "published": r[3], "fetched_at": r[4], "category": r[5], "summary": r[6]}
-        for r in cur.fetchall()
-    ]
+    with timer("report.query") as span:
+        db_rows = query_articles(conn, limit=200)
+        attach_terms(conn, db_rows)
+        span.items = len(db_rows)
     print(f"[DB] rows loaded for report: {len(db_rows)} (inserted this run: {len(inserted_rows)})")
-    velocity = velocity_wow(db_rows)
+    # this week vs last from one term x (category, day) matrix; surges against the stored baselines
+    with timer("report.velocity"):
+        velocity = TermMatrix.from_db(conn, days=14).velocity(7)
+        surges = term_surges(conn)
 
     grouped = defaultdict(list)
     for r in (inserted_rows or db_rows):
         grouped[r["category"]].append(r)
 
-    trends = top_terms_by_category(db_rows, top_n=10)
-    hot = hot_stories(db_rows, similarity_threshold=0.82, max_groups=8)
+    with timer("report.trends"):
+        trends = top_terms_by_category(db_rows, top_n=10)
+    with timer("report.hot_stories"):
+        hot = hot_stories(db_rows, similarity_threshold=0.82, max_groups=8)
 
     with open("output/templates.html", encoding="utf-8") as f:
         template = Template(f.read())
 
-    html = template.render(
-        grouped=dict(sorted(grouped.items(), key=lambda x: x[0])),
-        trends=trends,
-        hot_stories=hot,
-        velocity=velocity
-    )
-    send_email(html)
+    with timer("report.render") as span:
+        html = template.render(
+            grouped=dict(sorted(grouped.items(), key=lambda x: x[0])),
+            trends=trends,
+            hot_stories=hot,
+            velocity=velocity,
+            surges=surges
+        )
+        span.bytes = len(html)
+    with timer("report.email", nbytes=len(html)):
+        send_email(html)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+import json
+import re
+import zlib
+
+from processing.categorizer import category_hits, category_from_hits, WORD
+from processing.companies import extract_companies
+
+
+# Same token shape as trends.tokenize / velocity.tokenize, before stopword filtering
+TOKEN = re.compile(r"[a-z][a-z0-9\-]{2,}")
+# chars of text that count: the article body companies are matched against (and that
+# main.py summarizes and hashes), and the title + summary that terms are counted from
+TEXT_LIMIT = 3000
+
+
+def analyze_article(title: str, text: str, fallback_categories=None, text_limit: int = TEXT_LIMIT) -> dict:
+    """
+    One pass over an article at ingest time. The lowercased text and its word set
+    are built once and shared by the category matchers.
+    Category looks at title + the full text, companies at title + the first
+    `text_limit` chars of it (same inputs pick_category / extract_companies got before).
+    """
+    title = title or ""
+    text = text or ""
+    hay = f"{title}\n{text}".lower()
+    words = set(WORD.findall(hay))
+
+    hits = category_hits(hay, words)
+    short = text[:text_limit]
+    short_hay = f"{title}\n{short}".lower()
+    return {
+        "hay": hay,
+        "words": words,
+        "category_hits": dict(hits),
+        "category": category_from_hits(hits, fallback_categories),
+        "companies": extract_companies(title, short, hay=short_hay),
+    }
+
+
+def reanalyze(rows):
+    """
+    Category + companies for stored articles, the CPU-heavy half of reprocess.py:
+    rows = [(article_id, title, body, fallback_categories)] -> [(article_id, category,
+    companies JSON)], body = the zlib-compressed text stored at ingest (article_inputs).
+    Module-level so process pool workers can run it.
+    """
+    out = []
+    for article_id, title, body, fallback in rows:
+        info = analyze_article(title, zlib.decompress(body).decode("utf-8"), fallback)
+        out.append((article_id, info["category"], json.dumps(info["companies"])))
+    return out
+
+
+def row_tokens(r: dict):
+    """
+    Raw (word, end_offset) tokens of a report row's title + summary, before any
+    stopword filtering. Cached on the row under "tokens" so trends and velocity
+    share a single regex pass per row.
+    """
+    toks = r.get("tokens")
+    if toks is None:
+        text = ((r.get("title", "") or "") + " " + (r.get("summary", "") or ""))[:TEXT_LIMIT].lower()
+        toks = [(m.group(), m.end()) for m in TOKEN.finditer(text)]
+        r["tokens"] = toks
+    return toks
+
+
+def row_words(r: dict, limit: int = TEXT_LIMIT):
+    """
+    Words of title + summary as if the text had been cut at `limit` chars
+    (limit <= TEXT_LIMIT). A word straddling the cut is shortened the same way.
+    """
+    out = []
+    for w, end in row_tokens(r):
+        if end <= limit:
+            out.append(w)
+            continue
+        cut = len(w) - (end - limit)
+        if cut >= 3:
+            out.append(w[:cut])
+        break
+    return out
@@ -0,0 +1,129 @@
+import math
+from datetime import date, datetime, timedelta, timezone
+
+from config import TERM_BASELINE_DAYS, TERM_BASELINE_PRUNE_DAYS, TERM_BASELINE_MAX_TERMS
+from processing.velocity import STOPWORDS, BANNED_TERMS
+from storage.db import (
+    terms_on_day, first_term_day, load_term_baselines, save_term_baselines, prune_term_baselines,
+    load_checkpoint, save_checkpoint, week_over_week
+)
+
+
+# Rising terms against each term's own history instead of last week alone.
+# Every closed UTC day of the daily_terms rollup is folded into exponentially weighted
+# sums of the term's daily count, s1 = sum(w * x) and s2 = sum(w * x^2) with weights
+# ALPHA * DECAY^age (term_baselines). Only terms that occurred that day are touched:
+# days a term was absent only scale its sums by DECAY, applied lazily when it shows up
+# again or is read. Weights start with the first folded day, so they add up to
+# 1 - DECAY^n after n days, the same for every term (the zeros before a term first
+# appears are real observations): mean = s1 / that, without the start-at-zero bias.
+# A fold holds one day's vocabulary in memory, and the table keeps only terms seen
+# in the last TERM_BASELINE_PRUNE_DAYS. The window being scored (the last `days`
+# days) is never folded in yet, so a surge can't raise its own baseline.
+
+JOB = "term_baselines"  # checkpoints.last_id = last folded day, as date.toordinal()
+START = "term_baselines_start"  # ... and the first one
+ALPHA = 2 / (TERM_BASELINE_DAYS + 1)
+DECAY = 1 - ALPHA
+SURGE_DAYS = 7
+# fewer folded days than this (a young DB): no surges at all
+MIN_DAYS = 2 * SURGE_DAYS
+
+
+def fold(s1, s2, x, idle=0):
+    """Today's count x into the sums, after `idle` days without the term."""
+    scale = DECAY ** (idle + 1)
+    return scale * s1 + ALPHA * x, scale * s2 + ALPHA * x * x
+
+
+def mean_var(s1, s2, n):
+    """Daily mean and variance from the sums after n folded days."""
+    weight = 1 - DECAY ** n
+    if weight <= 0:
+        return 0.0, 0.0
+    mean = s1 / weight
+    return mean, max(s2 / weight - mean * mean, 0.0)
+
+
+def _ordinal(day):
+    return date.fromisoformat(day).toordinal()
+
+
+def _today(now=None):
+    return (now or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+
+
+def update_term_baselines(conn, now=None, days=SURGE_DAYS):
+    """
+    Fold every day up to the one before the last `days` days (the scored window) into
+    term_baselines, a transaction per day, then prune. Returns the number of days folded.
+    A first run starts TERM_BASELINE_PRUNE_DAYS back (or at the oldest rollup day).
+    """
+    until = (_today(now) - timedelta(days=days)).toordinal()
+    last = load_checkpoint(conn, JOB)
+    start = None
+    if not last:
+        first = first_term_day(conn)
+        if first is None:
+            return 0
+        start = max(_ordinal(first), until - TERM_BASELINE_PRUNE_DAYS)
+        last = start - 1
+
+    folded = 0
+    for ordinal in range(last + 1, until + 1):
+        day = date.fromordinal(ordinal).isoformat()
+        counts = terms_on_day(conn, day)
+        stored = load_term_baselines(conn, list(counts))
+        rows = []
+        for term, x in counts.items():
+            if term in stored:
+                s1, s2, at = stored[term]
+                s1, s2 = fold(s1, s2, x, ordinal - _ordinal(at) - 1)
+            else:
+                s1, s2 = fold(0.0, 0.0, x)
+            rows.append((term, s1, s2, day))
+        with conn:
+            save_term_baselines(conn, rows)
+            if start is not None:
+                save_checkpoint(conn, START, start)
+                start = None
+            save_checkpoint(conn, JOB, ordinal)
+        folded += 1
+
+    if folded:
+        with conn:
+            prune_term_baselines(conn, date.fromordinal(until - TERM_BASELINE_PRUNE_DAYS).isoformat(),
+                                 TERM_BASELINE_MAX_TERMS)
+    return folded
+
+
+def term_surges(conn, now=None, days=SURGE_DAYS, top_n=15, min_count=3, min_z=2.0):
+    """
+    Terms counted well above their baseline over the last `days` UTC days:
+    z = (count - days * mean) / sqrt(days * var), the variance floored at the
+    expected count and 1 (Poisson-ish) so a term needs several extra mentions.
+    [{"term", "this_week", "baseline", "z"}], highest z first; "baseline" is the
+    expected count over the window. Nothing until MIN_DAYS days are folded.
+    """
+    folded, start = load_checkpoint(conn, JOB), load_checkpoint(conn, START)
+    n = folded - start + 1 if folded and start else 0
+    if n < MIN_DAYS:
+        return []
+    this_week, _ = week_over_week(conn, "term", now=now, days=days)
+    candidates = {
+        t: c for t, c in this_week.items() if c >= min_count and t not in STOPWORDS and t not in BANNED_TERMS
+    }
+    stored = load_term_baselines(conn, list(candidates))
+    out = []
+    for term, x in candidates.items():
+        mean = var = 0.0
+        if term in stored:
+            s1, s2, at = stored[term]
+            scale = DECAY ** (folded - _ordinal(at))
+            mean, var = mean_var(scale * s1, scale * s2, n)
+        expected = days * mean
+        z = (x - expected) / math.sqrt(max(days * var, expected, 1.0))
+        if z >= min_z:
+            out.append({"term": term, "this_week": x, "baseline": round(expected, 2), "z": round(z, 2)})
+    out.sort(key=lambda s: (s["z"], s["this_week"]), reverse=True)
+    return out[:top_n]
@@ -15,20 +15,65 @@ CATEGORY_KEYWORDS = {
 }
 
 
-def pick_category(title: str, text: str, fallback_categories=None) -> str:
-    hay = f"{title}\n{text}".lower()
-    scores = defaultdict(int)
+WORD = re.compile(r"\w+")
+
 
-    for cat, kws in CATEGORY_KEYWORDS.items():
+def _build_index(category_keywords):
+    """
+    Keyword index for a single pass over the text.
+    A one-word keyword matches r"\bkw\b" exactly when it equals one of the text's
+    \w+ runs, so those become plain set/dict lookups. Keywords with spaces or
+    hyphens ("level 2", "solid-state") are keyed by their first word and only
+    checked when that word occurs in the text.
+    """
+    single = defaultdict(list)  # word -> [category, ...]
+    multi = defaultdict(list)   # first word -> [(category, keyword, pattern), ...]
+    for cat, kws in category_keywords.items():
         for kw in kws:
-            if re.search(r"\b" + re.escape(kw) + r"\b", hay):
-                scores[cat] += 1
+            words = WORD.findall(kw)
+            if not words:
+                continue
+            if words == [kw]:
+                single[kw].append(cat)
+            else:
+                multi[words[0]].append((cat, kw, re.compile(r"\b" + re.escape(kw) + r"\b")))
+    return dict(single), dict(multi)
+
+
+_SINGLE, _MULTI = _build_index(CATEGORY_KEYWORDS)
+
 
-    if scores:
-        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[0][0]
+def category_hits(hay: str, words=None) -> dict:
+    """
+    Number of distinct keywords per category found in `hay` (already lowercased).
+    `words` is the set of \w+ runs of `hay`, if the caller already has it.
+    """
+    if words is None:
+        words = set(WORD.findall(hay))
+    hits = defaultdict(int)
+    for w in words & _SINGLE.keys():
+        for cat in _SINGLE[w]:
+            hits[cat] += 1
+    for w in words & _MULTI.keys():
+        for cat, kw, pat in _MULTI[w]:
+            # plain substring test first, the boundary regex only confirms
+            if kw in hay and pat.search(hay):
+                hits[cat] += 1
+    return hits
+
+
+def category_from_hits(hits: dict, fallback_categories=None) -> str:
+    if hits:
+        # ties go to the category listed first in CATEGORY_KEYWORDS
+        return max((c for c in CATEGORY_KEYWORDS if c in hits), key=lambda c: hits[c])
 
     # fallback: use first category from source config if present
     if fallback_categories:
         return fallback_categories[0]
 
-    return "General"
\ No newline at end of file
+    return "General"
+
+
+def pick_category(title: str, text: str, fallback_categories=None) -> str:
+    hay = f"{title}\n{text}".lower()
+    return category_from_hits(category_hits(hay), fallback_categories)
@@ -0,0 +1,117 @@
+import random
+import zlib
+from difflib import SequenceMatcher
+from operator import eq
+
+
+# dropped before shingling only: they are in almost every title and make
+# unrelated titles share MinHash buckets (verification still uses the full key)
+SKIP_WORDS = set("a an and as at by for from in is it its of on or the to with".split())
+
+
+def shingles(key: str, k: int = 4):
+    s = " ".join(w for w in key.split() if w not in SKIP_WORDS) or key
+    s = f" {s} "
+    if len(s) <= k:
+        return {s}
+    return {s[i:i + k] for i in range(len(s) - k + 1)}
+
+
+class MinHashLSH:
+    """
+    MinHash over character shingles + LSH banding.
+    With `bands` bands of `rows` hashes, two keys become candidates with
+    probability 1 - (1 - J^rows)^bands for shingle Jaccard J. The defaults
+    (4-shingles, 32 bands of 2) are tuned loose on purpose: titles at
+    SequenceMatcher ratio >= 0.82 have 4-shingle Jaccard of about 0.4 and up,
+    where this catches >99.6% of pairs (>99.9% from 0.46). Candidates are
+    always verified exactly by the caller.
+    Each "permutation" is the shingle's CRC32 XORed with a random 32-bit salt,
+    which is a lot cheaper in Python than a*x+b mod p and good enough here.
+    CRC32 rather than hash(): str hashes are salted per process, and the email
+    and the dashboard have to group the same titles the same way.
+    """
+
+    def __init__(self, bands: int = 32, rows: int = 2, k: int = 4, seed: int = 1):
+        self.bands = bands
+        self.rows = rows
+        self.k = k
+        rnd = random.Random(seed)
+        self._salts = [rnd.getrandbits(32) for _ in range(bands * rows)]
+        self._buckets = [dict() for _ in range(bands)]
+
+    def signature(self, key: str):
+        hs = [zlib.crc32(s.encode("utf-8")) for s in shingles(key, self.k)]
+        return [min([h ^ salt for h in hs]) for salt in self._salts]
+
+    @staticmethod
+    def similarity(sig_a, sig_b):
+        """Estimated shingle Jaccard: share of equal MinHash values."""
+        return sum(map(eq, sig_a, sig_b)) / len(sig_a)
+
+    def _band_keys(self, sig):
+        r = self.rows
+        return [tuple(sig[i * r:(i + 1) * r]) for i in range(self.bands)]
+
+    def add(self, item_id, sig):
+        for buckets, bk in zip(self._buckets, self._band_keys(sig)):
+            buckets.setdefault(bk, []).append(item_id)
+
+    def candidates(self, sig):
+        out = set()
+        for buckets, bk in zip(self._buckets, self._band_keys(sig)):
+            hit = buckets.get(bk)
+            if hit:
+                out.update(hit)
+        return out
+
+
+# Bucket-mates whose estimated Jaccard is below this are dropped without running
+# SequenceMatcher. True >= 0.82 pairs sit at 0.4+, so this is >3 sigma away at 64 hashes.
+MIN_EST_JACCARD = 0.2
+
+
+def cluster_keys(keys, similarity_threshold=0.82, lsh=None):
+    """
+    Greedy clustering with the same rule hot_stories always used: each key
+    joins the first (oldest) group whose representative key has
+    SequenceMatcher(None, key, rep).ratio() >= threshold, else starts a new group.
+    Only groups sharing an LSH bucket with the key are checked, so the cost is
+    ~linear in len(keys) instead of len(keys) * groups.
+    Returns a list of groups, each a list of indexes into `keys`; group[0] is the rep.
+    """
+    lsh = lsh or MinHashLSH()
+    groups = []    # [[idx, ...], ...]
+    matchers = []  # per group: SequenceMatcher with b = rep key (b2j is built once)
+    sigs = []      # per group: MinHash signature of the rep key
+    exact = {}     # key -> group id, identical keys skip hashing entirely
+
+    for idx, key in enumerate(keys):
+        gid = exact.get(key)
+        if gid is not None:
+            groups[gid].append(idx)
+            continue
+
+        sig = lsh.signature(key)
+        placed = None
+        for gid in sorted(lsh.candidates(sig)):
+            if lsh.similarity(sig, sigs[gid]) < MIN_EST_JACCARD:
+                continue
+            sm = matchers[gid]
+            sm.set_seq1(key)
+            # cheap upper bounds first; ratio() only when they can still pass
+            if sm.real_quick_ratio() >= similarity_threshold and sm.quick_ratio() >= similarity_threshold \
+                    and sm.ratio() >= similarity_threshold:
+                placed = gid
+                break
+
+        if placed is None:
+            placed = len(groups)
+            groups.append([])
+            matchers.append(SequenceMatcher(None, "", key))
+            sigs.append(sig)
+            lsh.add(placed, sig)
+        groups[placed].append(idx)
+        exact.setdefault(key, placed)
+
+    return groups
@@ -1,44 +1,23 @@
+import json
 import re
-from typing import List, Dict, Tuple
-
-# Expand anytime. Keep canonical names on the left.
-COMPANY_ALIASES: Dict[str, List[str]] = {
-    "Tesla": ["tesla"],
-    "Volvo Cars": ["volvo", "volvo cars"],
-    "Polestar": ["polestar"],
-    "Volkswagen": ["volkswagen", "vw"],
-    "BMW": ["bmw"],
-    "Mercedes-Benz": ["mercedes", "mercedes-benz", "daimler"],
-    "Toyota": ["toyota"],
-    "Honda": ["honda"],
-    "Nissan": ["nissan"],
-    "Hyundai": ["hyundai"],
-    "Kia": ["kia"],
-    "Stellantis": ["stellantis", "fiat", "peugeot", "citroen", "jeep", "ram"],
-    "Ford": ["ford"],
-    "General Motors": ["gm", "general motors", "chevrolet", "cadillac", "buick"],
-    "BYD": ["byd"],
-    "Geely": ["geely"],
-    "SAIC": ["saic", "mg motor", "mg"],
-    "Renault": ["renault"],
-    "NVIDIA": ["nvidia"],
-    "Qualcomm": ["qualcomm"],
-    "Mobileye": ["mobileye"],
-    "Bosch": ["bosch"],
-    "Continental": ["continental", "conti"],
-    "ZF": ["zf"],
-    "Aptiv": ["aptiv"],
-    "Magna": ["magna", "magna international"],
-    "CATL": ["catl", "contemporary amperex"],
-    "Panasonic": ["panasonic"],
-    "LG Energy Solution": ["lg energy solution", "lg es", "lg chem"],
-    "Samsung SDI": ["samsung sdi"],
-    "Northvolt": ["northvolt"],
-    "Rivian": ["rivian"],
-    "Lucid": ["lucid", "lucid motors"],
-    "XPeng": ["xpeng"],
-    "NIO": ["nio"],
-}
+from typing import List, Dict
+
+from config import COMPANY_ALIASES_FILE
+
+
+# Letter/digit runs of the lowercased text. An alias has to start and end on a run
+# boundary: the same rule as the old (?<![a-z0-9])alias(?![a-z0-9]) regexes.
+RUN = re.compile(r"[a-z0-9]+")
+
+
+def load_aliases(path: str = COMPANY_ALIASES_FILE) -> Dict[str, List[str]]:
+    """{canonical name: [aliases]} from the JSON data file (expand anytime, canonical names as keys)."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+COMPANY_ALIASES: Dict[str, List[str]] = load_aliases()
+
 EXCLUDE_ENTITIES = {
     "BlackRock", "Mubadala", "Goldman Sachs", "Morgan Stanley", "JPMorgan", "JP Morgan",
     "Sequoia", "Andreessen Horowitz", "a16z", "SoftBank", "Tiger Global",
@@ -57,30 +36,71 @@ EXCLUDE_ENTITIES = {
     "IEA",
 }
 
-def _compile_patterns() -> List[Tuple[str, re.Pattern]]:
-    patterns = []
-    for canonical, aliases in COMPANY_ALIASES.items():
-        # Sort aliases longest first to reduce partial matches
-        aliases_sorted = sorted(aliases, key=len, reverse=True)
-        # Word-boundary-ish matching; allow spaces/hyphens inside aliases
-        escaped = []
-        for a in aliases_sorted:
-            a = a.lower().strip()
-            escaped.append(re.escape(a))
-        pat = r"(?<![a-z0-9])(" + "|".join(escaped) + r")(?![a-z0-9])"
-        patterns.append((canonical, re.compile(pat, re.IGNORECASE)))
-    return patterns
-
-_PATTERNS = _compile_patterns()
-
-def extract_companies(title: str, text: str, max_companies: int = 8) -> List[str]:
-    hay = f"{title}\n{text}"
-    found = []
-    for canonical, pat in _PATTERNS:
-        if pat.search(hay):
-            found.append(canonical)
-            if len(found) >= max_companies:
+def _alias_key(alias: str):
+    """
+    "mercedes-benz" -> ("mercedes", ("-", "benz")): first run, then (separator, run)
+    pairs, so an alias matches exactly where the text has the same runs joined by
+    the same separators. None if the alias doesn't start and end with a letter/digit.
+    """
+    a = alias.lower().strip()
+    runs = list(RUN.finditer(a))
+    if not runs or runs[0].start() != 0 or runs[-1].end() != len(a):
+        return None
+    return (runs[0].group(),) + tuple((a[p.end():r.start()], r.group()) for p, r in zip(runs, runs[1:]))
+
+
+def _build_trie(aliases: Dict[str, List[str]]):
+    """
+    All aliases in one trie keyed by run (see _alias_key); a node's None entry holds
+    the canonical names ending there. Also returns canonical -> position in `aliases`,
+    which is the order companies are reported in.
+    """
+    trie, rank = {}, {}
+    for canonical, names in aliases.items():
+        rank.setdefault(canonical, len(rank))
+        for alias in names:
+            key = _alias_key(alias)
+            if key is None:
+                print(f"[COMPANIES] skipping alias {alias!r} of {canonical}: must start and end with a letter or digit")
+                continue
+            node = trie
+            for part in key:
+                node = node.setdefault(part, {})
+            node.setdefault(None, []).append(canonical)
+    return trie, rank
+
+
+_TRIE, _RANK = _build_trie(COMPANY_ALIASES)
+
+
+def match_companies(hay: str) -> set:
+    """Canonical names of every alias in `hay` (any case), one scan over its runs."""
+    hay = hay.lower()
+    runs = [(m.group(), m.start(), m.end()) for m in RUN.finditer(hay)]
+    found = set()
+    trie = _TRIE
+    n = len(runs)
+    for i, (w, _, end) in enumerate(runs):
+        node = trie.get(w)
+        j = i + 1
+        while node:
+            if None in node:
+                found.update(node[None])
+            if j == n:
                 break
+            w2, start2, end2 = runs[j]
+            node = node.get((hay[end:start2], w2))
+            end = end2
+            j += 1
+    return found
+
+
+def extract_companies(title: str, text: str, max_companies: int = 8, hay: str = None) -> List[str]:
+    # hay: f"{title}\n{text}" (any case) when the caller already built it
+    if hay is None:
+        hay = f"{title}\n{text}"
+    # alias-file order, capped before the exclusions (as it always was)
+    found = sorted(match_companies(hay), key=_RANK.__getitem__)[:max_companies]
 
     # Fallback: if no known companies matched, try to infer from title
     if not found:
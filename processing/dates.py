@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+
+# last resort for strings that are neither ISO-8601 nor RFC-822
+_FORMATS = (
+    "%a, %d %b %Y %H:%M:%S %Z",
+    "%d %b %Y %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y/%m/%d",
+)
+
+
+def utc_ts(value):
+    """
+    The one date normalizer: datetime / ISO-8601 / RFC-822 string / epoch
+    -> UTC epoch seconds, None if it can't be parsed. Naive times count as UTC.
+    Strings are memoized (feeds repeat the same few dates all the time).
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        return _str_ts(value.strip())
+    return _dt_ts(value)
+
+
+def _dt_ts(dt):
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+@lru_cache(maxsize=8192)
+def _str_ts(s):
+    if not s:
+        return None
+    try:
+        return _dt_ts(datetime.fromisoformat(s.replace("Z", "+00:00")))
+    except ValueError:
+        pass
+    try:
+        # RSS pubDate, incl. named zones like GMT/EST/PDT
+        return _dt_ts(parsedate_to_datetime(s))
+    except (TypeError, ValueError, IndexError):
+        pass
+    for fmt in _FORMATS:
+        try:
+            return _dt_ts(datetime.strptime(s, fmt))
+        except ValueError:
+            pass
+    return None
+
+
+def row_ts(r: dict):
+    """When a report row happened: fetched_at, else published (stored epoch columns first)."""
+    return (
+        r.get("fetched_ts") or utc_ts(r.get("fetched_at")) or
+        r.get("published_ts") or utc_ts(r.get("published"))
+    )
@@ -0,0 +1,54 @@
+import math
+import re
+from collections import Counter
+
+from processing.trends import tokenize
+
+
+# split after . ! ? when the next sentence starts with a capital/digit/quote
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'“‘])")
+
+
+def split_sentences(text: str):
+    text = " ".join((text or "").split())
+    sentences = [s.strip() for s in _SENTENCE_END.split(text) if len(s.strip()) > 20]
+    # only short fragments (a title-only item, a one-liner): the text itself is the summary
+    return sentences or ([text] if text else [])
+
+
+def summarize_local(text: str, n_sentences: int = 3, max_chars: int = 280) -> str:
+    """
+    Zero-network extractive summary: score sentences by TF-IDF of their terms
+    (sentences as documents, article-wide term frequency as salience), keep the
+    best `n_sentences` in article order and format them like the LLM bullets.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return "• (No text extracted)"
+
+    tokens = [set(tokenize(s)) for s in sentences]
+    df = Counter()
+    for t in tokens:
+        df.update(t)
+    tf = Counter()
+    for s in sentences:
+        tf.update(tokenize(s))
+
+    n = len(sentences)
+    scores = []
+    for i, t in enumerate(tokens):
+        score = sum(tf[w] * (math.log((1 + n) / (1 + df[w])) + 1) for w in t)
+        score /= math.sqrt(len(t)) if t else 1
+        # news is front-loaded: small bonus for the lead sentences
+        if i < 2:
+            score *= 1.25
+        scores.append((score, i))
+
+    best = sorted(i for _, i in sorted(scores, reverse=True)[:n_sentences])
+    bullets = []
+    for i in best:
+        s = sentences[i]
+        if len(s) > max_chars:
+            s = s[:max_chars].rsplit(" ", 1)[0] + "…"
+        bullets.append("• " + s)
+    return "\n".join(bullets)
@@ -0,0 +1,187 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+# Per-run instrumentation: calls, wall time, items and bytes per stage, and per
+# source (feed host, ...) within a stage. Nothing is recorded unless a run was
+# started, so the hooks in the collector/summarizer/db cost ~nothing elsewhere
+# (dashboard, scripts).
+# Stage names are "<area>.<what>": collect.feed, extract.download, summarize.llm,
+# db.upsert, stage.<pipeline stage>, report.<step>, ...
+
+PROFILE_TOP = 30  # functions kept in the JSON report, the full stats go to a .prof file
+MEMORY_TOP = 10
+
+_run = None
+
+
+class Span:
+    """Yielded by timer(); set .items / .bytes inside the block when they're only known there."""
+    __slots__ = ("items", "bytes")
+
+    def __init__(self, items=1, nbytes=0):
+        self.items = items
+        self.bytes = nbytes
+
+
+def _empty():
+    return {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "items": 0, "bytes": 0}
+
+
+class Run:
+    def __init__(self, profile=False, trace_memory=False):
+        self.started_at = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages = {}   # stage -> totals
+        self.sources = {}  # stage -> {source: totals}
+        self.profile = profile
+        self._profiles = []
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def add(self, stage, seconds=0.0, items=1, nbytes=0, source=None, calls=1):
+        with self._lock:
+            totals = [self.stages.setdefault(stage, _empty())]
+            if source:
+                totals.append(self.sources.setdefault(stage, {}).setdefault(source, _empty()))
+            for t in totals:
+                t["calls"] += calls
+                t["seconds"] += seconds
+                t["max_seconds"] = max(t["max_seconds"], seconds)
+                t["items"] += items
+                t["bytes"] += nbytes
+
+    def seconds(self):
+        return time.perf_counter() - self._t0
+
+
+def start_run(profile=False, trace_memory=False):
+    """Start recording (replaces a run that was never finished)."""
+    global _run
+    _run = Run(profile=profile, trace_memory=trace_memory)
+    return _run
+
+
+def current_run():
+    return _run
+
+
+@contextmanager
+def timer(stage, source=None, items=1, nbytes=0):
+    """Time the block under `stage` (and `source`); also counts the block even if it raises."""
+    span = Span(items, nbytes)
+    run = _run
+    if run is None:
+        yield span
+        return
+    t = time.perf_counter()
+    try:
+        yield span
+    finally:
+        run.add(stage, time.perf_counter() - t, span.items, span.bytes, source)
+
+
+def count(stage, items=1, nbytes=0, source=None):
+    """Record items/bytes without timing anything (cache hits, retries, ...)."""
+    run = _run
+    if run is not None:
+        run.add(stage, 0.0, items, nbytes, source)
+
+
+@contextmanager
+def profiled():
+    """
+    cProfile the calling thread for the block when the run asked for it.
+    cProfile only sees the thread that enabled it, so every pipeline thread wraps
+    its own loop in this; finish_run() merges them. From Python 3.12 on there is one
+    profiler per interpreter and it sees every thread: the first one to start wins
+    and the nested ones are no-ops.
+    """
+    run = _run
+    if run is None or not run.profile:
+        yield
+        return
+    prof = cProfile.Profile()
+    try:
+        prof.enable()
+    except ValueError:  # "Another profiling tool is already active"
+        yield
+        return
+    try:
+        yield
+    finally:
+        prof.disable()
+        with run._lock:
+            run._profiles.append(prof)
+
+
+def _rounded(totals):
+    out = dict(totals)
+    out["seconds"] = round(out["seconds"], 4)
+    out["max_seconds"] = round(out["max_seconds"], 4)
+    return out
+
+
+def _profile_report(profiles, path=None):
+    stats = pstats.Stats(profiles[0], stream=io.StringIO())
+    for p in profiles[1:]:
+        stats.add(p)
+    if path:
+        stats.dump_stats(path)
+    rows = []
+    for (filename, line, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({func})",
+            "calls": ncalls,
+            "tottime": round(tottime, 4),
+            "cumtime": round(cumtime, 4),
+        })
+    rows.sort(key=lambda r: r["cumtime"], reverse=True)
+    return rows[:PROFILE_TOP]
+
+
+def _memory_report():
+    current, peak = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().statistics("lineno")[:MEMORY_TOP]
+    tracemalloc.stop()
+    return {
+        "current_kb": current // 1024,
+        "peak_kb": peak // 1024,
+        "top": [{"where": str(s.traceback), "kb": s.size // 1024, "count": s.count} for s in top],
+    }
+
+
+def finish_run(profile_path=None, **fields):
+    """
+    Stop recording and return the run report (a JSON-able dict): `fields`
+    (articles, inserted, ...), total seconds, then per stage and per source totals.
+    With profiling on the merged cProfile stats are also written to `profile_path`.
+    """
+    global _run
+    run, _run = _run, None
+    if run is None:
+        return None
+
+    report = {
+        "started_at": run.started_at.isoformat(),
+        "seconds": round(run.seconds(), 3),
+        **fields,
+        "stages": {k: _rounded(v) for k, v in sorted(run.stages.items())},
+        "sources": {
+            stage: {src: _rounded(v) for src, v in sorted(by_src.items())}
+            for stage, by_src in sorted(run.sources.items())
+        },
+    }
+    if run._profiles:
+        report["profile"] = _profile_report(run._profiles, profile_path)
+    if run.trace_memory and tracemalloc.is_tracing():
+        report["memory"] = _memory_report()
+    return report
@@ -0,0 +1,119 @@
+import queue
+import threading
+import time
+
+from config import PIPELINE_QUEUE_SIZE
+from processing.metrics import count, current_run, profiled, timer
+
+
+_END = object()
+
+
+class Stage:
+    """
+    One step of a streaming pipeline. `fn(item)` returns the items to hand to the
+    next stage (an iterable, empty/None drops the item) and is run by `workers`
+    threads at once. `flush()`, if given, is called once after the last item went
+    through (from one of the stage's threads) and may return more items, for
+    stages that batch.
+    """
+
+    def __init__(self, name, fn, workers=1, flush=None):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.flush = flush
+
+
+def _record(name, busy, blocked):
+    run = current_run()
+    if run is not None:
+        run.add(f"stage.{name}", busy)
+        run.add(f"stage.{name}.blocked", blocked)
+
+
+def run_stages(source, stages, queue_size=PIPELINE_QUEUE_SIZE):
+    """
+    Stream `source` (any iterable, consumed in a thread of its own) through
+    `stages` and yield what the last one emits, as soon as it does.
+    Stages are connected by queues of at most `queue_size` items: a slow stage
+    blocks the ones before it instead of letting work pile up in memory, and all
+    stages run at the same time. An exception in a stage drops that item only.
+    Per stage, the run metrics get stage.<name> (time in fn, items in) and
+    stage.<name>.blocked (time waiting for room in the next queue: the stage
+    after it is the bottleneck).
+    """
+    queues = [queue.Queue(queue_size) for _ in range(len(stages) + 1)]
+    finished = [0] * len(stages)
+    lock = threading.Lock()
+
+    def readers(i):
+        # how many threads read queues[i]: the stage's workers, or the caller for the output queue
+        return stages[i].workers if i < len(stages) else 1
+
+    def feed():
+        try:
+            with profiled():
+                for item in source:
+                    queues[0].put(item)
+        except Exception as e:
+            print(f"[PIPE] source failed: {e}")
+        finally:
+            for _ in range(readers(0)):
+                queues[0].put(_END)
+
+    def work(i):
+        with profiled():
+            _work(i)
+
+    def _work(i):
+        stage, inq, outq = stages[i], queues[i], queues[i + 1]
+        while True:
+            item = inq.get()
+            if item is _END:
+                break
+            t = time.perf_counter()
+            try:
+                outs = list(stage.fn(item) or ())
+            except Exception as e:
+                print(f"[PIPE] {stage.name} failed: {e}")
+                count(f"stage.{stage.name}.failed")
+                continue
+            busy = time.perf_counter() - t
+            t = time.perf_counter()
+            for out in outs:
+                outq.put(out)
+            _record(stage.name, busy, time.perf_counter() - t)
+
+        with lock:
+            finished[i] += 1
+            last = finished[i] == stage.workers
+        if not last:
+            return
+        try:
+            with timer(f"stage.{stage.name}", items=0):
+                outs = list((stage.flush() if stage.flush else None) or ())
+            for out in outs:
+                outq.put(out)
+        except Exception as e:
+            print(f"[PIPE] {stage.name} flush failed: {e}")
+        finally:
+            for _ in range(readers(i + 1)):
+                outq.put(_END)
+
+    threads = [threading.Thread(target=feed, name="pipe-source", daemon=True)]
+    for i, stage in enumerate(stages):
+        threads += [
+            threading.Thread(target=work, args=(i,), name=f"pipe-{stage.name}-{n}", daemon=True)
+            for n in range(stage.workers)
+        ]
+    for t in threads:
+        t.start()
+
+    while True:
+        item = queues[-1].get()
+        if item is _END:
+            break
+        yield item
+    for t in threads:
+        t.join()
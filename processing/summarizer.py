@@ -1,15 +1,251 @@
-from openai import OpenAI
-from config import OPENAI_API_KEY
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from types import SimpleNamespace
 
+from config import (
+    OPENAI_API_KEY, SUMMARY_MODEL, SUMMARY_BACKEND, SUMMARY_TIMEOUT, SUMMARY_BUDGET,
+    SUMMARY_MAX_WORKERS, SUMMARY_MAX_RETRIES, OPENAI_RPM, OPENAI_TPM
+)
+from processing.extractive import summarize_local
+from processing.metrics import timer, count
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Backends (SUMMARY_BACKEND):
+#   openai - gpt via the Responses API, local extractive fallback on timeout/failure
+#   stub   - offline fake client with the same API (tests, dry runs)
+#   local  - extractive only, no network at all
 
+PROMPT = "Summarize this automotive article in 3 bullet points:\n{text}"
+# rough per-call output allowance for the tokens-per-minute budget
+OUTPUT_TOKENS = 200
 
+_client = None
+_client_lock = threading.Lock()
 
 
-def summarize(text):
-    resp = client.responses.create(
-    model="gpt-4.1-mini",
-    input=f"Summarize this automotive article in 3 bullet points:\n{text}"
-    )
-    return resp.output[0].content[0].text
\ No newline at end of file
+def get_client():
+    """LLM client, created on first use so importing this module needs neither openai nor a key."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            if SUMMARY_BACKEND == "stub":
+                _client = StubClient()
+            else:
+                from openai import OpenAI
+                if not OPENAI_API_KEY:
+                    raise RuntimeError("Missing OPENAI_API_KEY in environment")
+                # retries are ours (summarize_with_retry), timeouts go to the local fallback
+                _client = OpenAI(api_key=OPENAI_API_KEY, timeout=SUMMARY_TIMEOUT, max_retries=0)
+        return _client
+
+
+def summarize(text, llm=None):
+    if llm is None and SUMMARY_BACKEND == "local":
+        return summarize_local(text)
+    with timer("summarize.llm", nbytes=len(text or "")):
+        resp = (llm or get_client()).responses.create(
+        model=SUMMARY_MODEL,
+        input=PROMPT.format(text=text)
+        )
+    return resp.output[0].content[0].text
+
+
+def estimate_tokens(text):
+    # ~4 chars per token for English; good enough for budgeting
+    return len(PROMPT) // 4 + len(text or "") // 4 + OUTPUT_TOKENS
+
+
+class RateLimiter:
+    """
+    Requests-per-minute + tokens-per-minute budget (two token buckets).
+    acquire() blocks until both buckets can cover the call. Thread-safe.
+    """
+
+    def __init__(self, rpm=OPENAI_RPM, tpm=OPENAI_TPM, clock=time.monotonic, sleep=time.sleep):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.clock = clock
+        self.sleep = sleep
+        self._req = float(rpm)
+        self._tok = float(tpm)
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = now - self._last
+        self._last = now
+        self._req = min(self.rpm, self._req + elapsed * self.rpm / 60.0)
+        self._tok = min(self.tpm, self._tok + elapsed * self.tpm / 60.0)
+
+    def acquire(self, tokens=0):
+        # a single call bigger than the whole minute budget would wait forever
+        tokens = min(tokens, self.tpm)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._req >= 1 and self._tok >= tokens:
+                    self._req -= 1
+                    self._tok -= tokens
+                    return
+                wait = max(
+                    (1 - self._req) * 60.0 / self.rpm if self._req < 1 else 0,
+                    (tokens - self._tok) * 60.0 / self.tpm if self._tok < tokens else 0,
+                )
+            self.sleep(max(wait, 0.01))
+
+
+def _status(e):
+    status = getattr(e, "status_code", None)
+    if status is None:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+    return status
+
+
+def is_timeout(e):
+    return isinstance(e, TimeoutError) or type(e).__name__ == "APITimeoutError"
+
+
+def is_retryable(e):
+    # a slow API is not retried: the caller falls back to the local summarizer instead
+    if is_timeout(e):
+        return False
+    status = _status(e)
+    if status is not None:
+        return status == 429 or status >= 500
+    # no HTTP status: connection reset / refused
+    return isinstance(e, ConnectionError) or type(e).__name__ == "APIConnectionError"
+
+
+def _retry_after(e):
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def summarize_with_retry(text, llm=None, limiter=None, max_retries=SUMMARY_MAX_RETRIES,
+                         deadline=None, sleep=time.sleep):
+    """
+    summarize() with exponential backoff (plus jitter) on 429/5xx/connection errors.
+    Honors Retry-After when the API sends one. Other errors, timeouts and running
+    past `deadline` (time.monotonic() value) are raised right away.
+    """
+    for attempt in range(max_retries + 1):
+        if limiter:
+            with timer("summarize.rate_wait"):
+                limiter.acquire(estimate_tokens(text))
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("summary time budget exhausted")
+        try:
+            return summarize(text, llm=llm)
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = _retry_after(e) or min(30.0, 2 ** attempt) * (0.5 + random.random())
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            print(f"[LLM] retry {attempt + 1}/{max_retries} in {delay:.1f}s ({_status(e) or type(e).__name__})")
+            count("summarize.retry")
+            sleep(delay)
+
+
+def summarizer(llm=None, limiter=None, max_retries=SUMMARY_MAX_RETRIES, budget=SUMMARY_BUDGET):
+    """
+    Summaries for callers that get their texts one at a time: returns a thread-safe
+    one(text) -> (summary, from_llm). All calls share one rate limit; failed calls,
+    and every call once `budget` seconds have passed since this was created, get the
+    local extractive summary (from_llm=False).
+    """
+    if llm is None and SUMMARY_BACKEND == "local":
+        return lambda text: (summarize_local(text), False)
+    try:
+        llm = llm or get_client()
+    except Exception as e:
+        print("[LLM] client unavailable, using local summaries:", e)
+        return lambda text: (summarize_local(text), False)
+
+    limiter = limiter or RateLimiter()
+    deadline = time.monotonic() + budget
+    warned = threading.Event()
+
+    def one(text):
+        if time.monotonic() >= deadline:
+            if not warned.is_set():
+                warned.set()
+                print(f"[LLM] time budget of {budget}s exceeded, the remaining articles get local summaries")
+            count("summarize.local")
+            return summarize_local(text), False
+        try:
+            return summarize_with_retry(text, llm=llm, limiter=limiter, max_retries=max_retries,
+                                        deadline=deadline), True
+        except Exception as e:
+            print("[LLM] summary failed, using local summary:", e)
+            count("summarize.local")
+            return summarize_local(text), False
+
+    return one
+
+
+def summarize_batch(texts, llm=None, max_workers=SUMMARY_MAX_WORKERS, limiter=None,
+                    max_retries=SUMMARY_MAX_RETRIES, budget=SUMMARY_BUDGET):
+    """
+    summarizer() over many texts at once, `max_workers` calls at a time.
+    Returns [(summary, from_llm)] in input order. Texts still pending after
+    `budget` seconds get the local summary too, so the batch always finishes in
+    bounded time.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    one = summarizer(llm=llm, limiter=limiter, max_retries=max_retries, budget=budget)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(texts))), thread_name_prefix="llm")
+    futures = [pool.submit(one, t) for t in texts]
+    wait(futures, timeout=budget)
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    out = []
+    late = 0
+    for text, fut in zip(texts, futures):
+        if fut.done() and not fut.cancelled():
+            out.append(fut.result())
+            continue
+        late += 1
+        count("summarize.local")
+        out.append((summarize_local(text), False))
+    if late:
+        print(f"[LLM] time budget of {budget}s exceeded, {late} articles got local summaries")
+    return out
+
+
+class StubClient:
+    """
+    Offline stand-in for OpenAI(): same client.responses.create(...) shape.
+    Returns the first sentences of the article as bullets. `fail` is an optional
+    callable(n) -> Exception|None to simulate 429/5xx on the n-th call.
+    """
+
+    def __init__(self, latency=0.0, fail=None):
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.responses = SimpleNamespace(create=self._create)
+
+    def _create(self, model=None, input=""):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        if self.latency:
+            time.sleep(self.latency)
+        err = self.fail(n) if self.fail else None
+        if err:
+            raise err
+        text = input.split("\n", 1)[-1]
+        sentences = [s.strip() for s in text.replace("\n", " ").split(". ") if s.strip()][:3]
+        out = "\n".join("• " + s.rstrip(".") for s in sentences) or "• (empty)"
+        return SimpleNamespace(output=[SimpleNamespace(content=[SimpleNamespace(text=out)])])
+
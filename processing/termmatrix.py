@@ -0,0 +1,240 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from itertools import count
+
+import numpy as np
+from scipy import sparse
+
+from processing.dates import row_ts
+from processing.trends import term_counts
+from processing.velocity import STOPWORDS, BANNED_TERMS
+
+
+# Term counts of a report as one sparse matrix: row = term, column = (category, UTC day),
+# column index = category * n_days + day. Every window / per-category question is a
+# product with a 0/1 aggregation matrix over the columns, so a report scans the rows
+# (or the DB) once however many windows it looks at.
+
+SURGE_BASELINE_WINDOWS = 12
+SURGE_MIN_COUNT = 3
+SURGE_MIN_Z = 2.0
+# fewer full baseline windows of data than this (a young DB): no surges at all
+SURGE_MIN_WINDOWS = 2
+
+
+class TermMatrix:
+    def __init__(self, terms, categories, days, counts, articles):
+        """
+        terms: [term] (row order), categories: [category], days: consecutive ISO days, oldest first.
+        counts: sparse (len(terms), len(categories) * len(days)) term counts;
+        articles: (len(categories), len(days)) array of article counts.
+        """
+        self.terms = np.array(terms, dtype=object)
+        self.categories = list(categories)
+        self.days = list(days)
+        self.counts = sparse.csr_matrix(counts, dtype=np.int64)
+        self.articles = np.asarray(articles, dtype=np.int64)
+        # velocity/surges never rank these (trends do, as they always have)
+        self._ranked = np.array([t not in STOPWORDS and t not in BANNED_TERMS for t in terms], dtype=bool)
+        # first day index with any article: days before it are "no data", not zero counts
+        active = np.flatnonzero(self.articles.sum(axis=0)) if self.articles.size else []
+        self.first_data = int(active[0]) if len(active) else len(self.days)
+
+    # --- building
+
+    @classmethod
+    def from_triples(cls, triples, article_counts, first_day, last_day):
+        """
+        triples: (term, category, day, n), article_counts: (category, day, n); days as
+        'YYYY-MM-DD', anything outside [first_day, last_day] is dropped.
+        Terms keep first-seen order, which is how ties are broken.
+        """
+        days = _day_range(first_day, last_day)
+        day_ix = {d: i for i, d in enumerate(days)}
+        triples = [t for t in triples if t[2] in day_ix]
+        b = _Builder(days)
+        if triples:
+            terms, cats, ds, ns = zip(*triples)
+            b.term_ids += map(b.term_ix.__getitem__, terms)
+            b.cols += (c * len(days) + day_ix[d] for c, d in zip(map(b.cat_ix.__getitem__, cats), ds))
+            b.vals += ns
+        for cat, day, n in article_counts:
+            if day in day_ix:
+                b.articles.append((b.cat_ix[cat], day_ix[day], n))
+        return b.build(cls)
+
+    @classmethod
+    def from_rows(cls, rows, days=None, now=None):
+        """
+        From report rows (stored "terms" if loaded, else title + summary) dated by
+        fetched_at/published (processing.dates.row_ts). days=None spans the rows'
+        own dates; undated rows are put on the last day.
+        """
+        today = _today(now)
+        dated = []
+        for r in rows:
+            ts = row_ts(r)
+            day = datetime.fromtimestamp(ts, timezone.utc).date() if ts else today
+            dated.append((r, min(day, today)))
+        first = today - timedelta(days=days - 1) if days else min((d for _, d in dated), default=today)
+
+        b = _Builder(_day_range(first.isoformat(), today.isoformat()))
+        for r, day in dated:
+            if day < first:
+                continue
+            d = (day - first).days
+            c = b.cat_ix[r.get("category", "General") or "General"]
+            counts = r["terms"] if "terms" in r else term_counts(r)
+            b.term_ids += map(b.term_ix.__getitem__, counts)
+            b.cols += [c * len(b.days) + d] * len(counts)
+            b.vals += counts.values()
+            b.articles.append((c, d, 1))
+        return b.build(cls)
+
+    @classmethod
+    def from_db(cls, conn, days=(SURGE_BASELINE_WINDOWS + 1) * 7, now=None):
+        """The last `days` UTC days (including today) of article_terms, one query."""
+        from storage.db import term_counts_by_day, category_counts_by_day
+
+        today = _today(now)
+        first = (today - timedelta(days=days - 1)).isoformat()
+        return cls.from_triples(
+            term_counts_by_day(conn, first), category_counts_by_day(conn, first), first, today.isoformat()
+        )
+
+    # --- windows
+
+    def _window_cols(self, days, offset=0):
+        """Day indexes of the `days` days ending `offset` days before the last one."""
+        end = len(self.days) - offset
+        return np.arange(max(0, end - days), max(0, end))
+
+    def _aggregate(self, windows, by_category=False):
+        """
+        (columns, n_out) 0/1 matrix: output j sums the day indexes windows[j]
+        (per category -> output category * len(windows) + j when by_category).
+        """
+        n_days, n_cats, k = len(self.days), len(self.categories), len(windows)
+        rows, cols = [], []
+        for j, day_ix in enumerate(windows):
+            for c in range(n_cats):
+                rows.append(c * n_days + day_ix)
+                cols.append(np.full(len(day_ix), c * k + j if by_category else j))
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+        shape = (n_cats * n_days, n_cats * k if by_category else k)
+        return sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=shape)
+
+    def window_totals(self, windows, by_category=False):
+        """Dense (terms, outputs) counts for a list of day-index windows (see _aggregate)."""
+        return (self.counts @ self._aggregate(windows, by_category)).toarray()
+
+    # --- reports
+
+    def top_terms_by_category(self, top_n=10, days=None):
+        """{category: [(term, count)]} over the last `days` days (all of them by default)."""
+        window = self._window_cols(days or len(self.days))
+        totals = self.window_totals([window], by_category=True)
+        out = {}
+        for c, cat in enumerate(self.categories):
+            col = totals[:, c]
+            nz = np.flatnonzero(col)
+            if not len(nz):
+                continue
+            # highest count first, ties in first-seen order
+            top = nz[np.lexsort((nz, -col[nz]))[:top_n]]
+            out[cat] = [(self.terms[i], int(col[i])) for i in top]
+        return out
+
+    def velocity(self, days=7, top_terms=15, top_categories=12, min_count=3):
+        """
+        Same output as processing.velocity.velocity_from_counts: the last `days` days
+        against the `days` before them, by category and rising terms.
+        """
+        this_w, last_w = self._window_cols(days), self._window_cols(days, offset=days)
+        cat_this = self.articles[:, this_w].sum(axis=1)
+        cat_last = self.articles[:, last_w].sum(axis=1)
+        cat_velocity = []
+        for c in np.lexsort((-cat_this, -(cat_this - cat_last))):
+            tw, lw = int(cat_this[c]), int(cat_last[c])
+            if not tw and not lw:
+                continue
+            cat_velocity.append({
+                "category": self.categories[c], "this_week": tw, "last_week": lw, "delta": tw - lw,
+                "pct": 999 if lw == 0 and tw > 0 else int(round((tw - lw) / lw * 100)) if lw else 0,
+            })
+
+        totals = self.window_totals([this_w, last_w])
+        tw, lw = totals[:, 0], totals[:, 1]
+        delta = tw - lw
+        idx = np.flatnonzero(self._ranked & (tw >= min_count) & (delta > 0))
+        idx = idx[np.lexsort((-tw[idx], -delta[idx]))[:top_terms]]
+        rising = [
+            {"term": self.terms[i], "this_week": int(tw[i]), "last_week": int(lw[i]), "delta": int(delta[i])}
+            for i in idx
+        ]
+        return {"cat_velocity": cat_velocity[:top_categories], "rising_terms": rising}
+
+    def baseline_windows(self, days=7, baseline=SURGE_BASELINE_WINDOWS):
+        """
+        Day indexes of up to `baseline` windows of `days` days before the last `days`,
+        newest first; only whole windows from the first day with data on.
+        """
+        windows = [self._window_cols(days, offset=days * k) for k in range(1, baseline + 1)]
+        return [w for w in windows if len(w) == days and w[0] >= self.first_data]
+
+    def surges(self, days=7, baseline=SURGE_BASELINE_WINDOWS, top_n=15, min_count=SURGE_MIN_COUNT,
+               min_z=SURGE_MIN_Z):
+        """
+        Terms well above their own history: count over the last `days` days as a
+        z-score against the baseline_windows() before it (mean and std of those
+        windows, std floored at sqrt(mean) and 1 so rare terms need more than one
+        extra mention). Nothing until SURGE_MIN_WINDOWS windows have data.
+        [{"term", "this_week", "baseline", "z"}], highest z first.
+        """
+        past_windows = self.baseline_windows(days, baseline)
+        if len(past_windows) < SURGE_MIN_WINDOWS:
+            return []
+        totals = self.window_totals([self._window_cols(days)] + past_windows).astype(float)
+        now, past = totals[:, 0], totals[:, 1:]
+        mean, std = past.mean(axis=1), past.std(axis=1)
+        z = (now - mean) / np.sqrt(np.maximum(np.maximum(std ** 2, mean), 1.0))
+        idx = np.flatnonzero(self._ranked & (now >= min_count) & (z >= min_z))
+        idx = idx[np.lexsort((-now[idx], -z[idx]))[:top_n]]
+        return [
+            {"term": self.terms[i], "this_week": int(now[i]), "baseline": round(float(mean[i]), 2),
+             "z": round(float(z[i]), 2)}
+            for i in idx
+        ]
+
+
+class _Builder:
+    # COO parts of a TermMatrix; term and category ids handed out in first-seen order
+    def __init__(self, days):
+        self.days = days
+        self.term_ix = defaultdict(count().__next__)
+        self.cat_ix = defaultdict(count().__next__)
+        self.term_ids, self.cols, self.vals = [], [], []
+        self.articles = []  # (category id, day index, n)
+
+    def build(self, cls):
+        shape = (len(self.term_ix), len(self.cat_ix) * len(self.days))
+        # duplicate (term, column) pairs are summed by the COO -> CSR conversion
+        counts = sparse.coo_matrix((self.vals, (self.term_ids, self.cols)), shape=shape)
+        articles = np.zeros((len(self.cat_ix), len(self.days)), dtype=np.int64)
+        for c, d, n in self.articles:
+            articles[c, d] += n
+        return cls(list(self.term_ix), list(self.cat_ix), self.days, counts, articles)
+
+
+def _today(now=None):
+    if now is None:
+        return datetime.now(timezone.utc).date()
+    if isinstance(now, datetime):
+        return (now if now.tzinfo is None else now.astimezone(timezone.utc)).date()
+    return now
+
+
+def _day_range(first, last):
+    first, last = date.fromisoformat(first), date.fromisoformat(last)
+    return [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
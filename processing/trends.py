@@ -1,6 +1,8 @@
 import re
 from collections import Counter, defaultdict
-from difflib import SequenceMatcher
+
+from processing.analysis import TEXT_LIMIT, row_words
+from processing.clustering import cluster_keys
 
 
 STOPWORDS = set("""
@@ -14,13 +16,17 @@ def tokenize(text: str):
     return [w for w in words if w not in STOPWORDS and not w.isdigit()]
 
 
+def term_counts(r):
+    """{term: count} for a row's title + summary (first TEXT_LIMIT chars). This is what article_terms stores."""
+    return Counter(w for w in row_words(r, TEXT_LIMIT) if w not in STOPWORDS and not w.isdigit())
+
+
 def top_terms_by_category(rows, top_n=10):
-    # rows: list of dicts with category, title, summary
+    # rows: list of dicts with category, title, summary (+ stored "terms" if loaded)
     counters = defaultdict(Counter)
     for r in rows:
         cat = r.get("category", "General")
-        tokens = tokenize((r.get("title", "") + " " + r.get("summary", ""))[:3000])
-        counters[cat].update(tokens)
+        counters[cat].update(r["terms"] if "terms" in r else term_counts(r))
 
     return {cat: cnt.most_common(top_n) for cat, cnt in counters.items()}
 
@@ -46,20 +52,27 @@ def hot_stories(rows, similarity_threshold=0.82, max_groups=8):
             "source": r.get("source", ""),
             "category": r.get("category", "General"),
             "summary": r.get("summary", ""),
-            "key": title_key(r.get("title", ""))
+            "key": title_key(r.get("title", "")),
+            "story": r.get("story_id") or r.get("id")
         })
 
-    groups = []  # each group: {"items": [...], "rep_key": str}
-    for it in items:
-        placed = False
-        for g in groups:
-            sim = SequenceMatcher(None, it["key"], g["rep_key"]).ratio()
-            if sim >= similarity_threshold:
-                g["items"].append(it)
-                placed = True
-                break
-        if not placed:
-            groups.append({"rep_key": it["key"], "items": [it]})
+    # rows linked to one story at ingest (story_id) are clustered as one: by their first row's title
+    reps, members, by_story = [], [], {}
+    for i, it in enumerate(items):
+        story = it["story"]
+        if story is not None and story in by_story:
+            members[by_story[story]].append(i)
+            continue
+        if story is not None:
+            by_story[story] = len(reps)
+        reps.append(i)
+        members.append([i])
+
+    # each group: {"items": [...], "rep_key": str}; MinHash/LSH picks which groups to compare against
+    groups = [
+        {"rep_key": items[reps[g[0]]]["key"], "items": [items[i] for j in g for i in members[j]]}
+        for g in cluster_keys([items[i]["key"] for i in reps], similarity_threshold)
+    ]
 
     # sort by coverage (more sources = hotter)
     groups.sort(key=lambda g: len({x["source"] for x in g["items"]}), reverse=True)
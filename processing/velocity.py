@@ -1,6 +1,9 @@
 import re
-from collections import Counter, defaultdict
-from datetime import datetime, timedelta
+from collections import Counter
+from datetime import datetime, timezone
+
+from processing.analysis import TEXT_LIMIT, row_words
+from processing.dates import utc_ts, row_ts
 
 
 STOPWORDS = set("""
@@ -13,34 +16,20 @@ BANNED_TERMS = {"delta", "line", "pro", "new", "over", "like"}
 def tokenize(text: str):
     text = (text or "").lower()
     words = re.findall(r"[a-z][a-z0-9\-]{2,}", text)
+    return _keep(words)
+
+
+def _keep(words):
     return [w for w in words if w not in STOPWORDS and w not in BANNED_TERMS and not w.isdigit()]
 
 
-def _parse_date_loose(s: str):
-    """
-    Very forgiving parser. If it can't parse, returns None.
-    We only need rough bucketing (this week vs last week).
-    """
-    if not s:
-        return None
-    s = s.strip()
-
-    # Common RSS formats often include timezone names; we ignore exact tz
-    patterns = [
-        "%a, %d %b %Y %H:%M:%S %Z",
-        "%a, %d %b %Y %H:%M:%S %z",
-        "%a, %d %b %Y %H:%M:%S",
-        "%Y-%m-%dT%H:%M:%S%z",
-        "%Y-%m-%dT%H:%M:%S",
-        "%Y-%m-%d",
-    ]
-    for p in patterns:
-        try:
-            dt = datetime.strptime(s, p)
-            return dt.replace(tzinfo=None)
-        except:
-            pass
-    return None
+def _row_terms(r):
+    # stored counts (article_terms) if the row has them, else tokenize title + summary.
+    # Both see the first TEXT_LIMIT (3000) chars, what article_terms is counted on; velocity
+    # used to stop at 2500, which only differs for a title + summary longer than that.
+    if "terms" in r:
+        return {t: c for t, c in r["terms"].items() if t not in STOPWORDS and t not in BANNED_TERMS}
+    return Counter(_keep(row_words(r, TEXT_LIMIT)))
 
 
 def velocity_wow(rows, now=None):
@@ -50,16 +39,17 @@ def velocity_wow(rows, now=None):
     - rising_terms: terms that increased most this week vs last week
     rows: list of dicts (title, summary, category, published)
     """
-    now = (now or datetime.utcnow()).replace(tzinfo=None)
-    start_this = now - timedelta(days=7)
-    start_last = now - timedelta(days=14)
+    now = utc_ts(now or datetime.now(timezone.utc))
+    start_this = now - 7 * 86400
+    start_last = now - 14 * 86400
 
-    by_cat = defaultdict(lambda: {"this_week": 0, "last_week": 0})
+    cat_this = Counter()
+    cat_last = Counter()
     terms_this = Counter()
     terms_last = Counter()
 
     for r in rows:
-        dt = _parse_date_loose(r.get("fetched_at", "")) or _parse_date_loose(r.get("published", ""))
+        dt = row_ts(r)
         # If missing dates, ignore for velocity calculations
         if not dt:
             continue
@@ -74,17 +64,25 @@ def velocity_wow(rows, now=None):
 
         cat = r.get("category", "General") or "General"
         if bucket == "this":
-            by_cat[cat]["this_week"] += 1
-            terms_this.update(tokenize((r.get("title", "") + " " + r.get("summary", ""))[:2500]))
+            cat_this[cat] += 1
+            terms_this.update(_row_terms(r))
         else:
-            by_cat[cat]["last_week"] += 1
-            terms_last.update(tokenize((r.get("title", "") + " " + r.get("summary", ""))[:2500]))
+            cat_last[cat] += 1
+            terms_last.update(_row_terms(r))
 
+    return velocity_from_counts(cat_this, cat_last, terms_this, terms_last)
+
+
+def velocity_from_counts(cat_this, cat_last, terms_this, terms_last):
+    """
+    Same output as velocity_wow, from this/last week counters
+    (e.g. storage.db.week_over_week over the daily rollups).
+    """
     # Turn counts into a sorted list with deltas
     cat_velocity = []
-    for cat, c in by_cat.items():
-        tw = c["this_week"]
-        lw = c["last_week"]
+    for cat in list(cat_this) + [c for c in cat_last if c not in cat_this]:
+        tw = cat_this.get(cat, 0)
+        lw = cat_last.get(cat, 0)
         delta = tw - lw
         # simple growth % with guard
         pct = None
@@ -109,8 +107,10 @@ def velocity_wow(rows, now=None):
     rising = []
     all_terms = set(terms_this.keys()) | set(terms_last.keys())
     for t in all_terms:
-        tw = terms_this[t]
-        lw = terms_last[t]
+        if t in STOPWORDS or t in BANNED_TERMS:
+            continue
+        tw = terms_this.get(t, 0)
+        lw = terms_last.get(t, 0)
         if tw < 3:
             continue  # avoid noise
         diff = tw - lw
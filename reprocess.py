@@ -0,0 +1,161 @@
+"""
+Re-run category and company detection over stored articles, e.g. after editing
+CATEGORY_KEYWORDS or sources/company_aliases.json.
+
+    python reprocess.py                 (resumes where an interrupted run stopped)
+    python reprocess.py --dry-run       (report what would change, write nothing)
+    python reprocess.py --restart       (from the first article again)
+    python reprocess.py --workers 8 --chunk 1000 --db other.db
+
+Each article is analysed on exactly what ingest analysed: the title and full body
+kept in article_inputs, with the fallback categories of the feed it came from as
+configured now. Articles stored before bodies were kept, or fetched more than
+ARTICLE_INPUT_DAYS ago (main.py prunes older inputs every run), have no input and
+are left as they are. Articles are read in id order, REPROCESS_CHUNK at a time, and
+analysed by a pool of REPROCESS_WORKERS processes (the matching is pure Python,
+so threads wouldn't help). Results are written back in id order,
+REPROCESS_BATCH articles per transaction, together with a checkpoint of the last
+id written: Ctrl-C at any point loses at most the batch in flight.
+"""
+import os
+from dotenv import load_dotenv
+load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from config import REPROCESS_WORKERS, REPROCESS_CHUNK, REPROCESS_BATCH
+from processing.analysis import reanalyze
+from storage.db import (
+    init_db, connect, migrate, analysis_inputs, analysis_changes, update_analysis, load_checkpoint, save_checkpoint,
+    clear_checkpoint
+)
+from dashboard.snapshot import refresh_snapshot
+
+
+JOB = "reprocess"
+SOURCES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sources", "rss_sources.json")
+EXAMPLES = 20
+
+
+def _fallbacks():
+    # feed url -> its configured categories, the fallback when no keyword matches
+    with open(SOURCES_FILE, encoding="utf-8") as f:
+        return {src["url"]: src.get("categories", []) for src in json.load(f)}
+
+
+def _tasks(conn, after_id, chunk):
+    fallbacks = _fallbacks()
+    while True:
+        rows = analysis_inputs(conn, after_id=after_id, limit=chunk)
+        if not rows:
+            return
+        after_id = rows[-1][0]
+        # a feed that isn't configured (any more) keeps the category it has when nothing matches
+        yield [
+            (article_id, title or "", body, fallbacks.get(feed_url) or [category or "General"])
+            for article_id, title, feed_url, body, category in rows
+        ]
+
+
+def _results(tasks, workers):
+    # results per task, in task (= id) order; at most 2 tasks per worker queued at a time
+    if workers <= 1:
+        for task in tasks:
+            yield reanalyze(task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        inflight = deque()
+        try:
+            for task in tasks:
+                inflight.append(pool.submit(reanalyze, task))
+                if len(inflight) >= 2 * workers:
+                    yield inflight.popleft().result()
+            while inflight:
+                yield inflight.popleft().result()
+        finally:
+            for fut in inflight:
+                fut.cancel()
+
+
+def reprocess(conn, workers=REPROCESS_WORKERS, chunk=REPROCESS_CHUNK, batch=REPROCESS_BATCH, restart=False,
+              dry_run=False):
+    """
+    Returns (articles analysed, articles changed) for this invocation. dry_run: print
+    what would change and write nothing (not even the checkpoint; always from the start).
+    """
+    workers = workers or os.cpu_count() or 1
+    if restart and not dry_run:
+        clear_checkpoint(conn, JOB)
+    start = 0 if dry_run else load_checkpoint(conn, JOB)
+    total = conn.execute("SELECT COUNT(*) FROM article_inputs WHERE article_id > ?", (start,)).fetchone()[0]
+    skipped = conn.execute(
+        "SELECT COUNT(*) FROM articles WHERE id > ? AND id NOT IN (SELECT article_id FROM article_inputs)", (start,)
+    ).fetchone()[0]
+    if start:
+        print(f"[REPROCESS] resuming after article {start}")
+    print(f"[REPROCESS] {total} articles, {workers} workers ({skipped} without a stored body left as they are)")
+
+    done = changed = 0
+    pending = []
+    started = time.monotonic()
+
+    def write():
+        nonlocal done, changed
+        if dry_run:
+            diff = analysis_changes(conn, pending)
+            for article_id, _, _, category, companies, new_category, new_companies in diff:
+                if changed < EXAMPLES:
+                    print(f"[REPROCESS] would change {article_id}: {category} -> {new_category}, "
+                          f"{companies} -> {new_companies}")
+                changed += 1
+        else:
+            with conn:
+                changed += update_analysis(conn, pending)
+                save_checkpoint(conn, JOB, pending[-1][0])
+        done += len(pending)
+        pending.clear()
+        rate = done / max(time.monotonic() - started, 1e-9)
+        print(f"[REPROCESS] {done}/{total} ({changed} {'would change' if dry_run else 'changed'}, {rate:.0f}/s)")
+
+    for results in _results(_tasks(conn, start, chunk), workers):
+        pending += results
+        if len(pending) >= batch:
+            write()
+    if pending:
+        write()
+    if not dry_run:
+        # finished: the next run starts from the beginning again
+        clear_checkpoint(conn, JOB)
+    return done, changed
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    p.add_argument("--workers", type=int, default=REPROCESS_WORKERS, help="processes, 0 = one per CPU")
+    p.add_argument("--chunk", type=int, default=REPROCESS_CHUNK, help="articles per worker task")
+    p.add_argument("--batch", type=int, default=REPROCESS_BATCH, help="articles per transaction")
+    p.add_argument("--restart", action="store_true", help="ignore the checkpoint of an interrupted run")
+    p.add_argument("--dry-run", action="store_true", help="report what would change, write nothing")
+    p.add_argument("--db", help="SQLite file (default: news.db)")
+    args = p.parse_args(argv)
+
+    conn = migrate(connect(args.db)) if args.db else init_db()
+    try:
+        done, changed = reprocess(conn, args.workers, args.chunk, args.batch, args.restart, args.dry_run)
+    except KeyboardInterrupt:
+        print(f"[REPROCESS] interrupted, committed up to article {load_checkpoint(conn, JOB)}; run again to resume")
+        conn.close()
+        return 130
+    if changed and not args.dry_run:
+        print(f"[DASH] snapshot {refresh_snapshot(conn)}")
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
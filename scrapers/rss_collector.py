@@ -1,45 +1,245 @@
+import calendar
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
 import feedparser
+import requests
 from newspaper import Article
 
+from config import RSS_MAX_WORKERS, RSS_PER_HOST, RSS_TIMEOUT_BUDGET, RSS_REQUEST_TIMEOUT
+from processing.dates import utc_ts
+from processing.metrics import timer, count
+
+
+MAX_ENTRIES = 10
+USER_AGENT = "Mozilla/5.0 (compatible; auto-news-bot/1.0)"
+
+
+def _host(url):
+    return urlparse(url).netloc.lower()
 
-def collect(feed_url):
-    feed = feedparser.parse(feed_url)
-    articles = []
 
-    for entry in feed.entries[:10]:
+def _fetch_feed(feed_url, state=None, timeout=RSS_REQUEST_TIMEOUT):
+    """
+    GET the feed, sending ETag/Last-Modified from `state` if we have them.
+    Returns None on 304 Not Modified. Fresh validators are written back into `state`.
+    """
+    headers = {"User-Agent": USER_AGENT}
+    if state:
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+    host = _host(feed_url)
+    with timer("collect.feed", source=host) as span:
+        r = requests.get(feed_url, timeout=timeout, headers=headers)
+        span.bytes = len(r.content or b"")
+    if r.status_code == 304:
+        count("collect.not_modified", source=host)
+        return None
+    r.raise_for_status()
+
+    if state is not None:
+        state["etag"] = r.headers.get("ETag", "") or ""
+        state["last_modified"] = r.headers.get("Last-Modified", "") or ""
+    return feedparser.parse(r.content)
+
+
+def _entries(feed):
+    out = []
+    for entry in feed.entries[:MAX_ENTRIES]:
         url = getattr(entry, "link", None)
-        if not url:
-            continue
+        if url:
+            out.append((entry, url))
+    return out
+
+
+def _new_entries(feed, known=None, since=None):
+    """
+    Entries worth downloading: not published before `since` (epoch seconds; undated
+    entries are kept) and whose URL isn't already stored (`known(urls) -> set`).
+    """
+    entries = _entries(feed)
+
+    if since is not None:
+        entries = [(e, u) for e, u in entries if (_published_ts(e) or since) >= since]
+
+    if known and entries:
+        skip = known([u for _, u in entries])
+        entries = [(e, u) for e, u in entries if u not in skip]
+
+    return entries
+
+
+def _published(entry):
+    return (
+        getattr(entry, "published", "") or
+        getattr(entry, "updated", "") or
+        ""
+    )
+
+
+def _published_ts(entry):
+    # feedparser already parsed the date to a UTC struct_time when it could
+    parsed = getattr(entry, "published_parsed", None) or getattr(entry, "updated_parsed", None)
+    if parsed:
+        return calendar.timegm(parsed)
+    return utc_ts(_published(entry))
+
+
+def _headline_only(entry, feed, url):
+    # If article extraction fails, still keep headline+link
+    return {
+        "title": getattr(entry, "title", "") or url,
+        "url": url,
+        "text": getattr(entry, "summary", "") or "",
+        "source": getattr(feed.feed, "title", "") or "",
+        "published": _published(entry),
+        "published_ts": _published_ts(entry)
+    }
 
-        published = (
-            getattr(entry, "published", "") or
-            getattr(entry, "updated", "") or
-            ""
-        )
 
+def _download(url, timeout=RSS_REQUEST_TIMEOUT):
+    host = _host(url)
+    art = Article(url, request_timeout=timeout)
+    with timer("extract.download", source=host) as span:
+        art.download()
+        span.bytes = len(art.html or "")
+    with timer("extract.parse", source=host):
+        art.parse()
+    return art
+
+
+def _from_article(entry, feed, url, art):
+    return {
+        "title": art.title or getattr(entry, "title", "") or url,
+        "url": url,
+        "text": art.text or "",
+        "source": getattr(feed.feed, "title", "") or "",
+        "published": _published(entry),
+        "published_ts": _published_ts(entry)
+    }
+
+
+def collect(feed_url, state=None, known=None, since=None):
+    """
+    `state` is this feed's cache dict (etag, last_modified) and is updated in place.
+    `known(urls)` returns the urls that are already stored, so they are not downloaded again.
+    Entries published before `since` (UTC epoch seconds) are dropped before downloading.
+    """
+    try:
+        feed = _fetch_feed(feed_url, state)
+    except Exception as e:
+        print(f"[RSS] feed failed: {feed_url} ({e})")
+        return []
+
+    if feed is None:
+        print(f"[RSS] not modified: {feed_url}")
+        return []
+
+    articles = []
+    for entry, url in _new_entries(feed, known, since):
         try:
-            art = Article(url)
-            art.download()
-            art.parse()
-
-            title = art.title or getattr(entry, "title", "") or url
-
-            articles.append({
-                "title": title,
-                "url": url,
-                "text": art.text or "",
-                "source": getattr(feed.feed, "title", "") or "",
-                "published": published
-            })
+            articles.append(_from_article(entry, feed, url, _download(url)))
         except:
-            # If article extraction fails, still keep headline+link
-            title = getattr(entry, "title", "") or url
-            articles.append({
-                "title": title,
-                "url": url,
-                "text": getattr(entry, "summary", "") or "",
-                "source": getattr(feed.feed, "title", "") or "",
-                "published": published
-            })
-
-    return articles
\ No newline at end of file
+            count("extract.failed", source=_host(url))
+            articles.append(_headline_only(entry, feed, url))
+
+    return articles
+
+
+def stream_many(feed_urls, states=None, known=None, since=None,
+                max_workers=RSS_MAX_WORKERS, per_host=RSS_PER_HOST, budget=RSS_TIMEOUT_BUDGET):
+    """
+    Concurrent version of collect() over many feeds at once, as a generator that
+    yields (feed_url, index in feed, article dict) as soon as each article is done.
+    Feeds and article bodies share one thread pool; at most `per_host` requests
+    run against the same host at a time, the rest wait in a per-host backlog.
+    `budget` is wall-clock seconds from the call, the consumer's time between items
+    included: once it is up no more requests are started, whatever has finished is
+    still used, and everything else falls back to headline+summary, same as a
+    failed download in collect().
+    `states` ({feed_url: cache dict}), `known` and `since` work like in collect();
+    `known` is only ever called from the consuming thread.
+    """
+    states = states if states is not None else {}
+    deadline = time.monotonic() + budget
+    waiting = {}  # (feed_url, i) -> headline-only placeholder, until the download is back
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rss")
+    pending = {}  # future -> (host, job)
+    backlog = defaultdict(deque)
+    inflight = Counter()
+
+    def submit(host, job, fn, *args):
+        inflight[host] += 1
+        pending[pool.submit(fn, *args)] = (host, job)
+
+    def schedule(url, job, fn, *args):
+        host = _host(url)
+        if inflight[host] < per_host:
+            submit(host, job, fn, *args)
+        else:
+            backlog[host].append((job, fn, args))
+
+    def release(host):
+        inflight[host] -= 1
+        if backlog[host] and time.monotonic() < deadline:
+            job, fn, args = backlog[host].popleft()
+            submit(host, job, fn, *args)
+
+    for u in feed_urls:
+        schedule(u, ("feed", u), _fetch_feed, u, states.get(u))
+
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            else:
+                # out of time (maybe the consumer was slow): take what has finished, drop the rest
+                done = {fut for fut in pending if fut.done()}
+                if not done:
+                    print(f"[RSS] time budget of {budget}s exceeded, {len(pending)} requests still running")
+                    break
+            ready = []
+            for fut in done:
+                host, job = pending.pop(fut)
+                release(host)
+
+                if job[0] == "feed":
+                    feed_url = job[1]
+                    try:
+                        feed = fut.result()
+                    except Exception as e:
+                        print(f"[RSS] feed failed: {feed_url} ({e})")
+                        continue
+                    if feed is None:
+                        print(f"[RSS] not modified: {feed_url}")
+                        continue
+                    entries = _new_entries(feed, known, since)
+                    for i, (entry, url) in enumerate(entries):
+                        waiting[feed_url, i] = _headline_only(entry, feed, url)
+                        if time.monotonic() < deadline:
+                            schedule(url, ("article", feed_url, i, entry, feed), _download, url)
+                else:
+                    _, feed_url, i, entry, feed = job
+                    article = waiting.pop((feed_url, i))
+                    try:
+                        article = _from_article(entry, feed, article["url"], fut.result())
+                    except:
+                        count("extract.failed", source=_host(article["url"]))
+                    ready.append((feed_url, i, article))
+
+            yield from ready
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    # out of time: headline+summary for whatever didn't come back
+    for (feed_url, i), article in list(waiting.items()):
+        count("extract.timed_out", source=_host(article["url"]))
+        yield feed_url, i, article
+
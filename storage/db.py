@@ -1,12 +1,44 @@
 import os
+import re
+import json
+import hashlib
 import sqlite3
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from processing.dates import utc_ts
+from processing.metrics import timer
 
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "news.db")
 
 
+# WAL lets the dashboard read while a run is writing; NORMAL sync is safe under WAL
+# (a power cut can lose the last commit, never corrupt the file)
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+def connect(path=None, shared=False):
+    # shared: opened in one thread, used from another (a pipeline stage's worker), never two at once
+    conn = sqlite3.connect(path or DB_PATH, timeout=5, check_same_thread=not shared)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    conn = connect()
+    migrate(conn)
+    return conn
+
+
+def _schema_v1(c):
+    # everything up to the batched writes; IF NOT EXISTS so DBs made before versioning pass through
     c.execute("""
         CREATE TABLE IF NOT EXISTS articles (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -18,13 +50,1064 @@ def init_db():
             category TEXT,
             companies TEXT,
             summary TEXT,
-            title_key TEXT
+            title_key TEXT,
+            content_hash TEXT
         )
     """)
-    conn.commit()
+    _add_column(c, "articles", "content_hash", "TEXT")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_content_hash ON articles(content_hash)")
+    # Conditional-GET validators per feed
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS feeds (
+            feed_url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            checked_at TEXT
+        )
+    """)
+    # Term counts of title+summary per article (trends/velocity input), written at ingest
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS article_terms (
+            article_id INTEGER NOT NULL,
+            term TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (article_id, term)
+        ) WITHOUT ROWID
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_article_terms_term ON article_terms(term)")
+    # Daily rollups by fetched_at day (UTC), kept in step by upsert_articles()
+    for table, key in ROLLUPS.values():
+        c.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                day TEXT NOT NULL,
+                {key} TEXT NOT NULL,
+                n INTEGER NOT NULL,
+                PRIMARY KEY (day, {key})
+            ) WITHOUT ROWID
+        """)
+
+
+def _schema_v2(c):
+    # fetched_at as UTC epoch seconds, so time windows are integer range scans on an index
+    _add_column(c, "articles", "fetched_ts", "INTEGER")
+    c.execute("""
+        UPDATE articles SET fetched_ts = CAST(strftime('%s', fetched_at) AS INTEGER)
+        WHERE fetched_ts IS NULL AND COALESCE(fetched_at, '') != ''
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_fetched_ts ON articles(fetched_ts)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_category_fetched_ts ON articles(category, fetched_ts)")
+    # query_articles pages on id: a category filter walks this in id order and stops at LIMIT
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_category_id ON articles(category, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_title_key ON articles(title_key)")
+
+
+def _schema_v3(c):
+    # RSS published date as UTC epoch (RFC-822 and friends, parsed once here instead of per report)
+    _add_column(c, "articles", "published_ts", "INTEGER")
+    rows = c.execute("SELECT id, published FROM articles WHERE published_ts IS NULL AND COALESCE(published, '') != ''").fetchall()
+    c.executemany(
+        "UPDATE articles SET published_ts=? WHERE id=?",
+        [(utc_ts(published), article_id) for article_id, published in rows]
+    )
+
+
+def _schema_v4(c):
+    # precomputed view models (dashboard), JSON; etag changes only when the data does
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS snapshots (
+            name TEXT PRIMARY KEY,
+            etag TEXT NOT NULL,
+            built_at TEXT,
+            data TEXT NOT NULL
+        )
+    """)
+
+
+def _schema_v5(c):
+    # full-text index over title/summary/companies; external content (no second copy
+    # of the text), kept in step with articles by triggers so every write path is covered
+    c.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            title, summary, companies,
+            content='articles', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_fts(rowid, title, summary, companies)
+            VALUES (new.id, new.title, new.summary, new.companies);
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, title, summary, companies)
+            VALUES ('delete', old.id, old.title, old.summary, old.companies);
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE OF title, summary, companies ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, title, summary, companies)
+            VALUES ('delete', old.id, old.title, old.summary, old.companies);
+            INSERT INTO articles_fts(rowid, title, summary, companies)
+            VALUES (new.id, new.title, new.summary, new.companies);
+        END
+    """)
+    c.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+
+
+def _schema_v6(c):
+    # one row per (article, company) mention; ts = fetched_ts, so company counts over
+    # any window are index range scans instead of json.loads over recent rows
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS article_companies (
+            article_id INTEGER NOT NULL,
+            company TEXT NOT NULL,
+            ts INTEGER,
+            PRIMARY KEY (article_id, company)
+        ) WITHOUT ROWID
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_article_companies_company_ts ON article_companies(company, ts)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_article_companies_ts ON article_companies(ts, company)")
+    c.execute("""
+        INSERT OR IGNORE INTO article_companies(article_id, company, ts)
+        SELECT a.id, j.value, a.fetched_ts
+        FROM articles a, json_each(a.companies) j
+        WHERE json_valid(a.companies) AND j.type = 'text'
+    """)
+
+
+def _schema_v7(c):
+    # near-duplicate links made at ingest: simhash of the body (NULL for short/old bodies),
+    # story_id = id of the first article of the same story (NULL = this article is the first)
+    _add_column(c, "articles", "simhash", "INTEGER")
+    _add_column(c, "articles", "story_id", "INTEGER")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_story_id ON articles(story_id)")
+
+
+def _schema_v8(c):
+    # one row per ingest run: headline numbers as columns, the full JSON run report
+    # (per-stage / per-source timings, optional profile) in `report`
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS pipeline_runs (
+            id INTEGER PRIMARY KEY,
+            started_at TEXT,
+            started_ts INTEGER,
+            seconds REAL,
+            articles INTEGER,
+            inserted INTEGER,
+            llm_calls INTEGER,
+            report TEXT
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_pipeline_runs_started_ts ON pipeline_runs(started_ts)")
+
+
+def _schema_v9(c):
+    # resumable batch jobs (reprocess.py): last article id whose results are committed
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            started_at TEXT,
+            updated_at TEXT
+        )
+    """)
+    # what analyze_article saw at ingest, so reprocess.py can re-run it on the same input:
+    # the feed it came from (its configured fallback categories) and the body, zlib-compressed.
+    # Articles stored before this, or older than ARTICLE_INPUT_DAYS, have no row and are left alone by reprocess.
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS article_inputs (
+            article_id INTEGER PRIMARY KEY,
+            feed_url TEXT,
+            body BLOB
+        )
+    """)
+
+
+def _schema_v10(c):
+    # term counts per (day, category): the per-category trend windows (processing.termmatrix)
+    # come from here instead of joining article_terms with articles on every report
+    c.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CATEGORY_TERMS} (
+            day TEXT NOT NULL,
+            category TEXT NOT NULL,
+            term TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            PRIMARY KEY (day, category, term)
+        ) WITHOUT ROWID
+    """)
+    _fill_category_terms(c)
+
+
+def _schema_v11(c):
+    # per-term exponentially weighted sums of the daily count (processing.baselines):
+    # s1 = sum w*x, s2 = sum w*x^2 as of `day`, the last day the term occurred (for pruning).
+    # The weights' own sum follows from the number of folded days, the same for every term.
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS term_baselines (
+            term TEXT PRIMARY KEY,
+            s1 REAL NOT NULL,
+            s2 REAL NOT NULL,
+            day TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_term_baselines_day ON term_baselines(day)")
+
+
+# Schema version N is reached by running MIGRATIONS[N - 1]; append only, never edit a shipped step.
+MIGRATIONS = [
+    _schema_v1,
+    _schema_v2,
+    _schema_v3,
+    _schema_v4,
+    _schema_v5,
+    _schema_v6,
+    _schema_v7,
+    _schema_v8,
+    _schema_v9,
+    _schema_v10,
+    _schema_v11,
+]
+
+
+def migrate(conn):
+    """Bring the DB up to len(MIGRATIONS), one transaction per step (version in PRAGMA user_version)."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target in range(version + 1, len(MIGRATIONS) + 1):
+        conn.execute("BEGIN")
+        try:
+            MIGRATIONS[target - 1](conn.cursor())
+            conn.execute(f"PRAGMA user_version={target}")
+            conn.commit()
+        except:
+            conn.rollback()
+            raise
+        print(f"[DB] schema migrated to v{target}")
     return conn
 
 
+ARTICLE_COLUMNS = (
+    "title", "url", "source", "published", "fetched_at",
+    "category", "companies", "summary", "title_key", "content_hash", "fetched_ts", "published_ts",
+    "simhash", "story_id"
+)
+
+UPSERT = f"""
+    INSERT INTO articles({",".join(ARTICLE_COLUMNS)})
+    VALUES({",".join("?" * len(ARTICLE_COLUMNS))})
+    ON CONFLICT(url) DO UPDATE SET
+        {", ".join(f"{c}=excluded.{c}" for c in ARTICLE_COLUMNS if c != "url")}
+"""
+
+# kind -> (table, key column)
+ROLLUPS = {
+    "category": ("daily_category", "category"),
+    "term": ("daily_terms", "term"),
+    "company": ("daily_companies", "company"),
+}
+# daily_terms split by category; keyed (day, category, term), so kept next to ROLLUPS, not in it
+CATEGORY_TERMS = "daily_category_terms"
+
+
+def _add_column(cur, table, column, decl):
+    # CREATE TABLE IF NOT EXISTS won't touch older DBs, so add new columns by hand
+    cols = {r[1] for r in cur.execute(f"PRAGMA table_info({table})").fetchall()}
+    if column not in cols:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def _chunks(seq, size=500):
+    # stay under SQLite's bound-parameter limit
+    seq = list(seq)
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def load_feed_states(conn):
+    cur = conn.execute("SELECT feed_url, etag, last_modified FROM feeds")
+    return {
+        feed_url: {"etag": etag or "", "last_modified": last_modified or ""}
+        for feed_url, etag, last_modified in cur.fetchall()
+    }
+
+
+def save_feed_states(conn, states, checked_at=""):
+    conn.executemany(
+        """
+        INSERT INTO feeds(feed_url, etag, last_modified, checked_at)
+        VALUES(?,?,?,?)
+        ON CONFLICT(feed_url) DO UPDATE SET
+            etag=excluded.etag,
+            last_modified=excluded.last_modified,
+            checked_at=excluded.checked_at
+        """,
+        [(url, st.get("etag", ""), st.get("last_modified", ""), checked_at) for url, st in states.items()]
+    )
+    conn.commit()
+
+
+def existing_urls(conn, urls):
+    """Subset of `urls` that is already stored in articles."""
+    found = set()
+    for chunk in _chunks(urls):
+        cur = conn.execute(
+            f"SELECT url FROM articles WHERE url IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+        found.update(r[0] for r in cur.fetchall())
+    return found
+
+
+def save_article_terms(conn, article_id, counts):
+    """Replace the stored term counts of one article. Caller commits."""
+    conn.execute("DELETE FROM article_terms WHERE article_id=?", (article_id,))
+    conn.executemany(
+        "INSERT INTO article_terms(article_id, term, count) VALUES(?,?,?)",
+        [(article_id, t, c) for t, c in counts.items()]
+    )
+
+
+def attach_terms(conn, rows):
+    """Set r["terms"] = {term: count} on rows (dicts with "id") from article_terms."""
+    by_id = {r["id"]: r for r in rows if r.get("id") is not None}
+    for r in by_id.values():
+        r["terms"] = {}
+    for chunk in _chunks(by_id):
+        cur = conn.execute(
+            f"SELECT article_id, term, count FROM article_terms WHERE article_id IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+        for article_id, term, count in cur.fetchall():
+            by_id[article_id]["terms"][term] = count
+    return rows
+
+
+def backfill_article_terms(conn, term_counts, batch=1000):
+    """
+    Fill article_terms for articles stored before it existed, adding their terms to the
+    term rollups. term_counts(row) -> {term: count}, row has title and summary.
+    Articles written since always come with their terms, so a checkpoint of the last id
+    looked at keeps later runs to the articles added since (and articles without any
+    terms aren't tokenized again and again). Returns the number of articles filled.
+    """
+    last = load_checkpoint(conn, "article_terms_backfill")
+    top = conn.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
+    filled = 0
+    while last < top:
+        rows = conn.execute(
+            """
+            SELECT a.id, a.title, a.summary, a.fetched_at, a.category FROM articles a
+            WHERE a.id > ? AND a.id <= ?
+              AND NOT EXISTS (SELECT 1 FROM article_terms t WHERE t.article_id = a.id)
+            ORDER BY a.id LIMIT ?
+            """,
+            (last, top, batch)
+        ).fetchall()
+        deltas = _new_deltas()
+        for article_id, title, summary, f_at, category in rows:
+            terms = term_counts({"title": title or "", "summary": summary or ""})
+            save_article_terms(conn, article_id, terms)
+            _term_deltas(deltas, (f_at or "")[:10], category or "General", terms, 1)
+        last = rows[-1][0] if len(rows) == batch else top
+        with conn:
+            _apply_rollups(conn, deltas)
+            save_checkpoint(conn, "article_terms_backfill", last)
+        filled += len(rows)
+    return filled
+
+
+def upsert_articles(conn, items):
+    """
+    Insert or update a batch of (row, terms), keyed by url, with their term counts,
+    moving their contribution in the daily rollups along with them.
+    Old rows, old terms and article ids are read with chunked IN queries, the
+    writes go out as one executemany per statement (sqlite3 prepares each
+    statement once) and the rollup deltas of the whole batch are summed first,
+    so each (day, key) is touched once. Caller commits; run it inside one
+    transaction (`with conn:`) to write a batch atomically.
+    Returns [(article_id, is_new)] in input order.
+    """
+    items = list(items)
+    with timer("db.upsert", items=len(items)):
+        return _upsert_articles(conn, items)
+
+
+def _upsert_articles(conn, items):
+    # last row wins for a url that shows up twice in a batch, same as row by row
+    by_url = {row["url"]: (row, terms) for row, terms in items}
+    urls = list(by_url)
+
+    old = {}
+    for chunk in _chunks(urls):
+        cur = conn.execute(
+            f"SELECT id, url, fetched_at, category, companies FROM articles WHERE url IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+        for article_id, url, f_at, category, companies in cur.fetchall():
+            old[url] = (article_id, f_at, category, companies)
+
+    deltas = _new_deltas()
+    old_terms = _stored_terms(conn, [article_id for article_id, *_ in old.values()])
+    for article_id, f_at, category, companies in old.values():
+        _rollup_deltas(deltas, f_at, category, old_terms[article_id], companies, -1)
+
+    for row, _ in by_url.values():
+        if row.get("fetched_ts") is None:
+            row["fetched_ts"] = utc_ts(row.get("fetched_at"))
+        if row.get("published_ts") is None:
+            row["published_ts"] = utc_ts(row.get("published"))
+    conn.executemany(UPSERT, [[row.get(c) for c in ARTICLE_COLUMNS] for row, _ in by_url.values()])
+
+    ids = {}
+    for chunk in _chunks(urls):
+        cur = conn.execute(
+            f"SELECT url, id FROM articles WHERE url IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+        ids.update(cur.fetchall())
+
+    for chunk in _chunks([ids[u] for u in urls]):
+        marks = ",".join("?" * len(chunk))
+        conn.execute(f"DELETE FROM article_terms WHERE article_id IN ({marks})", chunk)
+        conn.execute(f"DELETE FROM article_companies WHERE article_id IN ({marks})", chunk)
+    conn.executemany(
+        "INSERT INTO article_terms(article_id, term, count) VALUES(?,?,?)",
+        [(ids[url], t, c) for url, (_, terms) in by_url.items() for t, c in terms.items()]
+    )
+    conn.executemany(
+        "INSERT INTO article_companies(article_id, company, ts) VALUES(?,?,?)",
+        [(ids[url], c, row["fetched_ts"]) for url, (row, _) in by_url.items() for c in _companies(row["companies"])]
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO article_inputs(article_id, feed_url, body) VALUES(?,?,?)",
+        [(ids[url], row.get("feed_url"), row["body"]) for url, (row, _) in by_url.items() if row.get("body") is not None]
+    )
+
+    for row, terms in by_url.values():
+        _rollup_deltas(deltas, row["fetched_at"], row["category"], terms, row["companies"], 1)
+    _apply_rollups(conn, deltas)
+
+    out, seen = [], set(old)
+    for row, _ in items:
+        out.append((ids[row["url"]], row["url"] not in seen))
+        seen.add(row["url"])
+    return out
+
+
+def _companies(value):
+    try:
+        return set(json.loads(value or "[]"))
+    except:
+        return set()
+
+
+def _new_deltas():
+    return {kind: Counter() for kind in (*ROLLUPS, CATEGORY_TERMS)}
+
+
+def _stored_terms(conn, article_ids):
+    """{article_id: {term: count}} from article_terms."""
+    out = {article_id: {} for article_id in article_ids}
+    for chunk in _chunks(out):
+        cur = conn.execute(
+            f"SELECT article_id, term, count FROM article_terms WHERE article_id IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+        for article_id, term, count in cur.fetchall():
+            out[article_id][term] = count
+    return out
+
+
+def _rollup_deltas(deltas, fetched_at, category, terms, companies, sign):
+    # deltas: {kind: Counter((day, key) -> n)}, CATEGORY_TERMS: Counter((day, category, term) -> n)
+    day = (fetched_at or "")[:10]
+    if not day:
+        return
+    category = category or "General"
+    deltas["category"][(day, category)] += sign
+    _term_deltas(deltas, day, category, terms, sign)
+    # each company once per article
+    for c in _companies(companies):
+        deltas["company"][(day, c)] += sign
+
+
+def _term_deltas(deltas, day, category, terms, sign):
+    if not day:
+        return
+    for t, n in terms.items():
+        deltas["term"][(day, t)] += sign * n
+        deltas[CATEGORY_TERMS][(day, category, t)] += sign * n
+
+
+def _apply_rollups(conn, deltas):
+    for kind, counts in deltas.items():
+        if kind == CATEGORY_TERMS:
+            _apply_category_terms(conn, counts)
+            continue
+        table, key = ROLLUPS[kind]
+        changed = [(day, k, n) for (day, k), n in counts.items() if n]
+        conn.executemany(
+            f"""
+            INSERT INTO {table}(day, {key}, n) VALUES(?,?,?)
+            ON CONFLICT(day, {key}) DO UPDATE SET n = n + excluded.n
+            """,
+            changed
+        )
+        shrunk = [(day, k) for day, k, n in changed if n < 0]
+        conn.executemany(f"DELETE FROM {table} WHERE day=? AND {key}=? AND n <= 0", shrunk)
+
+
+def _apply_category_terms(conn, counts):
+    changed = [(day, cat, t, n) for (day, cat, t), n in counts.items() if n]
+    conn.executemany(
+        f"""
+        INSERT INTO {CATEGORY_TERMS}(day, category, term, n) VALUES(?,?,?,?)
+        ON CONFLICT(day, category, term) DO UPDATE SET n = n + excluded.n
+        """,
+        changed
+    )
+    shrunk = [(day, cat, t) for day, cat, t, n in changed if n < 0]
+    conn.executemany(f"DELETE FROM {CATEGORY_TERMS} WHERE day=? AND category=? AND term=? AND n <= 0", shrunk)
+
+
+def _fill_category_terms(c):
+    c.execute(f"""
+        INSERT INTO {CATEGORY_TERMS}(day, category, term, n)
+        SELECT substr(a.fetched_at, 1, 10), COALESCE(NULLIF(a.category, ''), 'General'), t.term, SUM(t.count)
+        FROM articles a JOIN article_terms t ON t.article_id = a.id
+        WHERE COALESCE(a.fetched_at, '') != ''
+        GROUP BY 1, 2, 3
+    """)
+
+
+def analysis_inputs(conn, after_id=0, limit=500):
+    """
+    [(article_id, title, feed_url, body, category)] of articles with a stored analysis
+    input (article_inputs), id order, ids > after_id. body is zlib-compressed.
+    """
+    return conn.execute(
+        """
+        SELECT a.id, a.title, i.feed_url, i.body, a.category
+        FROM article_inputs i JOIN articles a ON a.id = i.article_id
+        WHERE i.article_id > ? ORDER BY i.article_id LIMIT ?
+        """,
+        (after_id, limit)
+    ).fetchall()
+
+
+def prune_article_inputs(conn, before_ts):
+    """
+    Drop the stored analysis inputs of articles fetched before `before_ts` (UTC epoch
+    seconds); reprocess.py leaves those articles as they are. Caller commits.
+    Returns the number of rows deleted.
+    """
+    return conn.execute(
+        "DELETE FROM article_inputs WHERE article_id IN (SELECT id FROM articles WHERE fetched_ts < ?)",
+        (before_ts,)
+    ).rowcount
+
+
+def analysis_changes(conn, updates):
+    """
+    The part of `updates` (as for update_analysis) that differs from what is stored:
+    [(article_id, fetched_at, fetched_ts, category, companies, new_category, new_companies)].
+    """
+    new = {article_id: (category, companies) for article_id, category, companies in updates}
+    changed = []
+    for chunk in _chunks(new):
+        cur = conn.execute(
+            f"SELECT id, fetched_at, fetched_ts, category, companies FROM articles WHERE id IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+        for article_id, f_at, f_ts, category, companies in cur.fetchall():
+            new_category, new_companies = new[article_id]
+            if new_category == category and _companies(new_companies) == _companies(companies):
+                continue
+            changed.append((article_id, f_at, f_ts, category, companies, new_category, new_companies))
+    return changed
+
+
+def update_analysis(conn, updates):
+    """
+    Store re-computed analysis for existing articles: updates = [(article_id, category,
+    companies JSON)]. article_companies and the category, company and
+    category-term rollups move along. Caller commits.
+    Returns the number of articles that actually changed.
+    """
+    changed = analysis_changes(conn, updates)
+    deltas = _new_deltas()
+    # terms only matter to the by-category rollup (the plain term deltas cancel out)
+    moved = _stored_terms(conn, [i for i, _, _, category, _, new_category, _ in changed if category != new_category])
+    for article_id, f_at, _, category, companies, new_category, new_companies in changed:
+        terms = moved.get(article_id, {})
+        _rollup_deltas(deltas, f_at, category, terms, companies, -1)
+        _rollup_deltas(deltas, f_at, new_category, terms, new_companies, 1)
+    changed = [(i, ts, c, cs) for i, _, ts, _, _, c, cs in changed]
+
+    conn.executemany("UPDATE articles SET category=?, companies=? WHERE id=?", [(c, cs, i) for i, _, c, cs in changed])
+    for chunk in _chunks([i for i, *_ in changed]):
+        conn.execute(f"DELETE FROM article_companies WHERE article_id IN ({','.join('?' * len(chunk))})", chunk)
+    conn.executemany(
+        "INSERT INTO article_companies(article_id, company, ts) VALUES(?,?,?)",
+        [(i, c, ts) for i, ts, _, cs in changed for c in _companies(cs)]
+    )
+    _apply_rollups(conn, deltas)
+    return len(changed)
+
+
+def load_checkpoint(conn, name):
+    """Last id committed by job `name`, 0 if it never ran (or was cleared)."""
+    row = conn.execute("SELECT last_id FROM checkpoints WHERE name=?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def save_checkpoint(conn, name, last_id):
+    """Caller commits, in the same transaction as the work up to `last_id`."""
+    now = datetime.now(timezone.utc).isoformat()
+    conn.execute(
+        """
+        INSERT INTO checkpoints(name, last_id, started_at, updated_at) VALUES(?,?,?,?)
+        ON CONFLICT(name) DO UPDATE SET last_id=excluded.last_id, updated_at=excluded.updated_at
+        """,
+        (name, last_id, now, now)
+    )
+
+
+def clear_checkpoint(conn, name):
+    conn.execute("DELETE FROM checkpoints WHERE name=?", (name,))
+    conn.commit()
+
+
+def rebuild_rollups(conn):
+    """Recompute all daily rollups from articles + article_terms (one-off migration / repair)."""
+    for table, _ in ROLLUPS.values():
+        conn.execute(f"DELETE FROM {table}")
+    conn.execute(f"DELETE FROM {CATEGORY_TERMS}")
+    _fill_category_terms(conn)
+    conn.execute("""
+        INSERT INTO daily_category(day, category, n)
+        SELECT substr(fetched_at, 1, 10), COALESCE(NULLIF(category, ''), 'General'), COUNT(*)
+        FROM articles WHERE COALESCE(fetched_at, '') != ''
+        GROUP BY 1, 2
+    """)
+    conn.execute("""
+        INSERT INTO daily_terms(day, term, n)
+        SELECT substr(a.fetched_at, 1, 10), t.term, SUM(t.count)
+        FROM articles a JOIN article_terms t ON t.article_id = a.id
+        WHERE COALESCE(a.fetched_at, '') != ''
+        GROUP BY 1, 2
+    """)
+    conn.execute("""
+        INSERT INTO daily_companies(day, company, n)
+        SELECT substr(a.fetched_at, 1, 10), c.company, COUNT(*)
+        FROM articles a JOIN article_companies c ON c.article_id = a.id
+        WHERE COALESCE(a.fetched_at, '') != ''
+        GROUP BY 1, 2
+    """)
+    conn.commit()
+
+
+def ensure_rollups(conn):
+    # rollup tables are new: fill them once from existing articles
+    empty = conn.execute("SELECT 1 FROM daily_category LIMIT 1").fetchone() is None
+    if empty and conn.execute("SELECT 1 FROM articles LIMIT 1").fetchone() is not None:
+        rebuild_rollups(conn)
+
+
+def week_over_week(conn, kind, now=None, days=7):
+    """
+    ({key: n this week}, {key: n last week}) from a daily rollup ("category",
+    "term" or "company"). This week = the last `days` UTC days including today,
+    last week = the `days` before that. Exact over the whole window.
+    """
+    table, key = ROLLUPS[kind]
+    today = (now or datetime.now(timezone.utc)).date()
+    start_this = (today - timedelta(days=days - 1)).isoformat()
+    start_last = (today - timedelta(days=2 * days - 1)).isoformat()
+    cur = conn.execute(
+        f"""
+        SELECT {key},
+               SUM(CASE WHEN day >= :start_this THEN n ELSE 0 END),
+               SUM(CASE WHEN day <  :start_this THEN n ELSE 0 END)
+        FROM {table}
+        WHERE day >= :start_last AND day <= :today
+        GROUP BY {key}
+        """,
+        {"start_this": start_this, "start_last": start_last, "today": today.isoformat()}
+    )
+    this_week, last_week = Counter(), Counter()
+    for k, tw, lw in cur.fetchall():
+        if tw:
+            this_week[k] = tw
+        if lw:
+            last_week[k] = lw
+    return this_week, last_week
+
+
+def term_counts_by_day(conn, since_day):
+    """(term, category, day, n) from daily_category_terms, days >= `since_day` ('YYYY-MM-DD')."""
+    return conn.execute(
+        f"SELECT term, category, day, n FROM {CATEGORY_TERMS} WHERE day >= ?", (since_day,)
+    ).fetchall()
+
+
+def terms_on_day(conn, day):
+    """{term: n} of one UTC day from the daily_terms rollup."""
+    return dict(conn.execute("SELECT term, n FROM daily_terms WHERE day = ?", (day,)).fetchall())
+
+
+def first_term_day(conn):
+    """Earliest day in daily_terms, None if it's empty."""
+    return conn.execute("SELECT MIN(day) FROM daily_terms").fetchone()[0]
+
+
+def load_term_baselines(conn, terms):
+    """{term: (s1, s2, day)} for the terms that have a baseline."""
+    out = {}
+    for chunk in _chunks(terms):
+        cur = conn.execute(
+            f"SELECT term, s1, s2, day FROM term_baselines WHERE term IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+        for term, s1, s2, day in cur.fetchall():
+            out[term] = (s1, s2, day)
+    return out
+
+
+def save_term_baselines(conn, rows):
+    """rows: [(term, s1, s2, day)], `day` being the last day the term occurred. Caller commits."""
+    conn.executemany(
+        """
+        INSERT INTO term_baselines(term, s1, s2, day) VALUES(?,?,?,?)
+        ON CONFLICT(term) DO UPDATE SET s1=excluded.s1, s2=excluded.s2, day=excluded.day
+        """,
+        rows
+    )
+
+
+def prune_term_baselines(conn, before_day, max_terms):
+    """
+    Drop terms not seen since `before_day`, then the least recently seen (lowest s1
+    among those seen the same day) beyond `max_terms`. Caller commits.
+    Returns the number of rows deleted.
+    """
+    n = conn.execute("DELETE FROM term_baselines WHERE day < ?", (before_day,)).rowcount
+    extra = conn.execute("SELECT COUNT(*) FROM term_baselines").fetchone()[0] - max_terms
+    if extra > 0:
+        n += conn.execute(
+            "DELETE FROM term_baselines WHERE term IN (SELECT term FROM term_baselines ORDER BY day, s1 LIMIT ?)",
+            (extra,)
+        ).rowcount
+    return n
+
+
+def category_counts_by_day(conn, since_day):
+    """(category, day, n) from the daily_category rollup, days >= `since_day`."""
+    return conn.execute("SELECT category, day, n FROM daily_category WHERE day >= ?", (since_day,)).fetchall()
+
+
+REPORT_FIELDS = (
+    "id", "title", "url", "source", "published", "fetched_at", "category", "companies", "summary",
+    "fetched_ts", "published_ts", "story_id"
+)
+
+
+def _where(since=None, until=None, category=None, company=None, after_id=None, before_id=None, alias=None):
+    # shared filters: fetched_ts in [since, until), category = one name or any of a list,
+    # company mentioned (article_companies), id keyset bounds (exclusive).
+    # Returns ([condition, ...], params); columns are qualified with `alias` in a join.
+    col = f"{alias}." if alias else ""
+    clauses, params = [], []
+    if category is not None:
+        cats = [category] if isinstance(category, str) else list(category)
+        clauses.append(f"{col}category IN ({','.join('?' * len(cats))})")
+        params += cats
+    if company is not None:
+        clauses.append(f"{col}id IN (SELECT article_id FROM article_companies WHERE company = ?)")
+        params.append(company)
+    if since is not None:
+        clauses.append(f"{col}fetched_ts >= ?")
+        params.append(utc_ts(since))
+    if until is not None:
+        clauses.append(f"{col}fetched_ts < ?")
+        params.append(utc_ts(until))
+    if after_id is not None:
+        clauses.append(f"{col}id > ?")
+        params.append(after_id)
+    if before_id is not None:
+        clauses.append(f"{col}id < ?")
+        params.append(before_id)
+    return clauses, params
+
+
+def query_articles(conn, since=None, until=None, category=None, limit=None, fields=REPORT_FIELDS,
+                   company=None, after_id=None, before_id=None):
+    """
+    Newest-first article dicts with the time window / category / company filters done in SQL
+    (idx_articles_category_id, idx_articles_fetched_ts, idx_articles_category_fetched_ts).
+    since/until: datetime, ISO string or epoch seconds on fetched_at.
+    Keyset paging on id: before_id walks back from the newest; after_id returns
+    oldest-first so a client can pull what was added since the last id it saw.
+    """
+    clauses, params = _where(since, until, category, company, after_id, before_id)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    order = "ASC" if after_id is not None and before_id is None else "DESC"
+    sql = f"SELECT {','.join(fields)} FROM articles{where} ORDER BY id {order}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [dict(zip(fields, r)) for r in conn.execute(sql, params).fetchall()]
+
+
+def fts_query(text, prefix=False):
+    """
+    User text -> safe FTS5 MATCH string: every word quoted (so operators and stray
+    quotes can't break the syntax) and ANDed. `word*` stays a prefix query;
+    prefix=True also makes the last word one (search-as-you-type).
+    """
+    words = re.findall(r"\w+\*?", text or "")
+    out = []
+    for i, w in enumerate(words):
+        star = w.endswith("*") or (prefix and i == len(words) - 1)
+        out.append('"' + w.rstrip("*") + '"' + ("*" if star else ""))
+    return " ".join(out)
+
+
+# bm25 column weights: title, summary, companies
+SEARCH_WEIGHTS = (10.0, 1.0, 5.0)
+
+
+def search_articles(conn, query, since=None, until=None, category=None, limit=20, prefix=False,
+                    fields=REPORT_FIELDS, company=None):
+    """
+    Full-text search (articles_fts), best bm25 match first, with the same time window /
+    category / company filters as query_articles. Each dict gets "score" (lower = better)
+    and a highlighted "snippet" of the summary.
+    """
+    match = fts_query(query, prefix)
+    if not match:
+        return []
+    clauses, params = _where(since, until, category, company, alias="a")
+    where = " AND ".join(["articles_fts MATCH ?"] + clauses)
+    cols = ",".join(f"a.{f}" for f in fields)
+    cur = conn.execute(
+        f"""
+        SELECT {cols}, bm25(articles_fts, ?, ?, ?) AS score,
+               snippet(articles_fts, 1, '[', ']', '…', 16)
+        FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid
+        WHERE {where}
+        ORDER BY score LIMIT ?
+        """,
+        [*SEARCH_WEIGHTS, match, *params, limit]
+    )
+    out = []
+    for r in cur.fetchall():
+        d = dict(zip(fields, r))
+        d["score"], d["snippet"] = r[-2], r[-1]
+        out.append(d)
+    return out
+
+
+def top_companies(conn, since=None, until=None, limit=20):
+    """[(company, articles mentioning it)] over fetched_at in [since, until), most mentioned first."""
+    clauses, params = [], []
+    if since is not None:
+        clauses.append("ts >= ?")
+        params.append(utc_ts(since))
+    if until is not None:
+        clauses.append("ts < ?")
+        params.append(utc_ts(until))
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    cur = conn.execute(
+        f"""
+        SELECT company, COUNT(*) AS n FROM article_companies{where}
+        GROUP BY company ORDER BY n DESC, company LIMIT ?
+        """,
+        params + [limit]
+    )
+    return cur.fetchall()
+
+
+def count_by_day(conn, since=None, until=None, category=None):
+    """{UTC day 'YYYY-MM-DD': article count} by fetched_at, answered from the index."""
+    clauses, params = _where(since, until, category)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    cur = conn.execute(
+        f"SELECT date(fetched_ts, 'unixepoch'), COUNT(*) FROM articles{where} GROUP BY 1",
+        params
+    )
+    return {day: n for day, n in cur.fetchall() if day}
+
+
+def save_snapshot(conn, name, data):
+    """Store a JSON-able view model under `name` and commit. Returns its ETag (hash of the content)."""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    etag = content_hash(payload)[:20]
+    conn.execute(
+        """
+        INSERT INTO snapshots(name, etag, built_at, data) VALUES(?,?,?,?)
+        ON CONFLICT(name) DO UPDATE SET etag=excluded.etag, built_at=excluded.built_at, data=excluded.data
+        """,
+        (name, etag, datetime.now(timezone.utc).isoformat(), payload)
+    )
+    conn.commit()
+    return etag
+
+
+def snapshot_etag(conn, name):
+    # cheap "did it change?" check, no JSON decoding
+    row = conn.execute("SELECT etag FROM snapshots WHERE name=?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def load_snapshot(conn, name):
+    """(etag, data) of a stored snapshot, or None."""
+    row = conn.execute("SELECT etag, data FROM snapshots WHERE name=?", (name,)).fetchone()
+    return (row[0], json.loads(row[1])) if row else None
+
+
+def save_pipeline_run(conn, report):
+    """Store a run report (processing.metrics.finish_run) and commit. Returns the row id."""
+    cur = conn.execute(
+        """
+        INSERT INTO pipeline_runs(started_at, started_ts, seconds, articles, inserted, llm_calls, report)
+        VALUES(?,?,?,?,?,?,?)
+        """,
+        (
+            report.get("started_at"), utc_ts(report.get("started_at")), report.get("seconds"),
+            report.get("articles"), report.get("inserted"), report.get("llm_calls"),
+            json.dumps(report, ensure_ascii=False)
+        )
+    )
+    conn.commit()
+    return cur.lastrowid
+
+
+def pipeline_runs(conn, limit=30, stages=False):
+    """
+    Latest runs first: headline numbers, plus {stage: seconds} with `stages`
+    (enough to spot which stage got slower without loading whole reports).
+    """
+    cur = conn.execute(
+        f"""
+        SELECT id, started_at, seconds, articles, inserted, llm_calls{", report" if stages else ""}
+        FROM pipeline_runs ORDER BY started_ts DESC, id DESC LIMIT ?
+        """,
+        (limit,)
+    )
+    cols = [d[0] for d in cur.description]
+    out = []
+    for values in cur.fetchall():
+        r = dict(zip(cols, values))
+        if stages:
+            report = json.loads(r.pop("report") or "{}")
+            r["stages"] = {k: v["seconds"] for k, v in report.get("stages", {}).items()}
+        out.append(r)
+    return out
+
+
+NO_TEXT_SUMMARY = "• (No text extracted)"
+
+
+def recent_fingerprints(conn, since):
+    """
+    (id, story id, title_key, simhash) of articles fetched since `since` that have a
+    real summary, to match new ones against.
+    """
+    cur = conn.execute(
+        """
+        SELECT id, COALESCE(story_id, id), title_key, simhash FROM articles
+        WHERE fetched_ts >= ? AND COALESCE(summary, '') NOT IN ('', ?)
+        """,
+        (utc_ts(since), NO_TEXT_SUMMARY)
+    )
+    return cur.fetchall()
+
+
+def story_summary(conn, article_id):
+    """(summary, from_llm) of a stored article; local fallback summaries have no content_hash."""
+    row = conn.execute("SELECT summary, content_hash FROM articles WHERE id=?", (article_id,)).fetchone()
+    return (row[0], row[1] is not None) if row else (None, False)
+
+
+def fallback_summaries(conn, since, limit):
+    """
+    [(article_id, body)] of stories fetched since `since` that still have the local
+    fallback summary (a summary but no content_hash) and a stored body, oldest first.
+    Copies (story_id set) follow their story in replace_summaries.
+    """
+    return conn.execute(
+        """
+        SELECT a.id, i.body FROM articles a JOIN article_inputs i ON i.article_id = a.id
+        WHERE a.content_hash IS NULL AND a.story_id IS NULL AND a.fetched_ts >= ?
+          AND COALESCE(a.summary, '') NOT IN ('', ?)
+        ORDER BY a.id LIMIT ?
+        """,
+        (utc_ts(since), NO_TEXT_SUMMARY, limit)
+    ).fetchall()
+
+
+def replace_summaries(conn, updates, term_counts):
+    """
+    updates = [(article_id, summary, content_hash)] for fallback_summaries rows. Copies that
+    took the story's fallback summary get the new one too (their own text has no hash, so
+    theirs stays NULL). Term counts come from title + summary, so article_terms and the
+    term rollups move along; term_counts(row) as for backfill_article_terms.
+    Caller commits. Returns the number of articles updated.
+    """
+    targets = {}
+    for article_id, summary, text_hash in updates:
+        targets[article_id] = (summary, text_hash)
+        copies = conn.execute(
+            """
+            SELECT c.id FROM articles c JOIN articles a ON a.id = c.story_id
+            WHERE c.story_id = ? AND c.content_hash IS NULL AND c.summary = a.summary
+            """,
+            (article_id,)
+        ).fetchall()
+        targets.update((i, (summary, None)) for (i,) in copies)
+
+    rows = []
+    for chunk in _chunks(targets):
+        rows += conn.execute(
+            f"SELECT id, title, fetched_at, category FROM articles WHERE id IN ({','.join('?' * len(chunk))})",
+            chunk
+        ).fetchall()
+    old_terms = _stored_terms(conn, [article_id for article_id, *_ in rows])
+    deltas = _new_deltas()
+    for article_id, title, f_at, category in rows:
+        terms = term_counts({"title": title or "", "summary": targets[article_id][0]})
+        # same day and category: only the term rollups change
+        _rollup_deltas(deltas, f_at, category, old_terms[article_id], None, -1)
+        _rollup_deltas(deltas, f_at, category, terms, None, 1)
+        save_article_terms(conn, article_id, terms)
+    conn.executemany(
+        "UPDATE articles SET summary=?, content_hash=? WHERE id=?",
+        [(summary, text_hash, article_id) for article_id, (summary, text_hash) in targets.items()]
+    )
+    _apply_rollups(conn, deltas)
+    return len(rows)
+
+
+def set_story_ids(conn, links):
+    """links: [(story_id, article_id)]. Caller commits."""
+    conn.executemany("UPDATE articles SET story_id=? WHERE id=?", links)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+def cached_summary(conn, text_hash):
+    """Summary of any stored article with exactly this (truncated) text, else None."""
+    row = conn.execute(
+        "SELECT summary FROM articles WHERE content_hash=? AND summary IS NOT NULL AND summary != '' LIMIT 1",
+        (text_hash,)
+    ).fetchone()
+    return row[0] if row else None
+
+
 def normalize_title(title: str) -> str:
     t = (title or "").lower().strip()
     # cheap normalization
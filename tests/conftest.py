@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import db  # noqa: E402
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """A migrated, empty database of its own."""
+    c = db.migrate(db.connect(str(tmp_path / "news.db")))
+    yield c
+    c.close()
+
+
+def rollup_tables(conn):
+    """Every daily rollup as {table: sorted rows}, to compare against rebuild_rollups()."""
+    tables = [table for table, _ in db.ROLLUPS.values()] + [db.CATEGORY_TERMS]
+    return {t: sorted(conn.execute(f"SELECT * FROM {t}").fetchall()) for t in tables}
+
+
+def article(n, day="2026-03-02", **kw):
+    """A stored-article row as main.py's persist stage hands it to upsert_articles."""
+    row = {
+        "title": f"Story {n}", "url": f"https://example.com/{n}", "source": "Example Feed",
+        "published": "", "fetched_at": f"{day}T09:00:00+00:00", "category": "General",
+        "companies": "[]", "summary": f"summary {n}",
+    }
+    row.update(kw)
+    return row
@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from corpus import make_articles  # noqa: E402
+from processing.analysis import TEXT_LIMIT, analyze_article  # noqa: E402
+from processing.categorizer import pick_category  # noqa: E402
+from processing.companies import extract_companies  # noqa: E402
+from processing.trends import term_counts  # noqa: E402
+
+
+def test_same_results_as_the_separate_matchers():
+    for r in make_articles(300, seed=7):
+        text = r["text"] * 3  # past TEXT_LIMIT, so the company cut matters
+        info = analyze_article(r["title"], text, ["EV"])
+        assert info["category"] == pick_category(r["title"], text, ["EV"])
+        assert info["companies"] == extract_companies(r["title"], text[:TEXT_LIMIT])
+
+
+def test_companies_only_see_the_first_text_limit_chars():
+    text = "x" * TEXT_LIMIT + " Toyota"
+    assert analyze_article("Plant news", text)["companies"] == []
+    assert analyze_article("Plant news", "Toyota " + text)["companies"] == ["Toyota"]
+
+
+def test_term_counts_see_the_first_text_limit_chars():
+    # "lidar" ends exactly at TEXT_LIMIT, "battery" starts after it
+    r = {"title": "Plant", "summary": " " * (TEXT_LIMIT - len("Plant lidar")) + "lidar battery"}
+    assert term_counts(r) == {"plant": 1, "lidar": 1}
@@ -0,0 +1,43 @@
+import json
+
+from conftest import article
+from processing.trends import term_counts
+from storage.db import query_articles, top_companies, upsert_articles
+
+
+def _store(conn, n, companies, day="2026-03-02"):
+    r = article(n, day=day, companies=json.dumps(companies))
+    with conn:
+        return upsert_articles(conn, [(r, term_counts(r))])[0][0]
+
+
+def _mentions(conn):
+    return conn.execute("SELECT article_id, company, ts FROM article_companies ORDER BY 1, 2").fetchall()
+
+
+def test_one_row_per_company_mentioned(conn):
+    a = _store(conn, 1, ["Tesla", "Panasonic", "Tesla"])
+    ts = conn.execute("SELECT fetched_ts FROM articles WHERE id=?", (a,)).fetchone()[0]
+    assert _mentions(conn) == [(a, "Panasonic", ts), (a, "Tesla", ts)]
+    # stored again with other companies: the old rows go
+    _store(conn, 1, ["BYD"])
+    assert _mentions(conn) == [(a, "BYD", ts)]
+
+
+def test_top_companies_counts_articles_in_the_window(conn):
+    _store(conn, 1, ["Tesla", "BYD"], day="2026-03-01")
+    _store(conn, 2, ["Tesla"], day="2026-03-02")
+    _store(conn, 3, ["BYD", "Ford"], day="2026-03-02")
+    _store(conn, 4, ["Ford"], day="2026-03-03")
+    assert top_companies(conn) == [("BYD", 2), ("Ford", 2), ("Tesla", 2)]  # ties by name
+    window = dict(since="2026-03-02T00:00:00+00:00", until="2026-03-03T00:00:00+00:00")
+    assert top_companies(conn, **window) == [("BYD", 1), ("Ford", 1), ("Tesla", 1)]
+    assert top_companies(conn, since="2026-03-02T00:00:00+00:00", limit=1) == [("Ford", 2)]
+
+
+def test_company_filter(conn):
+    _store(conn, 1, ["Tesla", "BYD"])
+    _store(conn, 2, ["Teslab"])
+    _store(conn, 3, ["BYD"])
+    assert [r["id"] for r in query_articles(conn, company="Tesla", fields=("id",))] == [1]
+    assert [r["id"] for r in query_articles(conn, company="BYD", fields=("id",))] == [3, 1]
@@ -0,0 +1,85 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+from processing.baselines import ALPHA, fold, mean_var, term_surges, update_term_baselines
+from storage.db import load_term_baselines, prune_term_baselines, save_term_baselines
+
+NOW = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+
+def _seed(conn, counts_by_age):
+    # {age in days: {term: n}} straight into the daily_terms rollup
+    with conn:
+        conn.executemany(
+            "INSERT INTO daily_terms(day, term, n) VALUES(?,?,?)",
+            [((NOW.date() - timedelta(days=age)).isoformat(), t, n)
+             for age, counts in counts_by_age.items() for t, n in counts.items()]
+        )
+
+
+def test_steady_term_on_a_young_db_is_not_a_surge(conn):
+    _seed(conn, {age: {"lidar": 2} for age in range(14)})
+    update_term_baselines(conn, now=NOW)
+    assert term_surges(conn, now=NOW) == []  # 7 folded days: too little history
+    conn.execute("DELETE FROM daily_terms")
+    _seed(conn, {age: {"lidar": 2} for age in range(21)})
+    conn.execute("DELETE FROM checkpoints")
+    conn.execute("DELETE FROM term_baselines")
+    update_term_baselines(conn, now=NOW)
+    assert term_surges(conn, now=NOW) == []
+
+
+def test_bias_corrected_mean_and_variance(conn):
+    _seed(conn, {age: {"lidar": 2} for age in range(7, 21)})
+    update_term_baselines(conn, now=NOW)
+    s1, s2, _ = load_term_baselines(conn, ["lidar"])["lidar"]
+    mean, var = mean_var(s1, s2, 14)
+    assert math.isclose(mean, 2.0) and math.isclose(var, 0.0, abs_tol=1e-9)
+
+
+def test_spike_is_scored_against_the_baseline(conn):
+    _seed(conn, {age: {"lidar": 1} for age in range(7, 35)})
+    _seed(conn, {0: {"lidar": 20}})
+    update_term_baselines(conn, now=NOW)
+    [s] = term_surges(conn, now=NOW)
+    assert (s["term"], s["this_week"], s["baseline"]) == ("lidar", 20, 7.0)
+
+
+def test_incremental_folding_equals_one_run(conn, tmp_path):
+    from storage.db import connect, migrate
+
+    days = {age: {"lidar": age % 3, "tariff": 1 + age % 2} for age in range(40)}
+    days = {age: {t: n for t, n in c.items() if n} for age, c in days.items()}
+    _seed(conn, days)
+    update_term_baselines(conn, now=NOW - timedelta(days=5))
+    assert update_term_baselines(conn, now=NOW) == 5
+
+    other = migrate(connect(str(tmp_path / "other.db")))
+    _seed(other, days)
+    update_term_baselines(other, now=NOW)
+    a, b = load_term_baselines(conn, ["lidar", "tariff"]), load_term_baselines(other, ["lidar", "tariff"])
+    assert a.keys() == b.keys()
+    for t in a:
+        assert a[t][2] == b[t][2] and math.isclose(a[t][0], b[t][0]) and math.isclose(a[t][1], b[t][1])
+    other.close()
+
+
+def test_lazy_idle_days_equal_folding_zeros():
+    xs = [3, 0, 0, 1, 0, 0, 0, 5, 2, 0]
+    eager = (0.0, 0.0)
+    for x in xs:
+        eager = fold(*eager, x)
+    lazy, last = (0.0, 0.0), None
+    for i, x in enumerate(xs):
+        if x:
+            lazy = fold(*lazy, x, 0 if last is None else i - last - 1)
+            last = i
+    lazy = tuple(v * (1 - ALPHA) ** (len(xs) - 1 - last) for v in lazy)
+    assert all(math.isclose(e, l) for e, l in zip(eager, lazy))
+
+
+def test_prune_keeps_recently_seen_terms(conn):
+    with conn:
+        save_term_baselines(conn, [("old", 50.0, 2500.0, "2026-01-01"), ("new", 0.1, 0.01, "2026-03-01")])
+        prune_term_baselines(conn, "2025-12-01", 1)
+    assert list(load_term_baselines(conn, ["old", "new"])) == ["new"]
@@ -0,0 +1,46 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import bench_suite  # noqa: E402
+from corpus import fill_db, make_articles  # noqa: E402
+from http_fixture import feed_urls, replay, synth_fixture  # noqa: E402
+from scrapers import rss_collector  # noqa: E402
+
+
+def test_corpus_is_seeded():
+    rows = make_articles(300, seed=7)
+    assert rows == make_articles(300, seed=7)
+    assert rows != make_articles(300, seed=8)
+    assert len(rows) == 300 and [r["id"] for r in rows] == list(range(300, 0, -1))
+    assert [r["fetched_at"] for r in rows] == sorted((r["fetched_at"] for r in rows), reverse=True)
+
+
+def test_fill_db_stores_the_corpus(tmp_path):
+    conn = fill_db(str(tmp_path / "bench.db"), 120)
+    assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 120
+    assert conn.execute("SELECT COUNT(*) FROM article_inputs").fetchone()[0] == 120
+    conn.close()
+
+
+def test_replay_serves_the_fixture():
+    fixture = synth_fixture(2, per_feed=3)
+    urls = feed_urls(fixture)
+    with replay(fixture) as fake:
+        articles = [a for u in urls for a in rss_collector.collect(u)]
+    assert len(urls) == 2 and len(articles) == 6
+    assert fake.requests == 2 + 6  # each feed, then each page
+
+
+def test_every_benchmark_runs(tmp_path):
+    out = str(tmp_path / "bench.json")
+    results = bench_suite.main(["--sizes", "60", "--latency", "0", "--collect-max", "20", "--json", out])
+    assert [r["benchmark"] for r in results] == list(bench_suite.BENCHMARKS)
+    for r in results:
+        assert r["samples"] and r["p50_ms"] <= r["p99_ms"] <= r["max_ms"] and r["peak_kb"] >= 0
+    with open(out, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["results"] == results and saved["seed"] == 42
+    assert set(saved["environment"]) == {"python", "platform", "cpus", "commit", "taken_at"}
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from bench_categorizer import legacy_pick_category, make_corpus, scaled_keywords  # noqa: E402
+import processing.categorizer as categorizer  # noqa: E402
+from processing.categorizer import CATEGORY_KEYWORDS, category_hits, pick_category  # noqa: E402
+
+
+@pytest.mark.parametrize("title, text", [
+    ("Tesla battery deal", ""),                       # OEM vs Battery, one each: Battery is listed first
+    ("EV battery plant", ""),                         # EV, Battery and Manufacturing tie: EV
+    ("Level 2 ADAS and lidar", "over-the-air update"),  # multi-word and hyphenated keywords
+    ("Solid-state cells", "a solid-stateish claim"),  # hyphen inside the keyword, boundary after it
+    ("EVs and e-bikes", "the evs_2026 plan"),         # no whole-word "ev" anywhere
+    ("TIER 1 SUPPLIER", "Tier1 chip shortage"),       # case, and "tier 1" vs "tier1"
+    ("Quarterly results", "nothing to see here"),     # no keyword: fallback
+])
+def test_same_category_as_ordered_scan(title, text):
+    for fallback in (None, ["Startups"]):
+        assert pick_category(title, text, fallback) == legacy_pick_category(title, text, fallback)
+
+
+def test_hits_count_distinct_keywords():
+    hits = category_hits("battery battery cells lithium-ion and level 3, level 3")
+    assert hits == {"Battery": 3, "Autonomy": 1}
+
+
+def test_same_category_on_a_corpus(monkeypatch):
+    # the ordered scan is slow (a regex search per keyword per article): small corpora
+    for keywords, n in ((CATEGORY_KEYWORDS, 100), (scaled_keywords(10), 10)):
+        monkeypatch.setattr(categorizer, "CATEGORY_KEYWORDS", keywords)
+        single, multi = categorizer._build_index(keywords)
+        monkeypatch.setattr(categorizer, "_SINGLE", single)
+        monkeypatch.setattr(categorizer, "_MULTI", multi)
+        for title, text in make_corpus(n, keywords):
+            assert pick_category(title, text) == legacy_pick_category(title, text, keywords=keywords), title
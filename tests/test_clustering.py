@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+from difflib import SequenceMatcher
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+from bench_hot_stories import legacy_groups, make_rows, partition  # noqa: E402
+from processing.clustering import MinHashLSH, cluster_keys  # noqa: E402
+from processing.trends import title_key  # noqa: E402
+
+
+def _signature_under(seed):
+    code = "from processing.clustering import MinHashLSH; print(MinHashLSH().signature('acme buys widget corp for 2bn'))"
+    env = dict(os.environ, PYTHONHASHSEED=str(seed))
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                          check=True).stdout
+
+
+def test_signature_is_stable_across_processes():
+    assert _signature_under(1) == _signature_under(2)
+
+
+def test_similar_keys_share_a_bucket():
+    lsh = MinHashLSH()
+    lsh.add(0, lsh.signature("acme buys widget corp for 2bn"))
+    assert lsh.candidates(lsh.signature("acme buys widget corp for 2 bn")) == {0}
+
+
+def _greedy(keys, threshold):
+    # the rule cluster_keys must reproduce, without the index
+    groups = []
+    for i, key in enumerate(keys):
+        for g in groups:
+            if SequenceMatcher(None, key, keys[g[0]]).ratio() >= threshold:
+                g.append(i)
+                break
+        else:
+            groups.append([i])
+    return groups
+
+
+def test_cluster_keys_matches_pairwise_greedy():
+    keys = [
+        "acme buys widget corp", "acme buys widget corp.", "rates held steady by central bank",
+        "acme to buy widget corp", "central bank holds rates steady", "acme buys widget corp",
+        "storm closes ports in the north", "storm closes ports in north",
+    ]
+    assert cluster_keys(keys, 0.82) == _greedy(keys, 0.82)
+
+
+def test_cluster_keys_stays_close_to_pairwise_on_a_corpus():
+    # LSH only proposes candidates, so a true match can be missed (never a false one):
+    # every member passes ratio() against its rep, and on this fixed corpus at most
+    # n // 200 articles land in another group than with the full pairwise scan (0 today)
+    n, threshold = 600, 0.82
+    keys = [title_key(r["title"]) for r in make_rows(n)]
+    groups = cluster_keys(keys, threshold)
+    for g in groups:
+        for i in g[1:]:
+            assert SequenceMatcher(None, keys[i], keys[g[0]]).ratio() >= threshold
+    ref, new = partition(legacy_groups(keys, threshold, bounds=True)), partition(groups)
+    assert sum(ref[i] != new[i] for i in ref) <= n // 200
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from bench_companies import legacy_extract, legacy_patterns, make_corpus, scaled_aliases  # noqa: E402
+import processing.companies as companies  # noqa: E402
+from processing.companies import COMPANY_ALIASES, extract_companies  # noqa: E402
+
+
+def _use_aliases(monkeypatch, aliases):
+    trie, rank = companies._build_trie(aliases)
+    monkeypatch.setattr(companies, "_TRIE", trie)
+    monkeypatch.setattr(companies, "_RANK", rank)
+    return legacy_patterns(aliases)
+
+
+@pytest.mark.parametrize("title, text, expected", [
+    ("VW and Daimler", "", ["Volkswagen", "Mercedes-Benz"]),              # aliases, reported in file order
+    ("Mercedes-Benz", "and LG Chem", ["Mercedes-Benz", "LG Energy Solution"]),
+    ("Teslas for sale", "in Oxford, a rampage; mg2 spec", []),             # glued to other letters/digits
+    ("Kia's VW-backed rival", "(Ford.)", ["Volkswagen", "Kia", "Ford"]),  # punctuation is a boundary
+    ("General Motors", "and gm; MG Motor or mg", ["General Motors", "SAIC"]),  # overlapping aliases
+    ("lg  es", "lg-es", []),                                               # separators must match exactly
+])
+def test_same_companies_as_regex_matcher(title, text, expected):
+    patterns = legacy_patterns(COMPANY_ALIASES)
+    assert extract_companies(title, text) == expected
+    assert legacy_extract(title, text, patterns) == expected
+
+
+def test_overlapping_names_of_different_companies(monkeypatch):
+    patterns = _use_aliases(monkeypatch, {
+        "General Motors": ["general motors"], "Motors Co": ["motors"], "General": ["general"],
+        "Lucid": ["lucid motors"],
+    })
+    for text in ("general motors", "lucid motors", "general lucid motors"):
+        assert extract_companies("", text) == legacy_extract("", text, patterns)
+    assert extract_companies("", "general lucid motors") == ["Motors Co", "General", "Lucid"]
+
+
+def test_cap_applies_before_exclusions(monkeypatch):
+    # Reuters is excluded after the first 8 are taken, so only 7 are left and the 9th never shows
+    aliases = {"Reuters": ["reuters"], **{f"Maker {i}": [f"maker{i}"] for i in range(1, 9)}}
+    patterns = _use_aliases(monkeypatch, aliases)
+    text = "reuters " + " ".join(f"maker{i}" for i in range(1, 9))
+    assert extract_companies("", text) == [f"Maker {i}" for i in range(1, 8)]
+    assert legacy_extract("", text, patterns) == [f"Maker {i}" for i in range(1, 8)]
+
+
+def test_same_companies_on_a_corpus(monkeypatch):
+    for aliases, n in ((COMPANY_ALIASES, 100), (scaled_aliases(500), 30)):
+        patterns = _use_aliases(monkeypatch, aliases)
+        for title, text in make_corpus(n, aliases):
+            assert extract_companies(title, text) == legacy_extract(title, text, patterns), text
@@ -0,0 +1,84 @@
+import os
+
+from conftest import article
+from processing.trends import term_counts
+from storage import db
+
+
+def test_import_leaves_the_db_alone_until_the_first_request(tmp_path, monkeypatch):
+    path = str(tmp_path / "news.db")
+    monkeypatch.setattr(db, "DB_PATH", path)
+    from dashboard import app as dashboard_app
+
+    monkeypatch.setattr(dashboard_app, "DB_PATH", path)
+    monkeypatch.setattr(dashboard_app, "_migrated", type(dashboard_app._migrated)())
+    assert not os.path.exists(path)
+
+    client = dashboard_app.create_app().test_client()
+    assert client.get("/api/articles").status_code == 200
+    conn = db.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(db.MIGRATIONS)
+    r = article(1, summary="battery tariff")
+    with conn:
+        db.upsert_articles(conn, [(r, term_counts(r))])
+    conn.close()
+    assert client.get("/").status_code == 200
+
+
+def _dashboard(tmp_path, monkeypatch, ttl):
+    path = str(tmp_path / "news.db")
+    monkeypatch.setattr(db, "DB_PATH", path)
+    from dashboard import app as dashboard_app
+
+    monkeypatch.setattr(dashboard_app, "DB_PATH", path)
+    monkeypatch.setattr(dashboard_app, "DASHBOARD_CACHE_TTL", ttl)
+    monkeypatch.setattr(dashboard_app, "_page", {"etag": None, "html": None, "checked": 0.0})
+    return dashboard_app.create_app().test_client(), db.migrate(db.connect(path))
+
+
+def _store(conn, n):
+    r = article(n, summary=f"battery tariff {n}")
+    with conn:
+        db.upsert_articles(conn, [(r, term_counts(r))])
+
+
+def test_snapshot_etag_follows_the_content(conn):
+    first = db.save_snapshot(conn, "dashboard", {"hot": [], "n": 1})
+    assert db.save_snapshot(conn, "dashboard", {"n": 1, "hot": []}) == first
+    assert db.snapshot_etag(conn, "dashboard") == first
+    second = db.save_snapshot(conn, "dashboard", {"hot": [], "n": 2})
+    assert second != first
+    assert db.load_snapshot(conn, "dashboard") == (second, {"hot": [], "n": 2})
+    assert db.snapshot_etag(conn, "other") is None
+
+
+def test_page_is_served_with_its_etag(tmp_path, monkeypatch):
+    from dashboard.snapshot import refresh_snapshot
+
+    client, conn = _dashboard(tmp_path, monkeypatch, ttl=0)
+    _store(conn, 1)
+    etag = refresh_snapshot(conn)
+    r = client.get("/")
+    assert r.status_code == 200 and r.headers["ETag"] == f'"{etag}"'
+    assert client.get("/", headers={"If-None-Match": f'"{etag}"'}).status_code == 304
+
+    # TTL 0: the next request sees the new snapshot
+    _store(conn, 2)
+    new = refresh_snapshot(conn)
+    assert new != etag
+    assert client.get("/", headers={"If-None-Match": f'"{etag}"'}).headers["ETag"] == f'"{new}"'
+    conn.close()
+
+
+def test_page_is_cached_for_the_ttl(tmp_path, monkeypatch):
+    from dashboard.snapshot import refresh_snapshot
+
+    client, conn = _dashboard(tmp_path, monkeypatch, ttl=3600)
+    _store(conn, 1)
+    etag = refresh_snapshot(conn)
+    assert client.get("/").headers["ETag"] == f'"{etag}"'
+    _store(conn, 2)
+    refresh_snapshot(conn)
+    # within the TTL the DB isn't asked again: still the page that was rendered
+    assert client.get("/").headers["ETag"] == f'"{etag}"'
+    conn.close()
@@ -0,0 +1,63 @@
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import article
+from processing.dates import row_ts, utc_ts
+from processing.trends import term_counts
+from scrapers.rss_collector import _published_ts
+from storage.db import upsert_articles
+
+TS = 1772442000  # 2026-03-02 09:00:00 UTC
+
+
+@pytest.mark.parametrize("value", [
+    "2026-03-02T09:00:00+00:00",
+    "2026-03-02T09:00:00Z",
+    "2026-03-02T10:00:00+01:00",
+    "2026-03-02T09:00:00",               # naive: UTC
+    " Mon, 02 Mar 2026 09:00:00 GMT ",
+    "Mon, 02 Mar 2026 04:00:00 EST",
+    "Mon, 02 Mar 2026 09:00:00 +0000",
+    "02 Mar 2026 09:00:00",
+    "2026-03-02 09:00:00",
+    datetime(2026, 3, 2, 9, 0),
+    datetime(2026, 3, 2, 4, 0, tzinfo=timezone(timedelta(hours=-5))),
+    TS,
+    float(TS),
+])
+def test_every_format_gives_the_same_epoch(value):
+    assert utc_ts(value) == TS
+
+
+@pytest.mark.parametrize("value", [None, "", "   ", "yesterday", "2026-13-45"])
+def test_unparseable_is_none(value):
+    assert utc_ts(value) is None
+
+
+def test_day_only_formats():
+    assert utc_ts("2026/03/02") == utc_ts("2026-03-02") == TS - 9 * 3600
+
+
+def test_row_ts_prefers_fetched_then_published():
+    assert row_ts({"fetched_ts": TS, "fetched_at": "2020-01-01", "published": "2021-01-01"}) == TS
+    assert row_ts({"fetched_at": "2026-03-02T09:00:00Z", "published_ts": 1}) == TS
+    assert row_ts({"fetched_at": "", "published_ts": TS}) == TS
+    assert row_ts({"published": "Mon, 02 Mar 2026 09:00:00 GMT"}) == TS
+    assert row_ts({}) is None
+
+
+def test_stored_rows_get_epoch_columns(conn):
+    r = article(1, published="Mon, 02 Mar 2026 08:00:00 GMT")
+    with conn:
+        upsert_articles(conn, [(r, term_counts(r))])
+    assert conn.execute("SELECT fetched_ts, published_ts FROM articles").fetchone() == (TS, TS - 3600)
+
+
+def test_feed_entries_use_the_parsed_date_first():
+    parsed = time.gmtime(TS)
+    assert _published_ts(SimpleNamespace(published="garbage", published_parsed=parsed)) == TS
+    assert _published_ts(SimpleNamespace(updated="2026-03-02T09:00:00Z")) == TS
+    assert _published_ts(SimpleNamespace()) is None
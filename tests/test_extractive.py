@@ -0,0 +1,16 @@
+from processing.extractive import split_sentences, summarize_local
+
+
+def test_short_text_is_kept_whole():
+    assert split_sentences("Tesla cuts prices.") == ["Tesla cuts prices."]
+    assert summarize_local("Tesla cuts prices. Again.") == "• Tesla cuts prices. Again."
+
+
+def test_empty_text_has_no_summary():
+    assert split_sentences("  \n ") == []
+    assert summarize_local("") == "• (No text extracted)"
+
+
+def test_short_fragments_dropped_next_to_real_sentences():
+    text = "Ford recalls 10,000 trucks over brake faults. Shares fell. The fix is a software update."
+    assert split_sentences(text) == ["Ford recalls 10,000 trucks over brake faults.", "The fix is a software update."]
@@ -0,0 +1,55 @@
+import zlib
+from datetime import datetime, timezone
+
+import main
+from conftest import article, rollup_tables
+from processing.trends import term_counts
+from storage.db import content_hash, rebuild_rollups, set_story_ids, upsert_articles
+
+BODY = "Solid-state cells from the pilot line passed the abuse tests."
+
+
+def _store(conn):
+    story = article(1, summary="• local extract", body=zlib.compress(BODY.encode("utf-8")))
+    copy = article(2, summary="• local extract")
+    with conn:
+        (a, _), (b, _) = upsert_articles(conn, [(story, term_counts(story)), (copy, term_counts(copy))])
+        conn.execute("UPDATE articles SET fetched_ts=? WHERE id IN (?, ?)",
+                     (int(datetime.now(timezone.utc).timestamp()), a, b))
+        set_story_ids(conn, [(a, b)])
+    return a, b
+
+
+def _summary(conn, article_id):
+    return conn.execute("SELECT summary, content_hash FROM articles WHERE id=?", (article_id,)).fetchone()
+
+
+def test_llm_summary_replaces_the_fallback(conn, monkeypatch):
+    monkeypatch.setattr(main, "SUMMARY_BACKEND", "openai")
+    monkeypatch.setattr(main, "summarize_batch", lambda texts: [("• pilot line passed tests", True) for _ in texts])
+    a, b = _store(conn)
+    assert main.retry_fallback_summaries(conn, since=0) == 1
+    assert _summary(conn, a) == ("• pilot line passed tests", content_hash(BODY))
+    assert _summary(conn, b) == ("• pilot line passed tests", None)
+    assert main.retry_fallback_summaries(conn, since=0) == 0  # done, not retried again
+    moved = rollup_tables(conn)
+    rebuild_rollups(conn)
+    assert moved == rollup_tables(conn)
+
+
+def test_another_fallback_is_not_stored(conn, monkeypatch):
+    monkeypatch.setattr(main, "SUMMARY_BACKEND", "openai")
+    monkeypatch.setattr(main, "summarize_batch", lambda texts: [("• other extract", False) for _ in texts])
+    a, _ = _store(conn)
+    assert main.retry_fallback_summaries(conn, since=0) == 0
+    assert _summary(conn, a) == ("• local extract", None)
+
+
+def test_story_summary_tells_fallbacks_apart(conn):
+    from storage.db import story_summary
+
+    a, _ = _store(conn)
+    assert story_summary(conn, a) == ("• local extract", False)
+    conn.execute("UPDATE articles SET summary='• from the llm', content_hash='abc' WHERE id=?", (a,))
+    assert story_summary(conn, a) == ("• from the llm", True)
+    assert story_summary(conn, 999) == (None, False)
@@ -0,0 +1,37 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+import main
+from processing import metrics
+from storage import db
+
+
+def test_run_report_is_named_after_the_run_start(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "news.db"))
+    db.init_db().close()
+    monkeypatch.setattr(main, "PIPELINE_REPORT_DIR", str(tmp_path / "runs"))
+    run = metrics.start_run()
+    run.started_at = datetime(2026, 3, 2, 9, 0, 5, tzinfo=timezone.utc)
+    main._save_run_report({"articles": 3})
+    with open(tmp_path / "runs" / "20260302T090005Z.json", encoding="utf-8") as f:
+        assert json.load(f)["articles"] == 3
+    assert db.pipeline_runs(db.connect())[0]["articles"] == 3
+
+
+def test_nested_and_threaded_profiles(tmp_path):
+    metrics.start_run(profile=True)
+
+    def work():
+        with metrics.profiled():
+            sum(range(10000))
+
+    with metrics.profiled():
+        t = threading.Thread(target=work)
+        t.start()
+        t.join()
+        work()
+    path = str(tmp_path / "run.prof")
+    report = metrics.finish_run(profile_path=path)
+    assert report["profile"] and os.path.exists(path)
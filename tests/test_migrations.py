@@ -0,0 +1,49 @@
+from conftest import article
+from storage import db
+from storage.db import MIGRATIONS, _where, query_articles, upsert_articles
+
+
+def _version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_empty_db_reaches_latest_and_rerun_is_a_noop(conn):
+    assert _version(conn) == len(MIGRATIONS)
+    tables = conn.execute("SELECT name FROM sqlite_master ORDER BY name").fetchall()
+    db.migrate(conn)
+    assert _version(conn) == len(MIGRATIONS)
+    assert conn.execute("SELECT name FROM sqlite_master ORDER BY name").fetchall() == tables
+
+
+def test_unversioned_db_is_upgraded(tmp_path):
+    conn = db.connect(str(tmp_path / "news.db"))
+    # a DB from before versioned migrations (user_version 0), with an article in it
+    with conn:
+        conn.execute("""
+            CREATE TABLE articles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, url TEXT UNIQUE, source TEXT,
+                published TEXT, fetched_at TEXT, category TEXT, companies TEXT, summary TEXT, title_key TEXT
+            )
+        """)
+        conn.execute(
+            "INSERT INTO articles (title, url, category, fetched_at) VALUES (?, ?, ?, ?)",
+            ("Story 1", "https://example.com/1", "EV", "2026-03-02T09:00:00+00:00"),
+        )
+    db.migrate(conn)
+    assert _version(conn) == len(MIGRATIONS)
+    rows = query_articles(conn, since="2026-03-02T00:00:00+00:00", category="EV", fields=("title",))
+    assert [r["title"] for r in rows] == ["Story 1"]
+    conn.close()
+
+
+def test_category_paging_walks_the_index(conn):
+    with conn:
+        upsert_articles(conn, [(article(n, category="EV" if n % 2 else "Policy"), {}) for n in range(1, 9)])
+    rows = query_articles(conn, category="EV", before_id=7, limit=2, fields=("id",))
+    assert [r["id"] for r in rows] == [5, 3]
+
+    clauses, params = _where(category="EV", before_id=7)
+    sql = f"SELECT id FROM articles WHERE {' AND '.join(clauses)} ORDER BY id DESC"
+    plan = " ".join(r[3] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+    assert "idx_articles_category_id" in plan
+    assert "TEMP B-TREE" not in plan
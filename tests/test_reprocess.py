@@ -0,0 +1,79 @@
+import json
+import zlib
+
+import reprocess
+from conftest import article, rollup_tables
+from processing.analysis import analyze_article
+from processing.dates import utc_ts
+from storage.db import prune_article_inputs, rebuild_rollups, upsert_articles
+
+FEED = "https://electrek.co/feed/"  # configured with categories EV, Battery, Policy
+TITLE = "Tesla opens new gigafactory"
+BODY = "Tesla and Panasonic said the battery cells will be made in Nevada."
+
+
+def _store(conn, n, category, companies, body=BODY, feed_url=FEED, day="2026-03-02"):
+    row = article(n, day=day, title=TITLE, category=category, companies=json.dumps(companies), feed_url=feed_url)
+    if body is not None:
+        row["body"] = zlib.compress(body.encode("utf-8"))
+    with conn:
+        return upsert_articles(conn, [(row, {"tesla": 1, "gigafactory": 1})])[0][0]
+
+
+def _stored(conn, article_id):
+    return conn.execute("SELECT category, companies FROM articles WHERE id=?", (article_id,)).fetchone()
+
+
+def test_unchanged_rules_change_nothing(conn):
+    info = analyze_article(TITLE, BODY, ["EV", "Battery", "Policy"])
+    _store(conn, 1, info["category"], info["companies"])
+    assert reprocess.reprocess(conn, workers=1) == (1, 0)
+
+
+def test_dry_run_reports_without_writing(conn, capsys):
+    article_id = _store(conn, 1, "General", [])
+    before = rollup_tables(conn)
+    assert reprocess.reprocess(conn, workers=1, dry_run=True) == (1, 1)
+    assert "would change" in capsys.readouterr().out
+    assert _stored(conn, article_id) == ("General", "[]")
+    assert rollup_tables(conn) == before
+
+
+def test_reprocess_moves_rollups_with_the_article(conn):
+    article_id = _store(conn, 1, "General", [])
+    assert reprocess.reprocess(conn, workers=1) == (1, 1)
+    category, companies = _stored(conn, article_id)
+    assert category == "Battery" and json.loads(companies) == ["Tesla", "Panasonic"]
+    moved = rollup_tables(conn)
+    rebuild_rollups(conn)
+    assert moved == rollup_tables(conn)
+
+
+def test_fallback_comes_from_the_feed_url(conn):
+    # no keyword hits: the configured categories of the article's feed apply, whatever `source` says
+    article_id = _store(conn, 1, "General", [], body="Nothing else was said.")
+    conn.execute("UPDATE articles SET title='Quarterly note' WHERE id=?", (article_id,))
+    reprocess.reprocess(conn, workers=1)
+    assert _stored(conn, article_id)[0] == "EV"
+
+
+def test_articles_without_a_stored_body_are_left_alone(conn):
+    article_id = _store(conn, 1, "General", [], body=None)
+    assert reprocess.reprocess(conn, workers=1) == (0, 0)
+    assert _stored(conn, article_id) == ("General", "[]")
+
+
+def test_pruned_inputs_leave_old_articles_alone(conn):
+    old = _store(conn, 1, "General", [], day="2026-01-02")
+    recent = _store(conn, 2, "General", [], day="2026-03-02")
+    with conn:
+        assert prune_article_inputs(conn, utc_ts("2026-03-01T00:00:00+00:00")) == 1
+    assert reprocess.reprocess(conn, workers=1) == (1, 1)
+    assert _stored(conn, old) == ("General", "[]")
+    assert _stored(conn, recent)[0] == "Battery"
+
+
+def test_pool_gives_the_same_result(conn):
+    ids = [_store(conn, n, "General", []) for n in range(30)]
+    assert reprocess.reprocess(conn, workers=2, chunk=4, batch=8) == (30, 30)
+    assert {_stored(conn, i)[0] for i in ids} == {"Battery"}
@@ -0,0 +1,54 @@
+import json
+
+from conftest import article, rollup_tables
+from processing.trends import term_counts
+from storage.db import backfill_article_terms, rebuild_rollups, update_analysis, upsert_articles
+
+
+def _consistent(conn):
+    kept = rollup_tables(conn)
+    rebuild_rollups(conn)
+    return kept == rollup_tables(conn)
+
+
+def test_upserts_keep_rollups_in_step(conn):
+    rows = [article(n, day=f"2026-03-0{1 + n % 3}", category=["EV", "Policy"][n % 2],
+                    companies=json.dumps(["Tesla"] if n % 2 else []), summary=f"battery tariff {n}")
+            for n in range(10)]
+    with conn:
+        upsert_articles(conn, [(r, term_counts(r)) for r in rows])
+    # the same urls again: moved to another day/category, other terms and companies
+    moved = [dict(r, fetched_at="2026-03-04T08:00:00+00:00", category="Battery", companies='["Rivian"]',
+                  summary="recall notice") for r in rows[:4]]
+    with conn:
+        upsert_articles(conn, [(r, term_counts(r)) for r in moved])
+    assert _consistent(conn)
+
+
+def test_update_analysis_moves_rollups(conn):
+    r = article(1, category="EV", summary="solid-state battery")
+    with conn:
+        [(article_id, _)] = upsert_articles(conn, [(r, term_counts(r))])
+        assert update_analysis(conn, [(article_id, "Battery", '["Toyota"]')]) == 1
+    assert _consistent(conn)
+
+
+def test_backfill_runs_once_and_feeds_the_rollups(conn):
+    conn.execute("INSERT INTO articles(title, url, fetched_at, category, summary) VALUES(?,?,?,?,?)",
+                 ("Tariff on battery cells", "https://example.com/old", "2026-03-01T09:00:00+00:00", "Policy",
+                  "new tariff"))
+    # nothing to count: must not be looked at again on the next run
+    conn.execute("INSERT INTO articles(title, url, fetched_at) VALUES('', 'https://example.com/empty', "
+                 "'2026-03-01T10:00:00+00:00')")
+    conn.commit()
+    rebuild_rollups(conn)
+    calls = []
+
+    def counting(row):
+        calls.append(row)
+        return term_counts(row)
+
+    assert backfill_article_terms(conn, counting, batch=1) == 2
+    assert _consistent(conn)
+    assert backfill_article_terms(conn, counting) == 0
+    assert len(calls) == 2
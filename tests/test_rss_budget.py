@@ -0,0 +1,30 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from http_fixture import feed_urls, replay, synth_fixture  # noqa: E402
+from scrapers import rss_collector  # noqa: E402
+
+
+def test_budget_includes_the_consumers_time():
+    # one feed, 6 articles on one host, one request at a time, 0.2s each
+    fixture = synth_fixture(n_feeds=1, per_feed=6)
+    started = time.monotonic()
+    items = []
+    with replay(fixture, latency=0.2) as fake:
+        for item in rss_collector.stream_many(feed_urls(fixture), per_host=1, budget=0.5):
+            items.append(item)
+            if len(items) == 1:
+                time.sleep(1.0)  # a slow downstream stage
+    assert len(items) == 6  # every entry comes out, headline-only if need be
+    assert fake.requests <= 3  # nothing new was started once the budget was up
+    assert time.monotonic() - started < 2.0
+
+
+def test_everything_downloaded_within_the_budget():
+    fixture = synth_fixture(n_feeds=2, per_feed=3)
+    with replay(fixture):
+        items = list(rss_collector.stream_many(feed_urls(fixture), budget=30))
+    assert len(items) == 6 and all(len(a["text"]) > 100 for _, _, a in items)
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+from scrapers import rss_collector
+
+
+def _rss(feed_url, n):
+    host = urlparse(feed_url).netloc
+    items = "".join(
+        f"<item><title>Story {i}</title><link>https://news.example/{host}/{i}</link>"
+        f"<description>Summary {i}</description><pubDate>Mon, 02 Mar 2026 09:00:00 GMT</pubDate></item>"
+        for i in range(n)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{host}</title>{items}</channel></rss>'
+
+
+class _Web:
+    """Fake requests.get (feeds) and _download (article pages) with per-host concurrency peaks."""
+
+    def __init__(self, feeds, latency=0.0, broken=()):
+        self.feeds = feeds  # feed url -> number of entries
+        self.latency = latency
+        self.broken = set(broken)
+        self.active, self.peak, self.calls = Counter(), Counter(), Counter()
+        self._lock = threading.Lock()
+
+    def _enter(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            self.calls[url] += 1
+            self.active[host] += 1
+            self.peak[host] = max(self.peak[host], self.active[host])
+        time.sleep(self.latency)
+        with self._lock:
+            self.active[host] -= 1
+
+    def get(self, url, timeout=None, headers=None):
+        self._enter(url)
+        r = requests.Response()
+        etag = f'"{self.feeds.get(url)}"'  # changes with the number of entries
+        if url not in self.feeds:
+            r.status_code = 404
+        elif (headers or {}).get("If-None-Match") == etag:
+            r.status_code = 304
+        else:
+            r.status_code = 200
+            r.headers["ETag"] = etag
+            r._content = _rss(url, self.feeds[url]).encode("utf-8")
+        return r
+
+    def download(self, url, timeout=None):
+        self._enter(url)
+        if url in self.broken:
+            raise IOError("connection reset")
+        return SimpleNamespace(title="", text=f"Full text of {url}")
+
+
+@pytest.fixture
+def web(monkeypatch):
+    def install(*args, **kw):
+        fake = _Web(*args, **kw)
+        monkeypatch.setattr(rss_collector.requests, "get", fake.get)
+        monkeypatch.setattr(rss_collector, "_download", fake.download)
+        return fake
+    return install
+
+
+def test_all_articles_of_all_feeds(web):
+    feeds = {"https://a.example/rss": 3, "https://b.example/rss": 2}
+    broken = "https://news.example/a.example/1"
+    web(feeds, broken=[broken])
+    items = list(rss_collector.stream_many(list(feeds), budget=30))
+    by_feed = {u: sorted(i for f, i, _ in items if f == u) for u in feeds}
+    assert by_feed == {"https://a.example/rss": [0, 1, 2], "https://b.example/rss": [0, 1]}
+    texts = {a["url"]: a["text"] for _, _, a in items}
+    assert texts[broken] == "Summary 1"  # failed download: headline + feed summary
+    assert texts["https://news.example/b.example/0"] == "Full text of https://news.example/b.example/0"
+
+
+def test_per_host_limit(web):
+    feeds = {f"https://feed{i}.example/rss": 4 for i in range(3)}
+    fake = web(feeds, latency=0.05)
+    items = list(rss_collector.stream_many(list(feeds), max_workers=8, per_host=2, budget=30))
+    assert len(items) == 12
+    assert fake.peak["news.example"] == 2  # 12 pages on one host, never more than 2 at once
+
+
+def test_failed_feed_does_not_stop_the_others(web):
+    web({"https://a.example/rss": 2})
+    items = list(rss_collector.stream_many(["https://a.example/rss", "https://gone.example/rss"], budget=30))
+    assert [(f, i) for f, i, _ in sorted(items, key=lambda x: x[1])] == [
+        ("https://a.example/rss", 0), ("https://a.example/rss", 1)
+    ]
+
+
+def test_unchanged_feed_is_not_parsed_again(web):
+    feeds = {"https://a.example/rss": 2}
+    fake = web(feeds)
+    states = {"https://a.example/rss": {}}
+    assert len(list(rss_collector.stream_many(list(feeds), states=states, budget=30))) == 2
+    assert states["https://a.example/rss"]["etag"] == '"2"'
+    # 304 Not Modified: nothing to download
+    assert list(rss_collector.stream_many(list(feeds), states=states, budget=30)) == []
+    assert fake.calls["https://news.example/a.example/0"] == 1
+
+    # a new entry: new ETag, the feed is read again. Nothing was stored (no `known`),
+    # so the two earlier entries are downloaded again too
+    feeds["https://a.example/rss"] = 3
+    assert len(list(rss_collector.stream_many(list(feeds), states=states, budget=30))) == 3
+
+
+def test_stored_and_old_entries_are_not_downloaded(web):
+    feeds = {"https://a.example/rss": 3}
+    fake = web(feeds)
+    stored = {"https://news.example/a.example/1"}
+    items = list(rss_collector.stream_many(list(feeds), known=lambda urls: stored & set(urls), budget=30))
+    assert sorted(a["url"] for _, _, a in items) == ["https://news.example/a.example/0", "https://news.example/a.example/2"]
+    assert "https://news.example/a.example/1" not in fake.calls
+
+    # every entry is from 2026-03-02 09:00 UTC
+    assert list(rss_collector.stream_many(list(feeds), since=1772442001, budget=30)) == []
+    assert len(list(rss_collector.stream_many(list(feeds), since=1772442000, budget=30))) == 3
+
+
+def test_collect_one_feed(web):
+    feeds = {"https://a.example/rss": 2}
+    web(feeds)
+    state = {}
+    articles = rss_collector.collect("https://a.example/rss", state=state, known=lambda urls: set())
+    assert [a["title"] for a in articles] == ["Story 0", "Story 1"]
+    assert rss_collector.collect("https://a.example/rss", state=state) == []
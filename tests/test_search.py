@@ -0,0 +1,34 @@
+from conftest import article
+from storage.db import _where, fts_query, search_articles, upsert_articles
+
+
+def _fill(conn):
+    with conn:
+        upsert_articles(conn, [
+            (article(1, title="Battery plant opens", companies='["Tesla"]'), {}),
+            # names Tesla in the text, but the company wasn't detected: not a Tesla article
+            (article(2, title="Battery plant opens near Tesla site"), {}),
+            (article(3, title="Battery recycling", companies='["Redwood"]'), {}),
+        ])
+
+
+def test_company_filter_uses_article_companies(conn):
+    _fill(conn)
+    rows = search_articles(conn, "battery", company="Tesla", fields=("id",))
+    assert [r["id"] for r in rows] == [1]
+
+
+def test_prefix_applies_to_the_query_only(conn):
+    _fill(conn)
+    assert fts_query("batt", prefix=True) == '"batt"*'
+    rows = search_articles(conn, "batt", company="Redwood", prefix=True, fields=("id",))
+    assert [r["id"] for r in rows] == [3]
+
+
+def test_filters_are_qualified_in_the_join(conn):
+    _fill(conn)
+    clauses, _ = _where(since=0, until=2 ** 40, category=["General"], company="Tesla", after_id=0, alias="a")
+    assert all(c.startswith("a.") for c in clauses)
+    rows = search_articles(conn, "battery", since="2026-03-02T00:00:00+00:00", until="2026-03-03T00:00:00+00:00",
+                           category="General", company="Tesla", fields=("id",))
+    assert [r["id"] for r in rows] == [1]
@@ -0,0 +1,127 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from processing import summarizer as summ
+from processing.extractive import summarize_local
+from processing.summarizer import (
+    RateLimiter, StubClient, is_retryable, summarize_batch, summarize_with_retry, summarizer
+)
+
+TEXT = "Tesla cut prices in Europe again. Demand for the Model Y fell in March. Rivals followed."
+
+
+class _HTTPError(Exception):
+    # the parts of openai's APIStatusError the retry logic looks at
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=status, headers=headers)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_retryable_errors():
+    assert is_retryable(_HTTPError(429))
+    assert is_retryable(_HTTPError(503))
+    assert is_retryable(ConnectionResetError())
+    assert not is_retryable(_HTTPError(400))
+    assert not is_retryable(TimeoutError())  # slow API: local fallback, not another wait
+
+
+def test_429_backs_off_exponentially(monkeypatch):
+    monkeypatch.setattr(summ.random, "random", lambda: 0.5)  # jitter factor 1
+    stub = StubClient(fail=lambda n: _HTTPError(429) if n <= 2 else None)
+    slept = []
+    out = summarize_with_retry(TEXT, llm=stub, sleep=slept.append)
+    assert out.startswith("• Tesla cut prices in Europe again")
+    assert stub.calls == 3
+    assert slept == [1.0, 2.0]
+
+
+def test_retry_after_header_wins():
+    stub = StubClient(fail=lambda n: _HTTPError(429, retry_after=7) if n == 1 else None)
+    slept = []
+    summarize_with_retry(TEXT, llm=stub, sleep=slept.append)
+    assert slept == [7.0]
+
+
+def test_other_errors_are_not_retried():
+    stub = StubClient(fail=lambda n: _HTTPError(400))
+    with pytest.raises(_HTTPError):
+        summarize_with_retry(TEXT, llm=stub, sleep=lambda s: None)
+    assert stub.calls == 1
+
+
+def test_deadline_stops_retries():
+    stub = StubClient()
+    with pytest.raises(TimeoutError):
+        summarize_with_retry(TEXT, llm=stub, deadline=time.monotonic() - 1)
+    assert stub.calls == 0
+
+    # the backoff never sleeps past the deadline
+    stub = StubClient(fail=lambda n: _HTTPError(429, retry_after=60))
+    slept = []
+    with pytest.raises(_HTTPError):
+        summarize_with_retry(TEXT, llm=stub, max_retries=1, deadline=time.monotonic() + 0.5, sleep=slept.append)
+    assert len(slept) == 1 and slept[0] <= 0.5
+
+
+def test_rate_limiter_waits_for_requests_and_tokens():
+    clock = _Clock()
+    limiter = RateLimiter(rpm=2, tpm=1000, clock=clock, sleep=clock.sleep)
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.slept == []
+    limiter.acquire()
+    assert clock.now == pytest.approx(30.0)
+
+    clock = _Clock()
+    limiter = RateLimiter(rpm=600, tpm=600, clock=clock, sleep=clock.sleep)
+    limiter.acquire(600)
+    limiter.acquire(300)
+    assert clock.now == pytest.approx(30.0)
+
+
+def test_summarizer_after_budget_is_local():
+    stub = StubClient()
+    one = summarizer(llm=stub, budget=0)
+    assert one(TEXT) == (summarize_local(TEXT), False)
+    assert stub.calls == 0
+
+
+def test_batch_falls_back_per_text():
+    texts = [TEXT, "Ford recalls trucks over brakes. The fix is a software update.", TEXT]
+    stub = StubClient(fail=lambda n: ValueError("bad request") if n == 2 else None)
+    out = summarize_batch(texts, llm=stub, max_workers=1)
+    assert [from_llm for _, from_llm in out] == [True, False, True]
+    assert out[1][0] == summarize_local(texts[1])
+
+
+def test_batch_budget_bounds_the_wait():
+    stub = StubClient(latency=0.5)
+    started = time.monotonic()
+    out = summarize_batch([TEXT, TEXT], llm=stub, budget=0.05)
+    assert time.monotonic() - started < 0.5
+    assert out == [(summarize_local(TEXT), False)] * 2
+
+
+def test_batch_without_a_client_is_local(monkeypatch):
+    def no_client():
+        raise RuntimeError("Missing OPENAI_API_KEY in environment")
+
+    monkeypatch.setattr(summ, "get_client", no_client)
+    assert summarize_batch([TEXT]) == [(summarize_local(TEXT), False)]
@@ -0,0 +1,31 @@
+from conftest import article
+from processing.trends import term_counts
+from storage.db import cached_summary, content_hash, upsert_articles
+
+TEXT = "Panasonic will make the battery cells in Nevada."
+
+
+def _store(conn, n, **kw):
+    r = article(n, **kw)
+    with conn:
+        upsert_articles(conn, [(r, term_counts(r))])
+
+
+def test_same_text_reuses_the_summary(conn):
+    _store(conn, 1, summary="• cells made in Nevada", content_hash=content_hash(TEXT))
+    # another URL with exactly the same text: no new LLM call
+    assert cached_summary(conn, content_hash(TEXT)) == "• cells made in Nevada"
+    assert cached_summary(conn, content_hash(TEXT + " Updated.")) is None
+
+
+def test_fallbacks_and_empty_summaries_are_not_reused(conn):
+    # local fallback summaries are stored without a hash, so they're never a cache hit
+    _store(conn, 1, summary="• local extract", content_hash=None)
+    _store(conn, 2, summary="", content_hash=content_hash(TEXT))
+    assert cached_summary(conn, content_hash(TEXT)) is None
+
+
+def test_hash_is_of_the_text_only():
+    assert content_hash(TEXT) == content_hash(TEXT)
+    assert content_hash(None) == content_hash("")
+    assert len(content_hash(TEXT)) == 40
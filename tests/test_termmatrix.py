@@ -0,0 +1,58 @@
+from datetime import date, datetime, timedelta, timezone
+
+from conftest import article
+from processing.termmatrix import TermMatrix
+from processing.velocity import velocity_from_counts
+from storage.db import upsert_articles, week_over_week
+
+NOW = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+TODAY = NOW.date()
+
+
+def _days(n):
+    return [(TODAY - timedelta(days=i)).isoformat() for i in range(n)]
+
+
+def _matrix(triples, n_days):
+    # one article per (category, day) with any terms
+    articles = {(cat, day) for _, cat, day, _ in triples}
+    return TermMatrix.from_triples(triples, [(c, d, 1) for c, d in articles], _days(n_days)[-1], TODAY.isoformat())
+
+
+def test_steady_term_on_a_young_db_is_not_a_surge():
+    # 1/day for three weeks; the 10 baseline windows before that have no data, not zero counts
+    m = _matrix([("lidar", "EV", d, 1) for d in _days(21)], 13 * 7)
+    assert m.surges(7) == []
+
+
+def test_too_little_history_gives_no_surges():
+    m = _matrix([("lidar", "EV", d, 1 if i else 20) for i, d in enumerate(_days(14))], 13 * 7)
+    assert len(m.baseline_windows(7)) == 1
+    assert m.surges(7) == []
+
+
+def test_spike_against_full_windows():
+    triples = [("lidar", "EV", d, 1) for d in _days(28)] + [("lidar", "EV", _days(1)[0], 20)]
+    s = TermMatrix.from_triples(
+        triples, [("EV", d, 1) for d in _days(28)], _days(28)[-1], TODAY.isoformat()
+    ).surges(7, baseline=3)
+    assert [(x["term"], x["this_week"], x["baseline"]) for x in s] == [("lidar", 27, 7.0)]
+
+
+def test_velocity_matches_the_rollup_counts(conn):
+    cats = ["EV", "Battery", "Policy"]
+    terms = ["lidar", "solid-state", "tariff", "charging", "subsidy", "recall"]
+    rows, n = [], 0
+    for age in range(14):
+        day = (date(2026, 3, 2) - timedelta(days=age)).isoformat()
+        for j in range(age % 4 + 1):
+            n += 1
+            counts = {t: (n * (k + 1)) % 5 for k, t in enumerate(terms) if (n + k) % 3}
+            rows.append((article(n, day=day, category=cats[n % 3]), {t: c for t, c in counts.items() if c}))
+    with conn:
+        upsert_articles(conn, rows)
+
+    got = TermMatrix.from_db(conn, days=14, now=NOW).velocity(7)
+    want = velocity_from_counts(*week_over_week(conn, "category", now=NOW), *week_over_week(conn, "term", now=NOW))
+    for key, by in (("cat_velocity", "category"), ("rising_terms", "term")):
+        assert sorted(got[key], key=lambda x: x[by]) == sorted(want[key], key=lambda x: x[by])
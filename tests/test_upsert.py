@@ -0,0 +1,52 @@
+import pytest
+
+from conftest import article, rollup_tables
+from processing.trends import term_counts
+from storage import db
+from storage.db import upsert_articles
+
+
+def _items(rows):
+    return [(r, term_counts(r)) for r in rows]
+
+
+def _dump(conn):
+    tables = {t: conn.execute(f"SELECT * FROM {t} ORDER BY 1, 2").fetchall() for t in ("articles", "article_terms")}
+    return tables, rollup_tables(conn)
+
+
+def test_batch_writes_what_row_by_row_writes(tmp_path):
+    rows = [article(n, day=f"2026-03-0{1 + n % 2}", category=["EV", "Policy"][n % 2], summary=f"battery {n}")
+            for n in range(6)]
+    # the same url twice in one batch: the last one wins, as row by row
+    rows.append(article(2, category="Battery", summary="recall notice"))
+    batched = db.migrate(db.connect(str(tmp_path / "batched.db")))
+    single = db.migrate(db.connect(str(tmp_path / "single.db")))
+    with batched:
+        upsert_articles(batched, _items(rows))
+    for item in _items(rows):
+        with single:
+            upsert_articles(single, [item])
+    assert _dump(batched) == _dump(single)
+    batched.close()
+    single.close()
+
+
+def test_ids_and_new_flags_in_input_order(conn):
+    with conn:
+        assert upsert_articles(conn, _items([article(1), article(2), article(1)])) == [(1, True), (2, True), (1, False)]
+        assert upsert_articles(conn, _items([article(3), article(2)])) == [(3, True), (2, False)]
+
+
+def test_failed_batch_writes_nothing(conn):
+    broken = article(2)
+    del broken["category"]
+    with pytest.raises(KeyError):
+        with conn:
+            upsert_articles(conn, _items([article(1), broken]))
+    assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 0
+    assert not any(rollup_tables(conn).values())
+
+
+def test_connections_use_wal(conn):
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
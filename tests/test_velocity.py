@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+from conftest import article
+from processing.trends import term_counts
+from processing.velocity import velocity_from_counts, velocity_wow
+from storage.db import upsert_articles, week_over_week
+
+NOW = datetime(2026, 3, 14, 12, 0, tzinfo=timezone.utc)
+
+
+def _fill(conn):
+    # this week = 03-08..03-14 (today included), last week = 03-01..03-07
+    rows = [
+        article(1, day="2026-03-14", category="EV", companies='["Tesla"]', summary="battery recall"),
+        article(2, day="2026-03-08", category="EV", companies='["Tesla", "BYD"]', summary="battery recall"),
+        article(3, day="2026-03-07", category="Policy", companies='["BYD"]', summary="tariff"),
+        article(4, day="2026-03-01", category="EV", summary="battery"),
+        article(5, day="2026-02-28", category="EV", summary="battery"),  # outside both weeks
+    ]
+    with conn:
+        upsert_articles(conn, [(r, term_counts(r)) for r in rows])
+
+
+def test_week_over_week_on_whole_utc_days(conn):
+    _fill(conn)
+    assert week_over_week(conn, "category", now=NOW) == ({"EV": 2}, {"Policy": 1, "EV": 1})
+    assert week_over_week(conn, "company", now=NOW) == ({"Tesla": 2, "BYD": 1}, {"BYD": 1})
+    this_week, last_week = week_over_week(conn, "term", now=NOW)
+    assert this_week["recall"] == 2 and "recall" not in last_week
+    assert last_week["battery"] == 1 and last_week["tariff"] == 1
+
+
+def test_velocity_from_the_rollups(conn):
+    _fill(conn)
+    for n in range(6, 9):
+        r = article(n, day="2026-03-10", category="Battery", summary="solid-state")
+        with conn:
+            upsert_articles(conn, [(r, term_counts(r))])
+    v = velocity_from_counts(*week_over_week(conn, "category", now=NOW), *week_over_week(conn, "term", now=NOW))
+    assert v["cat_velocity"][0] == {"category": "Battery", "this_week": 3, "last_week": 0, "delta": 3, "pct": 999}
+    assert {"term": "solid-state", "this_week": 3, "last_week": 0, "delta": 3} in v["rising_terms"]
+
+
+def test_row_terms_stored_or_not_count_the_same_text():
+    # "lidar" sits between the old 2500-char cut and TEXT_LIMIT: counted either way now
+    r = article(1, title="Plant", summary=" " * 2700 + "lidar lidar", day="2026-03-14")
+    stored = dict(r, terms=term_counts(r))
+    for row in (r, stored):
+        rising = velocity_wow([dict(row), dict(row)], now=NOW)["rising_terms"]
+        assert {"term": "lidar", "this_week": 4, "last_week": 0, "delta": 4} in rising